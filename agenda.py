@@ -0,0 +1,338 @@
+"""
+countDowner 议程模式：从JSON文件加载整场（可跨多天）的议程，每一项有自己的时长、阈值与样式覆盖，到点自动切换
+时间轴预先计算为按开始时刻排序的数组，当前项与下一次切换时刻用二分查找定位；
+跳转、跳过与整体顺延只修改一个偏移量，不重建时间轴
+    python agenda.py 议程.json                 # 打印时间轴与设置修正说明
+    python agenda.py --bench --segments 10000  # 定位/跳转开销
+    python agenda.py --check                   # 跳转/顺延的正确性校验
+议程文件：
+    {"start": "2026-10-18 09:00", "settings": {"timer_font_size": 80},
+     "segments": [{"title": "开场", "duration": "10:00"},
+                  {"title": "主题报告", "duration": "1:30:00", "remind": 10, "warning": 120},
+                  {"title": "午休", "at": "12:00"},
+                  {"title": "下午场", "at": "13:30", "duration": 90, "normal_bg": "#222222"}]}
+    duration 为分钟数或 "MM:SS"/"H:MM:SS"；at 为固定开始时刻 "HH:MM[:SS]"（不早于上一项开始，否则顺延到次日）
+    或 "YYYY-MM-DD HH:MM[:SS]"；没有 at 的项接在上一项之后，没有 duration 的项持续到下一项的固定开始时刻
+"""
+import array
+import bisect
+import datetime
+import json
+import math
+import sys
+import time
+
+import settings_schema
+
+SEGMENT_KEYS = ('title', 'at', 'duration')  # 议程项中不属于设置的键
+
+
+def parse_duration(value):
+    """时长：数字为分钟，字符串为 "MM:SS" 或 "H:MM:SS"，返回秒数"""
+    if isinstance(value, bool):
+        raise ValueError(f"无效的时长：{value!r}")
+    if isinstance(value, (int, float)):
+        seconds = value * 60
+        if not math.isfinite(seconds):
+            raise ValueError(f"无效的时长：{value!r}")
+    else:
+        parts = str(value).split(":")
+        if not 2 <= len(parts) <= 3:
+            raise ValueError(f"时长格式应为 MM:SS 或 H:MM:SS：{value!r}")
+        seconds = 0
+        for part in parts:
+            seconds = seconds * 60 + int(part)
+        if seconds > sys.float_info.max:
+            raise ValueError(f"时长过大：{value!r}")
+    if seconds <= 0:
+        raise ValueError(f"时长必须大于0：{value!r}")
+    return seconds
+
+
+def parse_at(value, not_before):
+    """固定开始时刻 -> 时间戳；只有时分秒时取不早于 not_before 的最近一次"""
+    for pattern in ("%Y-%m-%d %H:%M:%S", "%Y-%m-%d %H:%M"):
+        try:
+            return datetime.datetime.strptime(value, pattern).timestamp()
+        except ValueError:
+            pass
+    for pattern in ("%H:%M:%S", "%H:%M"):
+        try:
+            clock_time = datetime.datetime.strptime(value, pattern).time()
+            break
+        except ValueError:
+            pass
+    else:
+        raise ValueError(f"开始时刻格式应为 HH:MM[:SS] 或 YYYY-MM-DD HH:MM[:SS]：{value!r}")
+    base = datetime.datetime.fromtimestamp(not_before)
+    moment = datetime.datetime.combine(base.date(), clock_time)
+    if moment.timestamp() < not_before:
+        moment += datetime.timedelta(days=1)
+    return moment.timestamp()
+
+
+class Segment:
+    """议程中的一项：开始/结束为时间戳（秒），settings 为该项完整的倒计时设置"""
+    __slots__ = ('title', 'start', 'end', 'fixed', 'settings')
+
+    def __init__(self, title, start, end, fixed, settings):
+        self.title = title
+        self.start = start
+        self.end = end
+        self.fixed = fixed  # 是否为固定开始时刻（顺延到此为止）
+        self.settings = settings
+
+
+class Agenda:
+    """
+    议程时间轴：starts/ends 为按时间排序的定长数组，locate() 二分查找当前项
+    offset 为整体偏移（正数为拖后、负数为提前），只作用到下一个固定开始时刻之前的项，
+    到达该时刻后自动清零
+    """
+    def __init__(self, segments, notes=()):
+        self.segments = segments
+        self.notes = list(notes)  # 加载时的修正说明
+        self.starts = array.array('d', (segment.start for segment in segments))
+        self.ends = array.array('d', (segment.end for segment in segments))
+        self.anchors = [index for index, segment in enumerate(segments) if segment.fixed]  # 固定开始的项
+        self.offset = 0.0
+        self.offset_anchor = len(segments)  # 偏移生效到该项之前
+        self.offset_until = math.inf  # 该项的开始时刻
+
+    def __len__(self):
+        return len(self.segments)
+
+    def locate(self, now):
+        """
+        定位 now 时刻的位置：返回 (项序号, 下一次切换时刻, 是否处于空档)
+        空档（议程开始前、两项之间、提前结束后等待固定时刻）时序号为下一项；议程结束后序号为项数，切换时刻为None
+        """
+        if now >= self.offset_until:
+            self._clear_offset()
+        shifted = now - self.offset
+        if shifted >= self.offset_until:
+            # 提前进行时，固定开始的项仍等到其原定时刻
+            return self.offset_anchor, self.offset_until, True
+        index = bisect.bisect_right(self.starts, shifted) - 1
+        if index < 0:
+            return 0, self._start_at(0), True
+        end = self._end_at(index)
+        if now < end:
+            return index, end, False
+        if index + 1 < len(self.segments):
+            return index + 1, self._start_at(index + 1), True
+        return len(self.segments), None, True
+
+    def _start_at(self, index):
+        start = self.starts[index]
+        return min(start + self.offset, self.offset_until) if index < self.offset_anchor else start
+
+    def _end_at(self, index):
+        end = self.ends[index]
+        return min(end + self.offset, self.offset_until) if index < self.offset_anchor else end
+
+    def _clear_offset(self):
+        self.offset = 0.0
+        self.offset_anchor = len(self.segments)
+        self.offset_until = math.inf
+
+    def _set_offset(self, offset, after, now):
+        """
+        设置偏移，生效到序号 after 之后第一个尚未到开始时刻的固定开始项；
+        开始时刻已过的固定项（如回到其上一项）随偏移一起平移，否则偏移会立即失效
+        """
+        self.offset = offset
+        anchors = self.anchors
+        position = bisect.bisect_right(anchors, after)
+        while position < len(anchors) and self.starts[anchors[position]] <= now:
+            position += 1
+        if position < len(anchors):
+            self.offset_anchor = self.anchors[position]
+            self.offset_until = self.starts[self.offset_anchor]
+        else:
+            self.offset_anchor = len(self.segments)
+            self.offset_until = math.inf
+        if not offset:
+            self._clear_offset()
+
+    def shift(self, seconds, now):
+        """顺延（正数）或提前（负数）当前项的结束及其后的项，直到下一个固定开始时刻"""
+        if now >= self.offset_until:
+            self._clear_offset()
+        index, _, gap = self.locate(now)
+        self._set_offset(self.offset + seconds, index - 1 if gap else index, now)
+
+    def seek(self, index, now):
+        """跳转：第 index 项从 now 开始（其后的项随之平移），返回实际跳转到的序号"""
+        index = max(0, min(index, len(self.segments) - 1))
+        self._set_offset(now - self.starts[index], index, now)
+        return index
+
+    def skip(self, step, now):
+        """跳过：step 为1跳到下一项，-1回到上一项，0重新开始当前项"""
+        index, _, gap = self.locate(now)
+        if gap and step > 0:
+            step -= 1  # 空档中的“下一项”即为即将开始的项
+        return self.seek(index + step, now)
+
+
+def build(data, base=None, now=None):
+    """
+    由议程字典构建时间轴
+    :param base: 各项设置的基础（默认设置），之上依次叠加议程的 settings 与各项的覆盖
+    :param now: 未指定 start 时议程的开始时刻（默认为当前时刻）
+    :return: Agenda，加载中的设置修正记录在 agenda.notes
+    """
+    if not isinstance(data, dict) or not isinstance(data.get('segments'), list) or not data['segments']:
+        raise ValueError("议程文件必须包含非空的 segments 列表")
+    now = time.time() if now is None else now
+    cursor = parse_at(data['start'], now) if data.get('start') else now
+    if not isinstance(data.get('settings', {}), dict):
+        raise ValueError("议程的 settings 必须是JSON对象")
+    common = dict(base or settings_schema.defaults(), **data.get('settings', {}))
+    items = data['segments']
+    notes = []
+    validated = {}  # 相同的覆盖与时长只校验一次，设置字典也在各项间共用
+    segments = []
+    for number, item in enumerate(items, 1):
+        if not isinstance(item, dict):
+            raise ValueError(f"第{number}项必须是JSON对象")
+        title = item.get('title') or f"第{number}项"
+        previous = segments[-1] if segments else None
+        try:
+            fixed = item.get('at') is not None
+            if fixed:
+                start = parse_at(item['at'], previous.start if previous else cursor)
+            else:
+                start = previous.end if previous else cursor  # 接在上一项之后
+            if item.get('duration') is not None:
+                end = start + parse_duration(item['duration'])
+            elif number < len(items) and isinstance(items[number], dict) and items[number].get('at') is not None:
+                end = parse_at(items[number]['at'], start)  # 持续到下一项的固定开始时刻
+            else:
+                raise ValueError("没有时长，且下一项没有固定开始时刻")
+        except (ValueError, OverflowError) as e:  # 时长接近浮点上限时与开始时刻相加会溢出
+            raise ValueError(f"第{number}项：{e}") from None
+        if previous and start < previous.end:
+            notes.append(f"{previous.title}：结束时刻超过下一项的固定开始时刻，已截短")
+            previous.end = start
+        overrides = {key: value for key, value in item.items() if key not in SEGMENT_KEYS}
+        if overrides.pop('total', None) is not None:
+            notes.append(f"{title}：total 由议程时长决定，已忽略")
+        total = max(1, min(999, math.ceil((end - start) / 60)))  # 供阈值规则参考，实际时长以秒计
+        key = (json.dumps(overrides, sort_keys=True), total)
+        if key not in validated:
+            settings, fixes = settings_schema.validate(dict(common, **overrides, total=total))
+            validated[key] = settings
+            notes.extend(f"{title}：{fix}" for fix in fixes)
+        segments.append(Segment(title, start, end, fixed, validated[key]))
+    return Agenda(segments, notes)
+
+
+def load(path, base=None, now=None):
+    """从JSON文件加载议程，格式错误时抛出ValueError"""
+    with open(path, encoding="utf-8") as f:
+        try:
+            data = json.load(f)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"议程文件不是有效的JSON：{e}") from None
+    return build(data, base, now)
+
+
+def check_skips():
+    """校验跳转：A、B、C（10:00固定开始）、D，在C进行中回到上一项、重新开始与跳到下一项都保持在目标项"""
+    errors = []
+
+    def title_at(agenda, index):
+        return agenda.segments[index].title if index < len(agenda) else "（议程结束）"
+
+    day = datetime.date(2026, 1, 1)
+    data = {'start': f"{day} 09:40", 'segments': [
+        {'title': "A", 'duration': 10}, {'title': "B", 'duration': 10},
+        {'title': "C", 'at': f"{day} 10:00", 'duration': 10}, {'title': "D", 'duration': 10}]}
+    now = datetime.datetime(2026, 1, 1, 10, 5).timestamp()
+    for step, expected in ((-1, "B"), (0, "C"), (1, "D"), (-2, "A")):
+        agenda = build(data, now=now)
+        title = title_at(agenda, agenda.skip(step, now))
+        located = [title_at(agenda, agenda.locate(now + delay)[0]) for delay in (0, 1, 300)]
+        if title != expected or located != [expected] * 3:
+            errors.append(f"10:05 跳转 {step:+d}：跳到 {title}，之后定位为 {located}，预期 {expected}")
+    # 回到B之后，B结束时进入C，C结束时进入D
+    agenda = build(data, now=now)
+    agenda.skip(-1, now)
+    for delay, expected in ((600, "C"), (1200, "D")):
+        title = title_at(agenda, agenda.locate(now + delay)[0])
+        if title != expected:
+            errors.append(f"回到B后 {delay}秒 定位为 {title}，预期 {expected}")
+    # 固定开始时刻未到时，提前结束的项之后仍等到原定时刻
+    agenda = build(data, now=now)
+    early = datetime.datetime(2026, 1, 1, 9, 45).timestamp()
+    agenda.skip(1, early)
+    index, transition, gap = agenda.locate(early + 600)
+    if (title_at(agenda, index), gap) != ("C", True) or transition != agenda.starts[2]:
+        errors.append(f"9:45 跳到B后 9:55 定位为 {title_at(agenda, index)}，预期等待C的固定开始时刻")
+    return errors
+
+
+def benchmark(segments=10000, lookups=100000):
+    """生成跨多天的议程（每隔一项为固定开始时刻），测量构建、定位与跳转的平均耗时"""
+    start = datetime.datetime(2026, 1, 1, 8).timestamp()
+    items = []
+    for index in range(segments):
+        item = {'title': f"议程{index}", 'duration': "25:00"}
+        if index % 2 == 0:
+            item['at'] = datetime.datetime.fromtimestamp(start + index * 1800).strftime("%Y-%m-%d %H:%M")
+        items.append(item)
+    begin = time.perf_counter()
+    agenda = build({'segments': items}, now=start)
+    built = time.perf_counter() - begin
+    span = agenda.ends[-1] - start
+    begin = time.perf_counter()
+    for step in range(lookups):
+        agenda.locate(start + span * step / lookups)
+    located = time.perf_counter() - begin
+    begin = time.perf_counter()
+    for step in range(lookups):
+        now = start + span * step / lookups
+        agenda.skip(1, now)
+        agenda.shift(30, now)
+    adjusted = time.perf_counter() - begin
+    return {
+        'segments': segments,
+        'days': round(span / 86400, 1),
+        'build_ms': built * 1000,
+        'locate_us': located / lookups * 1e6,
+        'skip_shift_us': adjusted / lookups * 1e6,
+    }
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="countDowner 议程时间轴")
+    parser.add_argument('path', nargs='?', help="议程JSON文件")
+    parser.add_argument('--bench', action='store_true')
+    parser.add_argument('--segments', type=int, default=10000)
+    parser.add_argument('--check', action='store_true', help="跳转/顺延的正确性校验")
+    args = parser.parse_args()
+    if args.check:
+        errors = check_skips()
+        print(f"正确性校验：{'通过' if not errors else '失败'}")
+        for error in errors:
+            print(f"  {error}")
+        sys.exit(1 if errors else 0)
+    elif args.bench:
+        print(f"议程定位：{benchmark(args.segments)}")
+    elif args.path:
+        try:
+            agenda = load(args.path)
+        except (OSError, ValueError) as e:
+            print(f"议程加载失败：{e}")
+            sys.exit(1)
+        for segment in agenda.segments:
+            start = datetime.datetime.fromtimestamp(segment.start)
+            end = datetime.datetime.fromtimestamp(segment.end)
+            print(f"{start:%m-%d %H:%M:%S} - {end:%H:%M:%S}  {segment.title}{'（固定）' if segment.fixed else ''}")
+        for note in agenda.notes:
+            print(f"修正：{note}")
+    else:
+        parser.print_help()
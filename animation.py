@@ -0,0 +1,344 @@
+"""
+countDowner 动画模式：进度条连续扫过，颜色在 正常 -> 提醒 -> 警告 之间渐变
+颜色按预先计算的查找表取值，每帧不做颜色运算；帧调度器按目标帧率运行，
+机器繁忙时丢帧而不是堆积after回调，并记录帧耗时直方图
+数字仍由倒计时核心在整秒边界更新，动画帧只改变颜色与进度条
+    python animation.py --bench --fps 30 60 --seconds 5
+"""
+import bisect
+import collections
+import heapq
+import itertools
+import math
+import sys
+import time
+
+HISTOGRAM_EDGES_MS = (1, 2, 4, 8, 17, 34, 50, 100)  # 直方图桶上界（毫秒），最后一桶为更大值
+
+
+def _hex_to_rgb(color):
+    color = color.lstrip('#')
+    if len(color) == 3:
+        color = ''.join(c * 2 for c in color)
+    return tuple(int(color[i:i + 2], 16) for i in (0, 2, 4))
+
+
+def _mix(a, b, t):
+    """两个 #rrggbb 颜色按比例t混合"""
+    rgb_a, rgb_b = _hex_to_rgb(a), _hex_to_rgb(b)
+    return "#%02x%02x%02x" % tuple(round(x + (y - x) * t) for x, y in zip(rgb_a, rgb_b))
+
+
+class ColorLUT:
+    """
+    颜色查找表：按剩余秒数取 (文字色, 背景色, 背景透明度, 文字透明度)
+    关键点为 (剩余秒数, 样式)，相邻关键点之间按 steps 级预先插值；
+    透明度量化到 alpha_step，避免每帧都触发窗口透明度设置
+    """
+    def __init__(self, stops, steps=256, alpha_step=0.02):
+        # 关键点按剩余秒数降序，重复的秒数只保留第一个
+        stops = sorted(stops, key=lambda stop: -stop[0])
+        self.stops = []
+        for seconds, style in stops:
+            if not self.stops or seconds < self.stops[-1][0]:
+                self.stops.append((seconds, style))
+        self.steps = steps
+        self._keys = [-seconds for seconds, _ in self.stops]  # 升序，便于bisect
+        self.tables = []  # 每段的插值样式表
+        for (hi, start), (lo, end) in zip(self.stops, self.stops[1:]):
+            table = []
+            for index in range(steps):
+                t = index / (steps - 1)
+                table.append((
+                    _mix(start[0], end[0], t),
+                    _mix(start[1], end[1], t),
+                    round((start[2] + (end[2] - start[2]) * t) / alpha_step) * alpha_step,
+                    round((start[3] + (end[3] - start[3]) * t) / alpha_step) * alpha_step,
+                ))
+            self.tables.append(table)
+
+    def lookup(self, remaining):
+        """剩余秒数 -> 样式，超出首尾关键点时取首尾样式"""
+        segment = bisect.bisect_right(self._keys, -remaining) - 1
+        if segment < 0:
+            return self.stops[0][1]
+        if segment >= len(self.tables):
+            return self.stops[-1][1]
+        hi = self.stops[segment][0]
+        lo = self.stops[segment + 1][0]
+        index = int((hi - remaining) / (hi - lo) * (self.steps - 1))
+        return self.tables[segment][index]
+
+
+class FrameHistogram:
+    """帧耗时直方图：固定桶计数，另保留最近若干样本计算分位数"""
+    def __init__(self, edges_ms=HISTOGRAM_EDGES_MS, keep=4096):
+        self.edges = edges_ms
+        self.counts = [0] * (len(edges_ms) + 1)
+        self.recent = collections.deque(maxlen=keep)  # 最近的样本（毫秒）
+        self.maximum = 0.0
+
+    def add(self, ms):
+        self.counts[bisect.bisect_left(self.edges, ms)] += 1
+        self.recent.append(ms)
+        if ms > self.maximum:
+            self.maximum = ms
+
+    def percentile(self, p):
+        samples = sorted(self.recent)
+        return samples[min(len(samples) - 1, int(len(samples) * p))] if samples else None
+
+    def summary(self):
+        labels = [f"<={edge}ms" for edge in self.edges] + [f">{self.edges[-1]}ms"]
+        return {
+            'buckets': dict(zip(labels, self.counts)),
+            'p50_ms': self.percentile(0.5),
+            'p99_ms': self.percentile(0.99),
+            'max_ms': self.maximum,
+        }
+
+
+class FrameScheduler:
+    """
+    帧调度器：帧时刻固定在 起点 + k*帧间隔 的网格上，任何时候只挂起一个after回调
+    一帧处理完时若已错过后续网格点，直接跳到下一个未来的网格点并计为丢帧
+    on_frame() 返回False时停止调度（如暂停、超时后不再需要动画）
+    """
+    def __init__(self, root, on_frame, fps=30, clock=time.perf_counter):
+        self.root = root
+        self.on_frame = on_frame
+        self.fps = fps  # 目标帧率
+        self.period = 1 / fps  # 帧间隔（秒）
+        self.clock = clock
+        self.after_id = None  # 当前挂起的after任务ID
+        self.running = False
+        self._next = None  # 下一帧的网格时刻
+        self._last_begin = None
+        self.frames = 0  # 已绘制帧数
+        self.dropped = 0  # 丢弃的帧数
+        self.work = FrameHistogram()  # 每帧处理耗时
+        self.intervals = FrameHistogram()  # 相邻两帧的实际间隔
+        self.active_seconds = 0.0  # 动画运行的墙钟时长
+        self.cpu_seconds = 0.0  # 动画运行期间的进程CPU时间
+        self._started = None  # (墙钟, CPU) 本次运行的起点
+
+    def start(self):
+        """开始调度（已在运行时不重复启动）"""
+        if self.running:
+            return
+        self.running = True
+        self._next = self.clock()
+        self._last_begin = None
+        self._started = (time.perf_counter(), time.process_time())
+        self._frame()
+
+    def stop(self):
+        """停止调度并取消挂起的回调"""
+        if self.after_id:
+            self.root.after_cancel(self.after_id)
+            self.after_id = None
+        if self.running:
+            self.running = False
+            self._account()
+
+    def _account(self):
+        wall, cpu = self._started
+        self.active_seconds += time.perf_counter() - wall
+        self.cpu_seconds += time.process_time() - cpu
+
+    def _frame(self):
+        self.after_id = None
+        begin = self.clock()
+        if self._last_begin is not None:
+            self.intervals.add((begin - self._last_begin) * 1000)
+        self._last_begin = begin
+        keep = self.on_frame()
+        end = self.clock()
+        self.frames += 1
+        self.work.add((end - begin) * 1000)
+        if keep is False:
+            self.running = False
+            self._account()
+            return
+        self._next += self.period
+        if self._next <= end:
+            # 处理超时：跳过已错过的网格点，不补画
+            missed = int((end - self._next) / self.period) + 1
+            self.dropped += missed
+            self._next += missed * self.period
+        self.after_id = self.root.after(max(1, math.ceil((self._next - end) * 1000)), self._frame)
+
+    def stats(self):
+        """统计信息：帧数、丢帧数、实际帧率、CPU占用与帧耗时/帧间隔直方图"""
+        active, cpu = self.active_seconds, self.cpu_seconds
+        if self.running:
+            active += time.perf_counter() - self._started[0]
+            cpu += time.process_time() - self._started[1]
+        return {
+            'fps_target': self.fps,
+            'frames': self.frames,
+            'dropped': self.dropped,
+            'fps_actual': self.frames / active if active else 0.0,
+            'cpu_percent': cpu / active * 100 if active else 0.0,
+            'frame_work': self.work.summary(),
+            'frame_interval': self.intervals.summary(),
+        }
+
+
+class ProgressBar:
+    """窗口底部的进度条（Tk画布），与 TkRenderCache 一样只推送变化的字段"""
+    def __init__(self, canvas, height=6):
+        self.canvas = canvas
+        self.height = height
+        self.width = 1  # 画布宽度，由<Configure>事件更新，避免每帧查询
+        self.bar = canvas.create_rectangle(0, 0, 0, height, width=0)
+        self.applied = {}  # 已应用的状态
+        self.tk_calls = 0
+        canvas.bind("<Configure>", self._on_configure)
+
+    def _on_configure(self, event):
+        self.width = event.width
+        self.applied.pop('x', None)
+
+    def render(self, fraction, fg, bg):
+        """按剩余比例绘制，返回本次Tk调用次数"""
+        applied = self.applied
+        calls = 0
+        x = round(self.width * min(1.0, max(0.0, fraction)))
+        if applied.get('x') != x:
+            self.canvas.coords(self.bar, 0, 0, x, self.height)
+            applied['x'] = x
+            calls += 1
+        if applied.get('fg') != fg:
+            self.canvas.itemconfigure(self.bar, fill=fg)
+            applied['fg'] = fg
+            calls += 1
+        if applied.get('bg') != bg:
+            self.canvas.configure(bg=bg)
+            applied['bg'] = bg
+            calls += 1
+        self.tk_calls += calls
+        return calls
+
+
+def build_color_lut(core, styles, steps=256):
+    """
+    按核心的阈值构建颜色查找表：开始时为正常色，到提醒阈值时为提醒色，到警告阈值时为警告色
+    styles: 阶段 -> (文字色, 背景色, 背景透明度, 文字透明度)
+    """
+    stops = [(core.original_total_seconds, styles['normal'])]
+    if core.remind_seconds < core.original_total_seconds:
+        stops.append((core.remind_seconds, styles['remind']))
+    stops.append((min(core.warning_seconds, core.remind_seconds), styles['warning']))
+    stops.append((0, styles['warning']))
+    return ColorLUT(stops, steps)
+
+
+class SleepLoop:
+    """无界面基准测试用的最小事件循环：提供 after/after_cancel，按时刻顺序休眠执行回调"""
+    def __init__(self):
+        self._queue = []
+        self._seq = itertools.count()
+        self._cancelled = set()
+
+    def after(self, ms, fn, *args):
+        task_id = next(self._seq)
+        heapq.heappush(self._queue, (time.perf_counter() + ms / 1000, task_id, fn, args))
+        return task_id
+
+    def after_cancel(self, task_id):
+        self._cancelled.add(task_id)
+
+    def run(self, seconds):
+        end = time.perf_counter() + seconds
+        while self._queue:
+            due, task_id, fn, args = self._queue[0]
+            if due > end:
+                break
+            delay = due - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            heapq.heappop(self._queue)
+            if task_id in self._cancelled:
+                self._cancelled.discard(task_id)
+                continue
+            fn(*args)
+
+
+class _NullWidget:
+    """基准测试中代替Tk控件，只计数调用"""
+    def __init__(self):
+        self.calls = 0
+
+    def _call(self, *args, **kwargs):
+        self.calls += 1
+
+    config = configure = attributes = coords = itemconfigure = _call
+
+    def create_rectangle(self, *args, **kwargs):
+        return 1
+
+    def bind(self, *args):
+        pass
+
+
+def benchmark(fps=30, seconds=5.0):
+    """
+    无界面测量动画模式的CPU开销：真实时钟驱动倒计时核心，每帧查表取色、
+    经渲染缓存与进度条推送变化（Tk控件以计数对象代替，不含Tk自身绘制耗时）
+    """
+    from countDowner import TkRenderCache
+    from countdown_core import CountdownCore
+    import profile_store
+
+    # 总时长取较短值，使测试期间经过各阶段的颜色渐变
+    settings = dict(profile_store.DEFAULT_SETTINGS, total=1, remind=1, warning=30)
+    core = CountdownCore(settings, clock=time.perf_counter)
+    styles = {
+        stage: (settings[f"{stage}_fg"], settings[f"{stage}_bg"], settings[f"{stage}_bg_alpha"],
+                settings[f"{stage}_fg_alpha"])
+        for stage in ('normal', 'remind', 'warning')
+    }
+    lut = build_color_lut(core, styles)
+    root, label, canvas = _NullWidget(), _NullWidget(), _NullWidget()
+    renderer = TkRenderCache(root, label)
+    bar = ProgressBar(canvas)
+    bar.width = 300
+
+    def on_frame():
+        remaining = core.clock.remaining()
+        fg, bg, alpha, fg_alpha = lut.lookup(remaining)
+        renderer.render(core.display_text(), None, fg, bg, alpha, fg_alpha)
+        bar.render(remaining / core.original_total_seconds, fg, bg)
+
+    loop = SleepLoop()
+
+    def on_second():
+        # 数字仍按整秒边界更新
+        core.tick()
+        loop.after(core.next_wakeup_ms(), on_second)
+
+    scheduler = FrameScheduler(loop, on_frame, fps)
+    on_second()
+    scheduler.start()
+    loop.run(seconds)
+    scheduler.stop()
+    result = scheduler.stats()
+    result['tk_calls_per_frame'] = (renderer.tk_calls + bar.tk_calls) / scheduler.frames if scheduler.frames else 0.0
+    result['max_display_error_ms'] = core.stats().get('max_display_error_ms')
+    return result
+
+
+if __name__ == "__main__":
+    import argparse
+    import json
+    parser = argparse.ArgumentParser(description="countDowner 动画模式基准测试")
+    parser.add_argument('--bench', action='store_true', help="测量指定帧率下的CPU占用与帧耗时")
+    parser.add_argument('--fps', type=int, nargs='+', default=[30, 60], help="目标帧率（可多个）")
+    parser.add_argument('--seconds', type=float, default=5.0, help="每个帧率的测试秒数")
+    args = parser.parse_args()
+    if not args.bench:
+        parser.print_help()
+        sys.exit(0)
+    for fps in args.fps:
+        print(f"动画模式 {fps}FPS：{json.dumps(benchmark(fps, args.seconds), ensure_ascii=False)}")
@@ -0,0 +1,489 @@
+"""
+countDowner 倒计时片段导出（需要 Pillow）：不打开窗口，按设置的阶段、颜色、字体与超时方式
+把整段倒计时渲染为 PNG 帧序列、GIF/APNG 动图或原始帧流，便于无法运行本程序的场地嵌入幻灯片
+每秒一帧，帧由 (分辨率, 文字, 字号, 颜色) 完全决定：按其摘要存放在内容寻址的帧缓存中，
+相同的帧（如静止的超时文字）只渲染一次，再次导出同一设置时直接复用；未缓存的帧按时间顺序分块交给进程池，
+每个进程逐格更新覆盖率蒙版（只重绘变化的数字），蒙版直接作为调色板PNG的像素、阶段颜色即调色板，
+文字所在行带以外全为背景，其压缩结果按行数缓存，每帧只压缩文字行带
+    python clip_export.py --minutes 60 --size 1920x1080 1280x720 --format png gif
+    python clip_export.py --profile 汇报 --format apng --transparent
+    python clip_export.py --format raw   # 原始RGB帧，ffmpeg -f rawvideo -pix_fmt rgb24 -s WxH -framerate 1 -i ...
+    python clip_export.py --bench        # 60分钟、三种分辨率、空缓存，报告每核每秒帧数
+"""
+import concurrent.futures
+import hashlib
+import math
+import os
+import shutil
+import struct
+import sys
+import time
+import zlib
+
+import profile_store
+from countdown_core import CountdownCore, VirtualClock
+from glyph_render import GLYPH_CHARS, hex_to_rgb, load_font
+
+try:
+    from PIL import Image, ImageDraw
+except ImportError:  # Pillow为可选依赖
+    Image = None
+
+FORMATS = ('png', 'gif', 'apng', 'raw')
+DEFAULT_SIZES = ("1920x1080",)
+FONT_FAMILY = 'SimHei'  # 与倒计时窗口相同的字体
+MARGIN = 0.08  # 文字与画面边缘的留白（占宽/高的比例）
+TAIL_SECONDS = 10  # 默认导出到超时后的秒数
+PNG_LEVEL = 1  # PNG压缩级别：调色板帧大部分为背景，低级别已足够小且编码最快
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+ADLER_BASE = 65521
+CACHE_VERSION = 2  # 渲染方式变化时修改，使旧缓存失效
+CHUNKS_PER_WORKER = 4  # 每个进程分到的块数（块内按时间顺序，便于逐格更新）
+
+
+def is_available():
+    return Image is not None
+
+
+def parse_size(value):
+    """"1920x1080" -> (1920, 1080)"""
+    try:
+        width, height = (int(part) for part in value.lower().split("x"))
+    except ValueError:
+        raise ValueError(f"分辨率格式应为 宽x高：{value!r}") from None
+    if width < 16 or height < 16:
+        raise ValueError(f"分辨率过小：{value!r}")
+    return width, height
+
+
+def stage_styles(settings):
+    """阶段 -> (字体种类, 文字色, 文字透明度, 背景色, 背景透明度)，与倒计时窗口的阶段样式一致"""
+    styles = {stage: ('timer', settings[f"{stage}_fg"], settings[f"{stage}_fg_alpha"], settings[f"{stage}_bg"],
+                      settings[f"{stage}_bg_alpha"]) for stage in ('normal', 'remind', 'warning')}
+    if settings['timeout_mode'] == 'negative':
+        styles['timeout'] = styles['warning']
+    else:
+        styles['timeout'] = ('timeout', settings['timeout_text_color']) + styles['warning'][2:]
+    return styles
+
+
+def timeline(settings, tail=TAIL_SECONDS):
+    """用虚拟时钟走完整段倒计时，返回每秒的 (显示文字, 阶段)"""
+    clock = VirtualClock(0.0)
+    core = CountdownCore(settings, clock=clock)
+    frames = [(core.display_text(), core.stage)]
+    for _ in range(math.ceil(core.original_total_seconds) + tail):
+        clock.advance(1)
+        core.tick()
+        frames.append((core.display_text(), core.stage))
+    return frames
+
+
+def _shape(text):
+    return "".join("0" if char in "0123456789" else char for char in text)
+
+
+def fit_pixel_size(family, texts, width, height, limit=None):
+    """能让 texts 中每个文字（数字按最宽的数字计）都放进画面的最大像素字号"""
+    available_width = width * (1 - 2 * MARGIN)
+    available_height = height * (1 - 2 * MARGIN)
+    widest = max("0123456789", key=lambda digit: load_font(family, 100).getlength(digit))
+    shapes = {_shape(text).replace("0", widest) for text in texts}
+    low, high = 4, min(limit or height, height)
+    while low < high:
+        middle = (low + high + 1) // 2
+        font = load_font(family, middle)
+        ascent, descent = font.getmetrics()
+        if ascent + descent <= available_height and all(font.getlength(shape) <= available_width
+                                                        for shape in shapes):
+            low = middle
+        else:
+            high = middle - 1
+    return low
+
+
+def palette(fg, fg_alpha, bg, bg_alpha, transparent):
+    """
+    覆盖率 -> 颜色的调色板：帧本身是0-255的文字覆盖率蒙版，套用调色板即得到该阶段的画面
+    不透明时文字色按文字透明度与背景色混合；透明时按 alpha 合成（背景透明度与文字透明度各自生效）
+    :return: (RGB调色板, 各项透明度)，不透明时透明度为None
+    """
+    fg, bg = hex_to_rgb(fg), hex_to_rgb(bg)
+    colors = bytearray()
+    alphas = bytearray() if transparent else None
+    for coverage in range(256):
+        fa = fg_alpha * coverage / 255
+        if not transparent:
+            colors.extend(round(b + (f - b) * fa) for f, b in zip(fg, bg))
+            continue
+        alpha = fa + bg_alpha * (1 - fa)
+        if alpha <= 0:
+            colors.extend((0, 0, 0))
+        else:
+            colors.extend(round((f * fa + b * bg_alpha * (1 - fa)) / alpha) for f, b in zip(fg, bg))
+        alphas.append(round(alpha * 255))
+    return bytes(colors), alphas and bytes(alphas)
+
+
+def _png_chunk(kind, data):
+    return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+
+
+def _deflate(raw, final):
+    """原始 deflate 数据；非结尾段以完全刷新结束（字节对齐且不引用之前的数据），可直接拼接"""
+    compressor = zlib.compressobj(PNG_LEVEL, zlib.DEFLATED, -15, 9, zlib.Z_RLE)
+    return compressor.compress(raw) + compressor.flush(zlib.Z_FINISH if final else zlib.Z_FULL_FLUSH)
+
+
+def _adler_zeros(adler, count):
+    """Adler-32 校验值之后再接 count 个零字节（不必逐字节计算）"""
+    low, high = adler & 0xffff, adler >> 16
+    return (((high + count * low) % ADLER_BASE) << 16) | low
+
+
+class PngEncoder:
+    """
+    8位调色板PNG编码：像素即覆盖率蒙版，文字行带以外的行全为0，
+    其压缩数据按行数缓存，每帧只压缩行带，与缓存的上下两段拼成一个zlib流
+    """
+    def __init__(self, size):
+        self.width, self.height = size
+        ihdr = struct.pack(">IIBBBBB", self.width, self.height, 8, 3, 0, 0, 0)  # 8位、调色板、不隔行
+        self.header = PNG_SIGNATURE + _png_chunk(b"IHDR", ihdr)
+        self.blank = {}  # (行数, 是否结尾) -> 压缩数据
+        self.row_bytes = self.width + 1  # 每行前有一个过滤类型字节（0为不过滤）
+
+    def _blank_rows(self, rows, final):
+        key = (rows, final)
+        data = self.blank.get(key)
+        if data is None:
+            data = self.blank[key] = _deflate(bytes(self.row_bytes * rows), final)
+        return data
+
+    def encode(self, mask, top, bottom, colors, alphas=None):
+        """mask 为L模式整帧蒙版，top/bottom 为可能非零的行范围"""
+        band = Image.new('L', (self.row_bytes, bottom - top), 0)
+        band.paste(mask.crop((0, top, self.width, bottom)), (1, 0))
+        raw = band.tobytes()
+        adler = _adler_zeros(1, self.row_bytes * top)
+        adler = zlib.adler32(raw, adler)
+        adler = _adler_zeros(adler, self.row_bytes * (self.height - bottom))
+        stream = b"".join((b"\x78\x01", self._blank_rows(top, False), _deflate(raw, False),
+                           self._blank_rows(self.height - bottom, True), struct.pack(">I", adler)))
+        chunks = [self.header, _png_chunk(b"PLTE", colors)]
+        if alphas:
+            chunks.append(_png_chunk(b"tRNS", alphas))
+        chunks += [_png_chunk(b"IDAT", stream), _png_chunk(b"IEND", b"")]
+        return b"".join(chunks)
+
+
+def frame_digest(size, text, pixel_size, style, transparent):
+    """帧的内容地址：同一分辨率、文字、字号、颜色与透明方式的帧内容完全相同"""
+    key = repr((CACHE_VERSION, FONT_FAMILY, size, text, pixel_size, style[1:], transparent))
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()[:32]
+
+
+class MaskCompositor:
+    """
+    文字覆盖率蒙版的逐格合成（每个进程一个）：数字、冒号、负号各自一格，其它文字整体一格，
+    布局（字号与文字形状）不变时只重绘内容变化的格子
+    """
+    def __init__(self, size, family=FONT_FAMILY):
+        self.size = size
+        self.family = family
+        self.masks = {}  # (像素字号, 文字) -> 字形蒙版
+        self.frame = Image.new('L', size, 0)
+        self._key = None
+        self._cells = []  # [(文字, x, 宽度)]
+        self._origin_y = 0
+        self._cell_height = 0
+
+    def mask(self, pixel_size, part):
+        key = (pixel_size, part)
+        mask = self.masks.get(key)
+        if mask is None:
+            font = load_font(self.family, pixel_size)
+            ascent, descent = font.getmetrics()
+            mask = Image.new('L', (max(1, round(font.getlength(part))), ascent + descent), 0)
+            ImageDraw.Draw(mask).text((0, 0), part, font=font, fill=255)
+            self.masks[key] = mask
+        return mask
+
+    def render(self, text, pixel_size):
+        parts = list(text) if all(char in GLYPH_CHARS for char in text) else [text]
+        key = (pixel_size, _shape(text) if len(parts) > 1 else text)
+        if key != self._key:
+            masks = [self.mask(pixel_size, part) for part in parts]
+            x = (self.size[0] - sum(mask.width for mask in masks)) // 2
+            self._cell_height = masks[0].height
+            self._origin_y = (self.size[1] - self._cell_height) // 2
+            self._cells = []
+            for mask in masks:
+                self._cells.append((None, x, mask.width))
+                x += mask.width
+            self.frame.paste(0, (0, 0) + self.size)
+            self._key = key
+        for index, part in enumerate(parts):
+            old, x, width = self._cells[index]
+            if old == part:
+                continue
+            mask = self.mask(pixel_size, part)
+            if old is not None:
+                self.frame.paste(0, (x, self._origin_y, x + width, self._origin_y + mask.height))
+            self.frame.paste(mask, (x, self._origin_y))  # 格子已清空，直接写入覆盖度（以自身为蒙版会变成覆盖度的平方）
+            self._cells[index] = (part, x, width)
+        return self.frame
+
+    @property
+    def band(self):
+        """当前文字所在的行范围 (起始行, 结束行)，其余行全为背景"""
+        height = self._cell_height
+        return max(0, self._origin_y), min(self.size[1], self._origin_y + height)
+
+
+_compositors = {}  # 工作进程内：分辨率 -> (MaskCompositor, PngEncoder)
+
+
+def _render_chunk(size, transparent, cache_dir, jobs):
+    """工作进程：按顺序渲染一块帧并写入缓存，返回 (帧数, CPU耗时)"""
+    begin = time.process_time()
+    if size not in _compositors:
+        _compositors[size] = (MaskCompositor(size), PngEncoder(size))
+    compositor, encoder = _compositors[size]
+    palettes = {}
+    for digest, text, pixel_size, style in jobs:
+        frame = compositor.render(text, pixel_size)
+        colors = palettes.get(style)
+        if colors is None:
+            colors = palettes[style] = palette(*style[1:], transparent)
+        path = os.path.join(cache_dir, f"{digest}.png")
+        temporary = f"{path}.{os.getpid()}.tmp"
+        with open(temporary, "wb") as f:
+            f.write(encoder.encode(frame, *compositor.band, *colors))
+        os.replace(temporary, path)
+    return len(jobs), time.process_time() - begin
+
+
+def default_cache_dir():
+    return os.path.join(profile_store.get_config_dir(), "clip-cache")
+
+
+def plan_frames(settings, size, tail, transparent):
+    """整段倒计时在某一分辨率下每秒的帧：[(摘要, 文字, 像素字号, 样式)]"""
+    frames = timeline(settings, tail)
+    styles = stage_styles(settings)
+    timer_texts = [text for text, stage in frames if styles[stage][0] == 'timer']
+    timer_size = fit_pixel_size(FONT_FAMILY, timer_texts, *size) if timer_texts else None
+    timeout_size = None
+    if settings['timeout_mode'] == 'text':
+        # 自定义超时文字：放得下的最大字号，且与数字的比例不超过设置中的字号比例
+        limit = max(4, round((timer_size or size[1]) * settings['timeout_text_size'] / settings['timer_font_size']))
+        timeout_size = fit_pixel_size(FONT_FAMILY, [settings['timeout_text']], *size, limit=limit)
+    result = []
+    for text, stage in frames:
+        style = styles[stage]
+        pixel_size = timer_size if style[0] == 'timer' else timeout_size
+        result.append((frame_digest(size, text, pixel_size, style, transparent), text, pixel_size, style))
+    return result
+
+
+def render_frames(frame_plans, cache_dir, transparent=False, workers=None):
+    """
+    渲染缓存中没有的帧：同一内容只渲染一次，按分辨率与时间顺序分块交给进程池
+    :param frame_plans: {分辨率: plan_frames 的结果}
+    :return: 统计信息
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    workers = workers or os.cpu_count() or 1
+    pending = {}
+    total = unique = 0
+    for size, frames in frame_plans.items():
+        jobs = []
+        seen = set()
+        for frame in frames:
+            total += 1
+            if frame[0] in seen:
+                continue
+            seen.add(frame[0])
+            unique += 1
+            if not os.path.exists(os.path.join(cache_dir, f"{frame[0]}.png")):
+                jobs.append(frame)
+        pending[size] = jobs
+    to_render = sum(len(jobs) for jobs in pending.values())
+    chunk = max(32, math.ceil(to_render / (workers * CHUNKS_PER_WORKER))) if to_render else 1
+    rendered = 0
+    cpu_seconds = 0.0
+    begin = time.perf_counter()
+    if to_render:
+        tasks = [(size, jobs[start:start + chunk]) for size, jobs in pending.items()
+                 for start in range(0, len(jobs), chunk)]
+        if workers == 1:
+            results = [_render_chunk(size, transparent, cache_dir, part) for size, part in tasks]
+        else:
+            with concurrent.futures.ProcessPoolExecutor(workers) as pool:
+                futures = [pool.submit(_render_chunk, size, transparent, cache_dir, part) for size, part in tasks]
+                results = [future.result() for future in futures]
+        for count, seconds in results:
+            rendered += count
+            cpu_seconds += seconds
+    wall = time.perf_counter() - begin
+    return {
+        'frames': total,
+        'unique_frames': unique,
+        'cache_hits': unique - rendered,
+        'rendered': rendered,
+        'workers': workers,
+        'render_seconds': round(wall, 2),
+        'fps_per_core': rendered / cpu_seconds if cpu_seconds else 0.0,
+        'fps_total': rendered / wall if rendered and wall else 0.0,
+    }
+
+
+def _runs(frames):
+    """相邻相同的帧合并为一段：[(摘要, 持续秒数)]"""
+    runs = []
+    for frame in frames:
+        if runs and runs[-1][0] == frame[0]:
+            runs[-1][1] += 1
+        else:
+            runs.append([frame[0], 1])
+    return runs
+
+
+def _link(source, target):
+    """帧序列中的文件硬链接到缓存（同一份内容不重复占用磁盘），不支持时复制"""
+    if os.path.lexists(target):
+        os.remove(target)
+    try:
+        os.link(source, target)
+    except OSError:
+        shutil.copyfile(source, target)
+
+
+def _open_frame(path, mode=None):
+    """读取缓存的帧：mode 为需要转换的模式，None 为保持调色板模式（GIF 只有1位透明，去掉透明度）"""
+    with Image.open(path) as image:
+        image.load()
+        if mode:
+            return image.convert(mode)
+        image.info.pop('transparency', None)
+        return image
+
+
+class _LazyFrames:
+    """按需从缓存读取的帧序列：Pillow 保存动图时会遍历两次，每次都重新打开文件，不把全部帧留在内存中"""
+    def __init__(self, paths, mode=None):
+        self.paths = paths
+        self.mode = mode
+
+    def __iter__(self):
+        for path in self.paths:
+            yield _open_frame(path, self.mode)
+
+
+def write_output(frames, size, fmt, output, cache_dir, transparent=False):
+    """把缓存中的帧组装为输出，返回输出路径"""
+    width, height = size
+    cached = lambda digest: os.path.join(cache_dir, f"{digest}.png")
+    if fmt == 'png':
+        directory = os.path.join(output, f"{width}x{height}")
+        os.makedirs(directory, exist_ok=True)
+        for index, frame in enumerate(frames):
+            _link(cached(frame[0]), os.path.join(directory, f"frame_{index:05d}.png"))
+        return directory
+    os.makedirs(output, exist_ok=True)
+    if fmt == 'raw':
+        mode = 'RGBA' if transparent else 'RGB'
+        path = os.path.join(output, f"countdown_{width}x{height}.{mode.lower()}")
+        with open(path, "wb") as f:
+            for digest, seconds in _runs(frames):
+                with Image.open(cached(digest)) as image:
+                    data = image.convert(mode).tobytes()
+                for _ in range(seconds):
+                    f.write(data)
+        return path
+    # 动图：相邻相同的帧合并为一帧（延长显示时间），只播放一次
+    runs = _runs(frames)
+    path = os.path.join(output, f"countdown_{width}x{height}.{'gif' if fmt == 'gif' else 'png'}")
+    # APNG 所有帧共用一个调色板，阶段颜色不同的帧需转为真彩色；GIF 每帧可带自己的调色板
+    mode = None if fmt == 'gif' else 'RGBA' if transparent else 'RGB'
+    options = {'save_all': True, 'append_images': _LazyFrames([cached(digest) for digest, _ in runs[1:]], mode),
+               'duration': [seconds * 1000 for _, seconds in runs]}
+    first = _open_frame(cached(runs[0][0]), mode)
+    if fmt == 'gif':
+        first.save(path, 'GIF', **options)  # 不写循环扩展，播放一次
+    else:
+        first.save(path, 'PNG', loop=1, compress_level=PNG_LEVEL, **options)
+    return path
+
+
+def export(settings, sizes=DEFAULT_SIZES, formats=('png',), output="countdown_clip", tail=TAIL_SECONDS,
+           transparent=False, workers=None, cache_dir=None):
+    """导出倒计时片段，返回 (输出路径列表, 统计信息)"""
+    cache_dir = cache_dir or default_cache_dir()
+    begin = time.perf_counter()
+    plans = {parse_size(size) if isinstance(size, str) else tuple(size): None for size in sizes}
+    for size in plans:
+        plans[size] = plan_frames(settings, size, tail, transparent)
+    stats = render_frames(plans, cache_dir, transparent, workers)
+    assembled = time.perf_counter()
+    outputs = [write_output(frames, size, fmt, output, cache_dir, transparent)
+               for size, frames in plans.items() for fmt in formats]
+    stats['output_seconds'] = round(time.perf_counter() - assembled, 2)
+    stats['total_seconds'] = round(time.perf_counter() - begin, 2)
+    return outputs, stats
+
+
+def benchmark(minutes=60, sizes=("1920x1080", "1280x720", "640x360"), workers=None):
+    """空缓存导出60分钟的PNG帧序列（三种分辨率），报告渲染吞吐；再导出一次验证缓存全部命中"""
+    import tempfile
+    settings = profile_store.with_duration(profile_store.DEFAULT_SETTINGS, minutes)
+    directory = tempfile.mkdtemp(prefix="countdowner-clip-")
+    try:
+        cache_dir = os.path.join(directory, "cache")
+        output = os.path.join(directory, "out")
+        _, cold = export(settings, sizes, ('png',), output, workers=workers, cache_dir=cache_dir)
+        _, warm = export(settings, sizes, ('png',), output, workers=workers, cache_dir=cache_dir)
+        cached_bytes = sum(entry.stat().st_size for entry in os.scandir(cache_dir))
+        return {'cold': cold, 'warm': warm, 'cache_mb': round(cached_bytes / 1e6, 1)}
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="countDowner 倒计时片段导出（无窗口）")
+    parser.add_argument('--profile', metavar='NAME', help="使用指定的配置档案（默认为上次使用的设置）")
+    parser.add_argument('--minutes', type=int, metavar='N', help="倒计时分钟数")
+    parser.add_argument('--size', nargs='+', default=list(DEFAULT_SIZES), metavar='WxH', help="输出分辨率，可多个")
+    parser.add_argument('--format', nargs='+', default=['png'], choices=FORMATS, help="输出格式，可多个")
+    parser.add_argument('--output', default="countdown_clip", help="输出目录")
+    parser.add_argument('--tail', type=int, default=TAIL_SECONDS, help="超时后继续导出的秒数")
+    parser.add_argument('--transparent', action='store_true', help="按背景/文字透明度输出透明帧（png/apng/raw，GIF不支持）")
+    parser.add_argument('--workers', type=int, help="渲染进程数（默认为CPU核数）")
+    parser.add_argument('--cache', metavar='DIR', help="帧缓存目录（默认在配置目录下）")
+    parser.add_argument('--bench', action='store_true')
+    args = parser.parse_args()
+    if not is_available():
+        print("需要安装 Pillow：pip install pillow")
+        sys.exit(1)
+    if args.bench:
+        print(f"片段导出：{benchmark(workers=args.workers)}")
+        sys.exit(0)
+    settings = profile_store.load_profile(args.profile)
+    if settings is None:
+        if args.profile:
+            print(f"配置档案不存在：{args.profile}")
+            sys.exit(1)
+        settings = profile_store.DEFAULT_SETTINGS
+    if args.minutes:
+        settings = profile_store.with_duration(settings, args.minutes)
+    try:
+        outputs, stats = export(settings, args.size, args.format, args.output, args.tail, args.transparent,
+                                args.workers, args.cache)
+    except (OSError, ValueError) as e:
+        print(f"导出失败：{e}")
+        sys.exit(1)
+    for path in outputs:
+        print(f"已导出：{path}")
+    print(f"统计：{stats}")
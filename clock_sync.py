@@ -0,0 +1,280 @@
+"""
+countDowner 多机时间同步：一台实例作为时间源，其余实例按NTP方式估计时钟偏移与往返延迟，
+按时间源的截止时刻显示剩余时间，保证多块屏幕在同一时刻显示同一秒
+时间源的截止时刻以其单调时钟表示，跟随端用 本地单调时钟 + 偏移 换算到时间源的时间轴
+    python clock_sync.py --bench --followers 3 --skew 5 --seconds 20
+"""
+import collections
+import json
+import socket
+import subprocess
+import sys
+import threading
+import time
+
+SYNC_PORT = 47293  # 默认同步端口（UDP）
+PEER_TTL = 30  # 跟随端超过该秒数未轮询则不再推送状态
+
+
+class SyncAuthority:
+    """
+    时间源：UDP应答跟随端的对时请求，并在状态变化时主动推送给近期轮询过的跟随端
+    状态由界面线程通过 publish() 发布，网络线程只读取不可变快照
+    """
+    def __init__(self, host="0.0.0.0", port=SYNC_PORT, clock=time.monotonic):
+        self.clock = clock  # 时间源时钟（与倒计时核心使用同一时钟）
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.bind((host, port))
+        self.port = self.sock.getsockname()[1]
+        self.state = None  # 最新状态快照
+        # 状态版本号，跟随端只采用更新的版本；以启动时的墙钟毫秒数起算，时间源重启后版本号仍大于之前的
+        self.version = time.time_ns() // 1000000
+        self.peers = {}  # 跟随端地址 -> 最近一次轮询时刻
+        self.requests = 0  # 收到的对时请求数
+        self.closed = False
+        self.thread = threading.Thread(target=self._serve, name="countDowner-sync", daemon=True)
+        self.thread.start()
+
+    def publish(self, state):
+        """发布新状态（界面线程调用），并推送给近期活跃的跟随端"""
+        self.state = dict(state)
+        self.version += 1
+        now = self.clock()
+        packet = self._encode({'push': True, 'version': self.version, 'state': self.state, 't2': now})
+        for address, seen in list(self.peers.items()):
+            if now - seen > PEER_TTL:
+                self.peers.pop(address, None)
+                continue
+            try:
+                self.sock.sendto(packet, address)
+            except OSError:
+                pass
+
+    @staticmethod
+    def _encode(message):
+        return json.dumps(message, separators=(',', ':')).encode("utf-8")
+
+    def _serve(self):
+        while not self.closed:
+            try:
+                data, address = self.sock.recvfrom(512)
+            except ConnectionResetError:
+                continue  # Windows：推送到已退出的跟随端后，ICMP端口不可达会在下一次接收时报告
+            except OSError:
+                break  # 已关闭
+            t1 = self.clock()  # 收到请求的时刻
+            try:
+                request = json.loads(data)
+                t0 = float(request['t0'])
+            except (ValueError, KeyError, TypeError):
+                continue
+            self.requests += 1
+            self.peers[address] = t1
+            reply = {'t0': t0, 't1': t1, 'version': self.version}
+            # 跟随端已是最新版本时不重复携带状态，减少流量
+            if request.get('version') != self.version:
+                reply['state'] = self.state
+            reply['t2'] = self.clock()  # 发送应答的时刻
+            try:
+                self.sock.sendto(self._encode(reply), address)
+            except OSError:
+                pass
+
+    def close(self):
+        self.closed = True
+        self.sock.close()
+
+
+class SyncFollower:
+    """
+    跟随端：可调用对象，返回换算到时间源时间轴的当前时刻，可直接作为 CountdownCore 的时钟
+    启动时连发几次对时请求，之后按间隔轮询；保留最近若干样本，取往返延迟最小的样本的偏移（NTP时钟滤波）
+    """
+    def __init__(self, authority, on_state=None, clock=time.monotonic, interval=5.0, burst=4, samples=8):
+        self.authority = authority  # (主机, 端口)
+        self.on_state = on_state  # 收到新状态的回调（在网络线程中执行，需自行转交界面线程）
+        self.local_clock = clock  # 本地单调时钟
+        self.interval = interval  # 轮询间隔（秒）
+        self.burst = burst  # 启动时连发的对时次数
+        self.samples = collections.deque(maxlen=samples)  # (往返延迟, 偏移)
+        self.offset = 0.0  # 时间源时钟 - 本地时钟
+        self.delay = None  # 所选样本的往返延迟
+        self.version = None  # 已采用的状态版本
+        self.synced = threading.Event()  # 至少完成一次对时
+        self.sent = 0  # 发出的请求数
+        self.closed = False
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.settimeout(0.2)
+        self.address = None  # 连接后时间源的实际地址（主机名解析后）
+        self.thread = None
+
+    def __call__(self):
+        return self.local_clock() + self.offset
+
+    def start(self):
+        self.thread = threading.Thread(target=self._run, name="countDowner-sync-follower", daemon=True)
+        self.thread.start()
+        return self
+
+    def _request(self):
+        message = {'t0': self.local_clock(), 'version': self.version}
+        try:
+            if self.address is None:
+                # 连接后内核只交付来自时间源的数据报；解析失败时下次请求再试
+                self.sock.connect(self.authority)
+                self.address = self.sock.getpeername()
+            self.sock.send(json.dumps(message).encode("utf-8"))
+            self.sent += 1
+        except OSError:
+            pass
+
+    def _run(self):
+        pending_burst = self.burst
+        next_request = 0.0
+        while not self.closed:
+            now = self.local_clock()
+            if now >= next_request:
+                self._request()
+                if pending_burst > 1:
+                    pending_burst -= 1
+                    next_request = now + 0.1
+                else:
+                    next_request = now + self.interval
+            try:
+                data, source = self.sock.recvfrom(2048)
+            except socket.timeout:
+                continue
+            except OSError:
+                # 时间源未启动或重启时，ICMP端口不可达会在下一次接收时报告为
+                # ConnectionRefusedError（Windows为ConnectionResetError），只是暂时的
+                if self.closed:
+                    break
+                time.sleep(0.2)
+                continue
+            if source != self.address:
+                continue  # 不是配置的时间源发来的
+            t3 = self.local_clock()
+            try:
+                self._handle(json.loads(data), t3)
+            except (ValueError, KeyError, TypeError):
+                continue
+
+    def _handle(self, message, t3):
+        if not message.get('push'):
+            t0, t1, t2 = message['t0'], message['t1'], message['t2']
+            delay = (t3 - t0) - (t2 - t1)  # 往返延迟（扣除时间源处理时间）
+            offset = ((t1 - t0) + (t2 - t3)) / 2  # 时钟偏移
+            self.samples.append((delay, offset))
+            self.delay, self.offset = min(self.samples)
+            self.synced.set()
+        state = message.get('state')
+        # UDP可能乱序或迟到：只采用比已采用版本更新的状态，避免回退到旧的截止时刻或暂停状态
+        if state is not None and (self.version is None or message['version'] > self.version):
+            self.version = message['version']
+            if self.on_state:
+                self.on_state(state)
+
+    def close(self):
+        self.closed = True
+        self.sock.close()
+
+
+class SkewedClock:
+    """测试用的人为偏差时钟：在真实单调时钟上叠加固定偏移与频率漂移（ppm）"""
+    def __init__(self, skew=0.0, drift_ppm=0.0):
+        self.skew = skew
+        self.rate = 1 + drift_ppm * 1e-6
+        self.base = time.monotonic()
+
+    def __call__(self):
+        return self.base + (time.monotonic() - self.base) * self.rate + self.skew
+
+
+def run_test_follower(authority, skew, drift_ppm, seconds, interval):
+    """
+    跟随端测试进程：使用偏差时钟跟随时间源，周期性采样 估计的时间源时刻 - 真实时刻
+    （同一台机器上时间源即真实单调时钟），结束时打印JSON结果
+    """
+    from countdown_core import CountdownCore
+    import profile_store
+
+    local_clock = SkewedClock(skew, drift_ppm)
+    core_ref = []
+
+    def on_state(state):
+        if core_ref:
+            core_ref[0].apply_sync_state(state)
+
+    follower = SyncFollower(authority, on_state=on_state, clock=local_clock, interval=interval).start()
+    core_ref.append(CountdownCore(profile_store.DEFAULT_SETTINGS, clock=follower))
+    follower.synced.wait(5)
+    errors = []
+    end = time.monotonic() + seconds
+    while time.monotonic() < end:
+        errors.append(follower() - time.monotonic())
+        time.sleep(0.05)
+    follower.close()
+    print(json.dumps({
+        'skew': skew,
+        'drift_ppm': drift_ppm,
+        'max_error_ms': max(abs(e) for e in errors) * 1000,
+        'min_error_ms': min(errors) * 1000,
+        'max_signed_error_ms': max(errors) * 1000,
+        'shown': core_ref[0].tick(),
+        'requests': follower.sent,
+    }))
+
+
+def benchmark(followers=3, skew=5.0, drift_ppm=200.0, seconds=10.0, interval=1.0):
+    """多进程测试：本进程作为时间源，启动若干偏差时钟各不相同的跟随端进程，统计显示不一致的最坏值"""
+    from countdown_core import CountdownCore
+    import profile_store
+
+    authority = SyncAuthority(host="127.0.0.1", port=0)
+    core = CountdownCore(profile_store.DEFAULT_SETTINGS, clock=authority.clock)
+    authority.publish(core.sync_state())
+    processes = []
+    for index in range(followers):
+        # 偏差在 ±skew 之间错开，漂移方向交替
+        follower_skew = skew * (2 * index / max(1, followers - 1) - 1)
+        follower_drift = drift_ppm if index % 2 else -drift_ppm
+        processes.append(subprocess.Popen(
+            [sys.executable, __file__, '--follow', f"127.0.0.1:{authority.port}", '--skew', str(follower_skew),
+             '--drift-ppm', str(follower_drift), '--seconds', str(seconds), '--interval', str(interval)],
+            stdout=subprocess.PIPE, text=True))
+    results = [json.loads(process.communicate()[0]) for process in processes]
+    authority_shown = core.tick()
+    authority.close()
+    signed = [(r['min_error_ms'], r['max_signed_error_ms']) for r in results]
+    return {
+        'followers': results,
+        'authority_shown': authority_shown,
+        'authority_requests': authority.requests,
+        # 跟随端与时间源的最大偏差
+        'worst_vs_authority_ms': max(r['max_error_ms'] for r in results),
+        # 任意两个跟随端之间的最大显示偏差
+        'worst_between_followers_ms': max(hi for _, hi in signed) - min(lo for lo, _ in signed),
+    }
+
+
+def parse_address(text, default_port=SYNC_PORT):
+    """解析 主机[:端口]"""
+    host, _, port = text.partition(":")
+    return host, int(port) if port else default_port
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="countDowner 多机时间同步测试")
+    parser.add_argument('--bench', action='store_true', help="本机多进程同步测试")
+    parser.add_argument('--follow', metavar='HOST:PORT', help="以测试跟随端运行（由 --bench 启动）")
+    parser.add_argument('--followers', type=int, default=3)
+    parser.add_argument('--skew', type=float, default=5.0, help="人为时钟偏差（秒）")
+    parser.add_argument('--drift-ppm', type=float, default=200.0, help="人为时钟频率漂移（ppm）")
+    parser.add_argument('--seconds', type=float, default=10.0)
+    parser.add_argument('--interval', type=float, default=1.0, help="跟随端轮询间隔（秒）")
+    args = parser.parse_args()
+    if args.follow:
+        run_test_follower(parse_address(args.follow), args.skew, args.drift_ppm, args.seconds, args.interval)
+    else:
+        print(f"多机时间同步：{json.dumps(benchmark(args.followers, args.skew, args.drift_ppm, args.seconds, args.interval), ensure_ascii=False)}")
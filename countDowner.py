@@ -1,9 +1,24 @@
-import tkinter as tk
-from tkinter import font, ttk, colorchooser, messagebox
 import time
-import webbrowser
+_STARTUP_T0 = time.perf_counter()  # 启动分析的计时起点，需在其余导入之前记录
+_STARTUP_WALL = time.time()  # 启动时刻（墙上时间），常驻模式跨进程计算启动到窗口的延迟
 import sys  # 跨平台系统判断+打包后路径兼容
+if __name__ == "__main__" and "--resident" in sys.argv[1:]:
+    # 常驻模式：已有实例时在导入tkinter之前移交参数并退出，二次启动只需几毫秒
+    import resident
+    if resident.hand_off(sys.argv[1:], _STARTUP_WALL):
+        sys.exit(0)
+import tkinter as tk
+from tkinter import font, ttk  # colorchooser/messagebox/webbrowser 按需导入，缩短冷启动
 import os  # 处理文件路径，获取ICO图标路径
+import math  # 议程切换时刻换算为毫秒（向上取整）
+from countdown_core import CountdownCore, format_time  # 无界面倒计时核心
+import profile_store  # 上次使用/命名配置档案缓存
+import settings_schema  # 设置项声明与校验
+import window_drag  # 拖拽合并、边缘吸附与按显示器布局记住位置
+import font_fit  # 字号随窗口大小自适应（测量缓存）
+from tick_trace import TickTrace  # 每次唤醒的计时记录（环形缓冲区）
+
+MAX_FPS = 240  # 动画模式帧率上限
 
 def get_resource_path(relative_path):
     """
@@ -19,34 +34,162 @@ def get_resource_path(relative_path):
         base_path = os.path.abspath(os.path.dirname(__file__))
     return os.path.join(base_path, relative_path)
 
+class StartupProfiler:
+    """启动分析：记录各阶段相对启动起点的耗时，首帧绘制后可打印报告"""
+    def __init__(self, t0, enabled=False):
+        self.t0 = t0  # 计时起点（perf_counter）
+        self.enabled = enabled  # 是否打印报告
+        self.marks = []  # [(阶段名, 距起点秒数)]
+        self.finished = False  # 首帧后不再记录（运行中再次打开设置窗口不计入）
+
+    def mark(self, name):
+        """记录阶段完成时刻"""
+        if not self.finished:
+            self.marks.append((name, time.perf_counter() - self.t0))
+
+    def report(self):
+        """打印各阶段耗时；走设置窗口时另外给出扣除用户操作等待后的首帧时间"""
+        self.finished = True
+        if not self.enabled:
+            return
+        marks = dict(self.marks)
+        for name, elapsed in self.marks:
+            print(f"启动分析：{name} {elapsed * 1000:.1f}ms")
+        if 'first_frame' in marks and 'settings_window_built' in marks and 'settings_closed' in marks:
+            waiting = marks['settings_closed'] - marks['settings_window_built']
+            print(f"启动分析：首帧（扣除设置窗口等待）{(marks['first_frame'] - waiting) * 1000:.1f}ms")
+
+class TkRenderCache:
+    """
+    Tk渲染层：缓存上一次已应用的Tk状态，只推送发生变化的字段
+    稳态tick只更新标签文字，阶段切换时才修改颜色/字体/窗口透明度
+    """
+    def __init__(self, root, label):
+        self.root = root  # 主窗口对象
+        self.label = label  # 倒计时显示标签
+        self.applied = {}  # 已应用到Tk的状态（字段名 -> 值）
+        self.ticks = 0  # 渲染次数
+        self.tk_calls = 0  # 累计Tk调用次数
+        self.last_tick_calls = 0  # 最近一次渲染的Tk调用次数
+
+    def invalidate(self):
+        """清空缓存，下一次渲染强制推送全部字段"""
+        self.applied.clear()
+
+    def render(self, text, font, fg, bg, alpha, fg_alpha=1.0):
+        """对比缓存后推送变化字段，返回本次Tk调用次数（Tk标签不支持文字透明度，忽略fg_alpha）"""
+        applied = self.applied
+        calls = 0
+        # 标签的多个字段合并为一次config调用
+        changes = {}
+        if applied.get('text') != text:
+            changes['text'] = text
+        if applied.get('font') is not font:
+            changes['font'] = font
+        if applied.get('fg') != fg:
+            changes['fg'] = fg
+        if applied.get('bg') != bg:
+            changes['bg'] = bg
+        if changes:
+            self.label.config(**changes)
+            applied.update(changes)
+            calls += 1
+        if applied.get('root_bg') != bg:
+            self.root.configure(bg=bg)
+            applied['root_bg'] = bg
+            calls += 1
+        if applied.get('alpha') != alpha:
+            # 设置透明度需要窗口管理器往返，低性能设备上开销明显
+            self.root.attributes("-alpha", alpha)
+            applied['alpha'] = alpha
+            calls += 1
+        self.ticks += 1
+        self.tk_calls += calls
+        self.last_tick_calls = calls
+        return calls
+
+    def stats(self):
+        """统计信息：渲染次数、Tk调用总数、平均每次tick的Tk调用数"""
+        return {
+            'ticks': self.ticks,
+            'tk_calls': self.tk_calls,
+            'tk_calls_per_tick': self.tk_calls / self.ticks if self.ticks else 0.0,
+            'last_tick_calls': self.last_tick_calls,
+        }
+
 class PPTCountdown:
-    def __init__(self, root, ico_path):
-        # 传入处理后的自定义图标路径
+    def __init__(self, root, ico_path, settings=None, profile_name=None, profiler=None, app_exit=None, clock=None,
+                 glyph=False, animate_fps=None, trace_path=None, agenda=None):
+        # 传入处理后的自定义图标路径；传入settings时为快速启动，跳过参数设置窗口
+        # 常驻模式下root为常驻实例创建的Toplevel，app_exit用于退出整个常驻进程
+        # clock为倒计时核心使用的时钟，多机同步的跟随端传入换算到时间源时间轴的时钟
+        # glyph为True时使用字形缓存合成渲染（需要Pillow），文字与背景透明度相互独立
+        # animate_fps指定帧率时启用动画模式：进度条连续扫过、颜色渐变，数字仍在整秒边界变化
+        # trace_path指定时关闭窗口时把计时记录导出到该JSON文件
+        # agenda为议程时间轴时按议程逐项倒计时，到点自动切换，设置取自各项
+        self.core_clock = clock or time.monotonic  # 倒计时核心时钟
+        if glyph and animate_fps:
+            # 分层窗口会覆盖Tk绘制的进度条，两者不同时使用
+            print("动画模式不支持字形合成渲染，已改用普通标签渲染")
+            glyph = False
+        self.glyph = glyph  # 是否使用字形合成渲染
+        self.animate_fps = animate_fps  # 动画模式目标帧率（None表示关闭）
+        self.color_lut = None  # 动画模式的颜色查找表
+        self.frames = None  # 动画模式的帧调度器
+        self.progress = None  # 动画模式的进度条
+        self.agenda = agenda  # 议程时间轴（None表示单次倒计时）
+        self.segment_index = None  # 议程当前项（空档时为即将开始的项）
+        self.segment_title = None  # 议程当前项的显示标题
+        self.segment_gap = False  # 议程是否处于空档（倒计时到下一项开始）
+        self.segment_seconds = None  # 创建核心时距下一次切换的秒数（None表示按设置的总分钟数）
+        self.segment_transition = None  # 下一次切换的时刻（time.time）
+        self.segment_after_id = None  # 议程切换的after任务ID
+        self._agenda_paused_at = None  # 议程暂停的时刻，继续时整体顺延
+        self.slide_plan = None  # 幻灯片时间预算（None表示不同步幻灯片）
+        self.slide = 1  # 幻灯片当前页
+        self.state_listeners = []  # 状态变化（重置/暂停/停止/加减时）监听函数，参数为本对象
+        self.tick_listeners = []  # 每次整秒刷新后的监听函数（网页显示等），参数为本对象
         self.root = root  # 主窗口对象
+        self.app_exit = app_exit  # 退出常驻进程的回调（None表示非常驻模式）
         self.ico_path = ico_path  # 保存自定义图标路径
-        self.is_paused = False  # 倒计时暂停状态
-        self.is_stopped = False  # 倒计时停止状态
-        self.drag_x = 0  # 拖拽窗口的x坐标缓存
-        self.drag_y = 0  # 拖拽窗口的y坐标缓存
-        self.settings = None  # 存储参数设置窗口的配置结果
+        self.profile_name = profile_name  # 确认设置后另存的档案名（None仅保存为上次使用）
+        self.profiler = profiler or StartupProfiler(time.perf_counter())  # 启动分析
+        self.core = None  # 无界面倒计时核心，设置完成后创建
+        self.drag = None  # 拖拽合并层，init_ui中创建
+        self.fitter = None  # 字号自适应（窗口尺寸与测量缓存），init_ui中创建
+        self._fit_idle_id = None  # 窗口尺寸变化后挂起的重新适配任务
+        self.settings = settings  # 存储参数设置窗口的配置结果
         self.after_id = None  # 倒计时循环的after任务ID
+        self.trace = TickTrace()  # 计时记录：计划/实际唤醒时刻、样式刷新耗时
+        self.trace_path = trace_path  # 关闭时导出计时记录的路径
+        self._scheduled_at = None  # 当前挂起唤醒的计划时刻（计时记录时钟）
         self.right_menu = None  # 右键菜单对象，懒加载创建
 
         # 为主窗口设置自定义图标
         self._set_window_icon(self.root)
 
-        # 尝试加载参数设置窗口，捕获异常并弹窗提示
-        try:
-            self.settings = self.show_settings_window()
-        except Exception as e:
-            messagebox.showerror("启动失败", f"设置窗口加载出错：{str(e)}")
+        # 议程模式：设置取自当前项
+        if self.agenda and not self._locate_segment():
+            print("议程已全部结束")
             self.root.destroy()
             return
 
-        # 未获取到设置则退出程序
-        if not self.settings:
-            self.root.destroy()
-            return
+        # 未传入设置时加载参数设置窗口（以上次使用的设置预填），捕获异常并弹窗提示
+        if self.settings is None:
+            try:
+                self.settings = self.show_settings_window(profile_store.load_profile())
+            except Exception as e:
+                from tkinter import messagebox
+                messagebox.showerror("启动失败", f"设置窗口加载出错：{str(e)}")
+                self.root.destroy()
+                return
+
+            # 未获取到设置则退出程序
+            if not self.settings:
+                self.root.destroy()
+                return
+            profile_store.save_profile(self.settings, self.profile_name)
+        self.profiler.mark('settings')
 
         # 提取设置参数并初始化
         self.init_parameters()
@@ -56,6 +199,12 @@ class PPTCountdown:
         self._bind_events()
         # 启动倒计时更新循环
         self.update_timer()
+        if self.agenda:
+            self._schedule_segment()
+        if self.profiler.enabled:
+            self.root.update_idletasks()  # 处理挂起的重绘，确保首帧已绘制
+        self.profiler.mark('first_frame')
+        self.profiler.report()
 
     def _set_window_icon(self, window):
         """封装窗口图标设置逻辑，增加异常捕获（跨平台兼容）"""
@@ -71,11 +220,8 @@ class PPTCountdown:
 
     def init_parameters(self):
         """提取设置参数并初始化倒计时核心变量"""
-        # 基础时间参数
-        self.total_minutes = self.settings['total']  # 总倒计时分钟数
-        self.remind_minutes = self.settings['remind']  # 提醒时间分钟数
-        self.warning_seconds = self.settings['warning']  # 最后警告秒数
-        self.original_total_seconds = self.total_minutes * 60  # 原始总秒数（用于重置）
+        # 倒计时状态机（时间参数、暂停/停止、阶段与超时处理）
+        self.core = CountdownCore(self.settings, clock=self.core_clock, total_seconds=self.segment_seconds)
 
         # 颜色与透明度配置（已在设置窗口转换为0-1的透明度值）
         self.normal_bg = self.settings['normal_bg']
@@ -93,8 +239,14 @@ class PPTCountdown:
         self.warning_fg = self.settings['warning_fg']
         self.warning_fg_alpha = self.settings['warning_fg_alpha']
 
-        # 字体大小配置
+        self.pace_bg = self.settings['pace_bg']
+        self.pace_bg_alpha = self.settings['pace_bg_alpha']
+        self.pace_fg = self.settings['pace_fg']
+        self.pace_fg_alpha = self.settings['pace_fg_alpha']
+
+        # 字体大小配置（自适应时字号随窗口大小变化，设置值仅作为初始字号）
         self.timer_font_size = self.settings['timer_font_size']
+        self.font_fit = self.settings['font_fit'] == 'fit'
         self.timeout_text_size = self.settings['timeout_text_size']
 
         # 超时显示配置
@@ -102,10 +254,22 @@ class PPTCountdown:
         self.timeout_text = self.settings['timeout_text']
         self.timeout_text_color = self.settings['timeout_text_color']
 
-        # 倒计时实时变量
-        self.total_seconds = self.original_total_seconds  # 实时倒计时秒数
-        self.remind_seconds = self.remind_minutes * 60  # 提醒时间秒数
-        self.negative_seconds = 0  # 超时后负计时秒数
+    # 倒计时实时状态由核心维护，这里只读转发，方便界面代码沿用原有属性名
+    @property
+    def is_paused(self):
+        return self.core.is_paused if self.core else False
+
+    @property
+    def is_stopped(self):
+        return self.core.is_stopped if self.core else False
+
+    @property
+    def total_seconds(self):
+        return self.core.total_seconds
+
+    @property
+    def negative_seconds(self):
+        return self.core.negative_seconds
 
     def init_ui(self):
         """初始化倒计时窗口UI（核心显示控件）"""
@@ -116,55 +280,67 @@ class PPTCountdown:
         self.timer_font = font.Font(family="SimHei", size=self.timer_font_size, weight="bold")
         self.timeout_text_font = font.Font(family="SimHei", size=self.timeout_text_size, weight="bold")
 
-        # 创建倒计时核心显示标签
-        self.timer_label = tk.Label(
-            self.root,
-            text=self.format_time(self.total_seconds),  # 格式化初始时间
-            font=self.timer_font,
-            bg=self.normal_bg,
-            fg=self.normal_fg
-        )
+        if self.animate_fps:
+            # 动画模式：窗口底部的进度条需在标签之前布局，保证不被标签挤出
+            import animation
+            progress_canvas = tk.Canvas(self.root, height=6, highlightthickness=0, bd=0)
+            progress_canvas.pack(side=tk.BOTTOM, fill=tk.X)
+            self.progress = animation.ProgressBar(progress_canvas)
+            self.frames = animation.FrameScheduler(self.root, self.draw_frame, self.animate_fps)
+
+        # 创建倒计时核心显示标签（样式由渲染层首次渲染时统一推送）
+        self.timer_label = tk.Label(self.root)
         self.timer_label.pack(expand=True, fill=tk.BOTH)  # 填充整个窗口
+        # 右下角缩放手柄（无边框窗口没有系统边框可拖动）
+        self.size_grip = ttk.Sizegrip(self.root)
+        self.size_grip.place(relx=1.0, rely=1.0, anchor=tk.SE)
+        self.fitter = font_fit.FontFitter(self.root)
+        self._build_stage_table()
 
         # 窗口基础配置（一次性设置，减少tkinter调用次数）
-        self.root.title("PPT倒计时")
-        self.root.geometry("300x100")
+        self.root.title(self.segment_title or "PPT倒计时")
+        # 恢复当前显示器布局下上次拖拽到的位置
+        position = profile_store.load_position(window_drag.layout_key(window_drag.screen_rects(self.root)))
+        self.root.geometry("300x100" + (f"+{position[0]}+{position[1]}" if position else ""))
+        self.root.minsize(120, 40)
+        self.drag = window_drag.DragCoalescer(self.root, on_release=self._save_position)
         self.root.attributes("-topmost", True)  # 窗口置顶
         self.root.overrideredirect(True)  # 隐藏边框，实现无边框拖拽
+        self.renderer = self._create_renderer()
         self.root.deiconify()  # 显示主窗口
 
+    def _create_renderer(self):
+        """创建渲染层：字形合成渲染需在窗口样式设置完成后创建（Windows下会改为分层窗口）"""
+        if self.glyph:
+            import glyph_render
+            if glyph_render.is_available():
+                return glyph_render.GlyphRenderer(self.root, self.timer_label)
+            print("字形合成渲染需要安装 Pillow，已改用普通标签渲染")
+        return TkRenderCache(self.root, self.timer_label)
+
     def _bind_events(self):
         """统一绑定窗口事件（代码聚合，便于维护）"""
         self.root.bind("<ButtonPress-1>", self.start_drag)  # 拖拽开始
         self.root.bind("<B1-Motion>", self.do_drag)  # 拖拽执行
         self.root.bind("<ButtonRelease-1>", self.end_drag)  # 拖拽结束
         self.root.bind("<Button-3>", self.show_right_menu)  # 右键菜单
+        self.root.bind("<Configure>", self.on_resize)  # 窗口尺寸变化（字号自适应）
 
     def choose_color(self, current_color, title):
         """颜色选择器封装：返回选择的十六进制颜色值"""
+        from tkinter import colorchooser
         color = colorchooser.askcolor(title=title, initialcolor=current_color)
         return color[1] if color[1] else current_color  # 选择失败返回原颜色
 
-    def show_settings_window(self):
-        """显示参数设置窗口（主方法），拆分子方法减少冗余"""
-        # 默认配置参数（用户未修改时使用）
-        default = {
-            'total': 10, 'remind': 2, 'warning': 30,
-            'normal_bg': "#bdc3c7", 'normal_bg_alpha': 60,
-            'normal_fg': "#3399ff", 'normal_fg_alpha': 100,
-            'remind_bg': "#bdc3c7", 'remind_bg_alpha': 60,
-            'remind_fg': "#EEEE00", 'remind_fg_alpha': 100,
-            'warning_bg': "#EEEE00", 'warning_bg_alpha': 60,
-            'warning_fg': "#ff0000", 'warning_fg_alpha': 100,
-            'timer_font_size': 60,
-            'timeout_mode': 'negative', 'timeout_text': "时间到！",
-            'timeout_text_size': 60, 'timeout_text_color': "#ff0000"
-        }
+    def show_settings_window(self, initial=None):
+        """显示参数设置窗口（主方法），控件、校验与结果由 settings_schema 的声明生成；initial为预填的设置结果"""
+        # 预填值先按声明校验一遍（未传入时为默认设置）
+        initial = settings_schema.validate(initial or profile_store.DEFAULT_SETTINGS)[0]
 
         # 创建设置窗口（顶层窗口）
         settings_window = tk.Toplevel(self.root)
         settings_window.title("参数设置")
-        settings_window.geometry("750x800")
+        settings_window.geometry("750x860")
         settings_window.resizable(False, False)
         settings_window.attributes("-topmost", True)  # 窗口置顶
         if sys.platform == "linux":  # 跨平台兼容：Linux下设置为普通窗口
@@ -180,217 +356,110 @@ class PPTCountdown:
             settings_window.destroy()
         settings_window.protocol("WM_DELETE_WINDOW", on_close)
 
-        # 初始化设置窗口的变量（统一管理）
-        vars_dict = self._init_settings_vars(default)
-        # 创建时间设置框架
-        self._create_time_frame(settings_window, vars_dict)
-        # 创建阶段样式设置框架
-        style_labels = self._create_style_frames(settings_window, vars_dict)
-        # 创建字体设置框架
-        self._create_font_frame(settings_window, vars_dict)
-        # 创建超时显示设置框架
-        self._create_timeout_frame(settings_window, vars_dict)
+        # 初始化设置窗口的变量（按声明逐字段创建）
+        vars_dict = self._init_settings_vars(initial)
+        # 按分组生成控件，返回颜色预览标签与按条件启用的控件
+        swatches, conditional = self._create_setting_sections(settings_window, vars_dict)
         # 创建确认按钮
         self._create_confirm_btn(settings_window)
         # 创建底部信息框架
         self._create_bottom_frame(settings_window)
-        # 绑定颜色预览更新事件
-        self._bind_color_preview(settings_window, vars_dict, style_labels)
+        # 绑定合并校验与颜色预览，current随校验更新为最近一次通过校验的设置
+        current = self._bind_validation(settings_window, vars_dict, initial, swatches, conditional)
 
         # 等待设置窗口关闭
+        self.profiler.mark('settings_window_built')
         self.root.wait_window(settings_window)
+        self.profiler.mark('settings_closed')
         if settings_closed[0]:  # 用户主动关闭窗口，返回None
             return None
 
         # 整理配置并返回（自动修正参数逻辑，避免无效值）
-        return self._get_settings_result(vars_dict)
-
-    def _init_settings_vars(self, default):
-        """初始化设置窗口的变量（拆分子方法，减少主方法长度）"""
-        vars_dict = {}
-        # 时间变量
-        vars_dict['total'] = tk.IntVar(value=default['total'])
-        vars_dict['remind'] = tk.IntVar(value=default['remind'])
-        vars_dict['warning'] = tk.IntVar(value=default['warning'])
-        # 正常阶段颜色/透明度变量
-        vars_dict['normal_bg'] = tk.StringVar(value=default['normal_bg'])
-        vars_dict['normal_bg_alpha'] = tk.IntVar(value=default['normal_bg_alpha'])
-        vars_dict['normal_fg'] = tk.StringVar(value=default['normal_fg'])
-        vars_dict['normal_fg_alpha'] = tk.IntVar(value=default['normal_fg_alpha'])
-        # 提醒阶段颜色/透明度变量
-        vars_dict['remind_bg'] = tk.StringVar(value=default['remind_bg'])
-        vars_dict['remind_bg_alpha'] = tk.IntVar(value=default['remind_bg_alpha'])
-        vars_dict['remind_fg'] = tk.StringVar(value=default['remind_fg'])
-        vars_dict['remind_fg_alpha'] = tk.IntVar(value=default['remind_fg_alpha'])
-        # 警告阶段颜色/透明度变量
-        vars_dict['warning_bg'] = tk.StringVar(value=default['warning_bg'])
-        vars_dict['warning_bg_alpha'] = tk.IntVar(value=default['warning_bg_alpha'])
-        vars_dict['warning_fg'] = tk.StringVar(value=default['warning_fg'])
-        vars_dict['warning_fg_alpha'] = tk.IntVar(value=default['warning_fg_alpha'])
-        # 字体与超时变量
-        vars_dict['timer_font'] = tk.IntVar(value=default['timer_font_size'])
-        vars_dict['timeout_mode'] = tk.StringVar(value=default['timeout_mode'])
-        vars_dict['timeout_text'] = tk.StringVar(value=default['timeout_text'])
-        vars_dict['timeout_text_size'] = tk.IntVar(value=default['timeout_text_size'])
-        vars_dict['timeout_text_color'] = tk.StringVar(value=default['timeout_text_color'])
-        return vars_dict
-
-    def _create_time_frame(self, parent, vars_dict):
-        """创建时间设置框架（拆分子方法）"""
-        ttk.Label(parent, text="时间设置", font=("SimHei", 12, "bold")).pack(pady=10)
-        time_frame = ttk.Frame(parent)
-        time_frame.pack(fill=tk.X, padx=30)
-
-        # 总计时间
-        ttk.Label(time_frame, text="总计时间（分钟）：", width=20).grid(row=0, column=0, sticky=tk.W, pady=5)
-        ttk.Spinbox(time_frame, from_=1, to=60, textvariable=vars_dict['total'], width=5).grid(row=0, column=1, sticky=tk.W, pady=5)
-        # 提醒时间
-        ttk.Label(time_frame, text="提醒时间（分钟）：", width=20).grid(row=1, column=0, sticky=tk.W, pady=5)
-        ttk.Spinbox(time_frame, from_=1, to=59, textvariable=vars_dict['remind'], width=5).grid(row=1, column=1, sticky=tk.W, pady=5)
-        # 警告时间
-        ttk.Label(time_frame, text="警告时间（秒）：", width=20).grid(row=2, column=0, sticky=tk.W, pady=5)
-        ttk.Spinbox(time_frame, from_=1, to=59, textvariable=vars_dict['warning'], width=5).grid(row=2, column=1, sticky=tk.W, pady=5)
-
-        # 绑定时间验证事件（仅捕获ValueError，避免吞掉所有异常）
-        def validate_remind(*args):
-            try:
-                total = vars_dict['total'].get()
-                remind = vars_dict['remind'].get()
-                if remind >= total:
-                    vars_dict['remind'].set(total - 1 if total > 1 else 1)
-            except ValueError:
-                pass
+        return self._get_settings_result(vars_dict, current)
 
-        def validate_warning(*args):
-            try:
-                remind = vars_dict['remind'].get()
-                warning = vars_dict['warning'].get()
-                max_warning = remind * 60
-                if warning > max_warning:
-                    vars_dict['warning'].set(max_warning)
-            except ValueError:
-                pass
-
-        vars_dict['total'].trace_add("write", validate_remind)
-        vars_dict['remind'].trace_add("write", validate_remind)
-        vars_dict['remind'].trace_add("write", validate_warning)
-        vars_dict['warning'].trace_add("write", validate_warning)
-
-    def _create_stage_frame(self, parent, stage_name, bg_var, bg_alpha_var, fg_var, fg_alpha_var):
-        """创建单个阶段的样式框架（复用方法，减少冗余）"""
-        ttk.Label(parent, text=stage_name, font=("SimHei", 10)).pack(anchor=tk.W, padx=30)
-        frame = ttk.Frame(parent)
-        frame.pack(fill=tk.X, padx=30, pady=5)
-
-        # 背景色设置
-        ttk.Label(frame, text="背景色：", width=7).grid(row=0, column=0, sticky=tk.W, padx=(0,3))
-        bg_btn = ttk.Button(frame, text="选择", width=5,
-                            command=lambda: bg_var.set(self.choose_color(bg_var.get(), f"{stage_name}背景色")))
-        bg_btn.grid(row=0, column=1, padx=(0,3))
-        bg_code = ttk.Label(frame, textvariable=bg_var, width=8, borderwidth=1, relief="solid")
-        bg_code.grid(row=0, column=2, padx=(0,10))
-
-        # 背景透明度
-        ttk.Label(frame, text="背景透明度(%)：", width=12).grid(row=0, column=3, sticky=tk.W)
-        ttk.Spinbox(frame, from_=0, to=100, textvariable=bg_alpha_var, width=5).grid(row=0, column=4, padx=(0,20))
-
-        # 文字色设置
-        ttk.Label(frame, text="文字色：", width=7).grid(row=0, column=5, sticky=tk.W, padx=(0,3))
-        fg_btn = ttk.Button(frame, text="选择", width=5,
-                            command=lambda: fg_var.set(self.choose_color(fg_var.get(), f"{stage_name}文字色")))
-        fg_btn.grid(row=0, column=6, padx=(0,3))
-        fg_code = ttk.Label(frame, textvariable=fg_var, width=8, borderwidth=1, relief="solid")
-        fg_code.grid(row=0, column=7, padx=(0,10))
-
-        # 文字透明度
-        ttk.Label(frame, text="文字透明度(%)：", width=12).grid(row=0, column=8, sticky=tk.W)
-        ttk.Spinbox(frame, from_=0, to=100, textvariable=fg_alpha_var, width=5).grid(row=0, column=9, padx=5)
-
-        return bg_code, fg_code
-
-    def _create_style_frames(self, parent, vars_dict):
-        """创建所有阶段的样式框架（拆分子方法）"""
-        ttk.Label(parent, text="\n阶段样式设置", font=("SimHei", 12, "bold")).pack(pady=5)
-        # 创建三个阶段的样式框架
-        normal_bg_code, normal_fg_code = self._create_stage_frame(
-            parent, "正常阶段", vars_dict['normal_bg'], vars_dict['normal_bg_alpha'],
-            vars_dict['normal_fg'], vars_dict['normal_fg_alpha']
-        )
-        remind_bg_code, remind_fg_code = self._create_stage_frame(
-            parent, "提醒阶段", vars_dict['remind_bg'], vars_dict['remind_bg_alpha'],
-            vars_dict['remind_fg'], vars_dict['remind_fg_alpha']
-        )
-        warning_bg_code, warning_fg_code = self._create_stage_frame(
-            parent, "警告阶段", vars_dict['warning_bg'], vars_dict['warning_bg_alpha'],
-            vars_dict['warning_fg'], vars_dict['warning_fg_alpha']
-        )
-        # 返回颜色预览标签，用于后续绑定更新事件
+    def _init_settings_vars(self, initial):
+        """按声明为每个设置项创建界面变量（统一用字符串变量，输入中途的非法值不会抛出异常）"""
         return {
-            'normal': (normal_bg_code, normal_fg_code),
-            'remind': (remind_bg_code, remind_fg_code),
-            'warning': (warning_bg_code, warning_fg_code)
+            field.key: tk.StringVar(value=field.to_ui(initial[field.key]))
+            for field in settings_schema.FIELDS
         }
 
-    def _create_font_frame(self, parent, vars_dict):
-        """创建字体设置框架（拆分子方法）"""
-        ttk.Label(parent, text="\n倒计时字体设置", font=("SimHei", 12, "bold")).pack(pady=10)
-        font_frame = ttk.Frame(parent)
-        font_frame.pack(fill=tk.X, padx=30)
-        ttk.Label(font_frame, text="倒计时数字大小：", width=20).grid(row=0, column=0, sticky=tk.W)
-        ttk.Spinbox(font_frame, from_=10, to=60, textvariable=vars_dict['timer_font'], width=5).grid(row=0, column=1, sticky=tk.W)
-
-    def _create_timeout_frame(self, parent, vars_dict):
-        """创建超时显示设置框架（拆分子方法）"""
-        ttk.Label(parent, text="\n超时显示设置", font=("SimHei", 12, "bold")).pack(pady=5)
-        frame8 = ttk.Frame(parent)
-        frame8.pack(fill=tk.X, padx=30)
-
-        # 超时模式单选按钮
-        def update_timeout_state():
-            """更新自定义文字控件的启用/禁用状态"""
-            state = 'normal' if vars_dict['timeout_mode'].get() == 'text' else 'disabled'
-            for ctrl in timeout_controls:
-                ctrl.config(state=state)
-
-        ttk.Radiobutton(frame8, text="负计时（显示-00:00及以上）", variable=vars_dict['timeout_mode'],
-                        value='negative', command=update_timeout_state).pack(anchor=tk.W)
-        ttk.Radiobutton(frame8, text="显示自定义文字", variable=vars_dict['timeout_mode'],
-                        value='text', command=update_timeout_state).pack(anchor=tk.W, pady=2)
-
-        # 自定义文字设置框架
-        timeout_text_frame = ttk.LabelFrame(parent, text="自定义文字设置")
-        timeout_text_frame.pack(fill=tk.X, padx=30, pady=5)
-
-        # 自定义文字内容
-        ttk.Label(timeout_text_frame, text="文字内容：", width=15).grid(row=0, column=0, sticky=tk.W, padx=5, pady=3)
-        text_entry = ttk.Entry(timeout_text_frame, textvariable=vars_dict['timeout_text'], width=20)
-        text_entry.grid(row=0, column=1, sticky=tk.W, padx=5, pady=3)
-
-        # 自定义文字大小
-        ttk.Label(timeout_text_frame, text="文字大小：", width=15).grid(row=1, column=0, sticky=tk.W, padx=5, pady=3)
-        size_spin = ttk.Spinbox(timeout_text_frame, from_=10, to=60, textvariable=vars_dict['timeout_text_size'], width=5)
-        size_spin.grid(row=1, column=1, sticky=tk.W, padx=5, pady=3)
-
-        # 自定义文字颜色
-        ttk.Label(timeout_text_frame, text="文字颜色：", width=15).grid(row=2, column=0, sticky=tk.W, padx=5, pady=3)
-        color_frame = ttk.Frame(timeout_text_frame)
-        color_frame.grid(row=2, column=1, sticky=tk.W, pady=3)
-        color_btn = ttk.Button(color_frame, text="选择", width=5,
-                               command=lambda: vars_dict['timeout_text_color'].set(
-                                   self.choose_color(vars_dict['timeout_text_color'].get(), "超时文字颜色")
-                               ))
-        color_btn.grid(row=0, column=0, padx=0)
-        color_code_label = ttk.Label(color_frame, textvariable=vars_dict['timeout_text_color'], width=8, borderwidth=1, relief="solid")
-        color_code_label.grid(row=0, column=1, padx=5)
-
-        # 保存需要控制状态的控件
-        timeout_controls = [text_entry, size_spin, color_btn]
-        # 绑定超时文字颜色预览更新
-        def update_timeout_color(*args):
-            color_code_label.config(background=vars_dict['timeout_text_color'].get())
-        vars_dict['timeout_text_color'].trace_add("write", update_timeout_color)
-        update_timeout_color()  # 初始化颜色预览
-        update_timeout_state()  # 初始化控件状态
+    def _create_setting_sections(self, parent, vars_dict):
+        """按声明的分组与布局生成全部设置控件，返回 (颜色字段 -> 预览标签, [(控件, 字段, 取值)])"""
+        swatches = {}
+        conditional = []
+        sections = {}
+        for field in settings_schema.FIELDS:
+            sections.setdefault(field.section, []).append(field)
+        previous_layout = None
+        for index, (section, title, layout) in enumerate(settings_schema.SECTIONS):
+            fields = sections.get(section, [])
+            heading = title if index == 0 else f"\n{title}"
+            if layout == 'stage':
+                if previous_layout != 'stage':
+                    ttk.Label(parent, text="\n阶段样式设置", font=("SimHei", 12, "bold")).pack(pady=5)
+                # 阶段样式：一行依次为 背景色/背景透明度/文字色/文字透明度
+                ttk.Label(parent, text=title, font=("SimHei", 10)).pack(anchor=tk.W, padx=30)
+                frame = ttk.Frame(parent)
+                frame.pack(fill=tk.X, padx=30, pady=5)
+                column = 0
+                for field in fields:
+                    label_width = 7 if field.kind == 'color' else 12
+                    ttk.Label(frame, text=f"{field.label}：", width=label_width).grid(row=0, column=column, sticky=tk.W)
+                    widget = self._create_field_input(frame, field, vars_dict, f"{title}{field.label}", swatches)
+                    widget.grid(row=0, column=column + 1, padx=(0, 10))
+                    column += 2
+            elif layout == 'choice':
+                ttk.Label(parent, text=heading, font=("SimHei", 12, "bold")).pack(pady=5)
+                frame = ttk.Frame(parent)
+                frame.pack(fill=tk.X, padx=30)
+                for field in fields:
+                    for value, text in field.choices:
+                        ttk.Radiobutton(frame, text=text, variable=vars_dict[field.key],
+                                        value=value).pack(anchor=tk.W, pady=1)
+            else:
+                if any(field.enabled_when for field in fields):
+                    # 按条件启用的字段放在带标题的框中
+                    frame = ttk.LabelFrame(parent, text=title)
+                    frame.pack(fill=tk.X, padx=30, pady=5)
+                    label_width, pad = 15, {'padx': 5, 'pady': 3}
+                else:
+                    ttk.Label(parent, text=heading, font=("SimHei", 12, "bold")).pack(pady=10 if index == 0 else 5)
+                    frame = ttk.Frame(parent)
+                    frame.pack(fill=tk.X, padx=30)
+                    label_width, pad = 20, {'pady': 5}
+                for row, field in enumerate(fields):
+                    ttk.Label(frame, text=field.label, width=label_width).grid(row=row, column=0, sticky=tk.W, **pad)
+                    widget = self._create_field_input(frame, field, vars_dict, field.label.rstrip("："), swatches)
+                    widget.grid(row=row, column=1, sticky=tk.W, **pad)
+                    if field.enabled_when:
+                        for child in (widget.winfo_children() or [widget]):
+                            conditional.append((child, field.enabled_when[0], field.enabled_when[1]))
+            previous_layout = layout
+        return swatches, conditional
+
+    def _create_field_input(self, parent, field, vars_dict, title, swatches):
+        """按字段类型创建输入控件：数字框 / 文本框 / 单选按钮 / 颜色选择按钮+预览标签"""
+        var = vars_dict[field.key]
+        if field.kind == 'int':
+            return ttk.Spinbox(parent, from_=field.minimum, to=field.maximum, textvariable=var, width=5)
+        if field.kind == 'alpha':
+            return ttk.Spinbox(parent, from_=round(field.minimum * 100), to=round(field.maximum * 100),
+                               textvariable=var, width=5)
+        if field.kind == 'color':
+            frame = ttk.Frame(parent)
+            ttk.Button(frame, text="选择", width=5,
+                       command=lambda: var.set(self.choose_color(var.get(), title))).grid(row=0, column=0, padx=(0, 3))
+            swatch = ttk.Label(frame, textvariable=var, width=8, borderwidth=1, relief="solid")
+            swatch.grid(row=0, column=1)
+            swatches[field.key] = swatch
+            return frame
+        if field.kind == 'choice':
+            frame = ttk.Frame(parent)
+            for column, (value, text) in enumerate(field.choices):
+                ttk.Radiobutton(frame, text=text, variable=var, value=value).grid(row=0, column=column, padx=(0, 10))
+            return frame
+        return ttk.Entry(parent, textvariable=var, width=20)
 
     def _create_confirm_btn(self, parent):
         """创建确认按钮（拆分子方法）"""
@@ -414,70 +483,97 @@ class PPTCountdown:
         # GitHub链接
         github_frame = ttk.Frame(bottom_frame)
         github_frame.pack(pady=5)
-        github_btn = ttk.Button(github_frame, text="countDowner",
-                                command=lambda: webbrowser.open("https://github.com/Daaaaxianer/countDowner"))
+        github_btn = ttk.Button(github_frame, text="countDowner", command=self._open_homepage)
         github_btn.pack(side=tk.LEFT, padx=5)
         extra_label = ttk.Label(github_frame, text="倒计时工具 | 简洁高效", font=("SimHei", 10))
         extra_label.pack(side=tk.LEFT)
 
-    def _bind_color_preview(self, parent, vars_dict, style_labels):
-        """绑定颜色预览更新事件（拆分子方法）"""
-        def update_color_preview(*args):
-            """统一更新所有阶段的颜色预览"""
-            # 正常阶段
-            style_labels['normal'][0].config(background=vars_dict['normal_bg'].get())
-            style_labels['normal'][1].config(background=vars_dict['normal_fg'].get())
-            # 提醒阶段
-            style_labels['remind'][0].config(background=vars_dict['remind_bg'].get())
-            style_labels['remind'][1].config(background=vars_dict['remind_fg'].get())
-            # 警告阶段
-            style_labels['warning'][0].config(background=vars_dict['warning_bg'].get())
-            style_labels['warning'][1].config(background=vars_dict['warning_fg'].get())
-
-        # 绑定所有颜色变量的更新事件
-        for color_key in ['normal_bg', 'normal_fg', 'remind_bg', 'remind_fg', 'warning_bg', 'warning_fg']:
-            vars_dict[color_key].trace_add("write", update_color_preview)
-        update_color_preview()  # 初始化颜色预览
-
-    def _get_settings_result(self, vars_dict):
-        """整理设置窗口的配置结果（拆分子方法）"""
-        total = vars_dict['total'].get()
-        remind = vars_dict['remind'].get()
-        warning = vars_dict['warning'].get()
-        # 自动修正参数，确保逻辑合理性
-        remind = min(remind, total - 1) if total > 1 else 1
-        warning = min(warning, remind * 60)
-        # 返回配置字典（透明度转换为0-1的浮点数）
-        return {
-            'total': total,
-            'remind': remind,
-            'warning': warning,
-            'normal_bg': vars_dict['normal_bg'].get(),
-            'normal_bg_alpha': vars_dict['normal_bg_alpha'].get() / 100,
-            'normal_fg': vars_dict['normal_fg'].get(),
-            'normal_fg_alpha': vars_dict['normal_fg_alpha'].get() / 100,
-            'remind_bg': vars_dict['remind_bg'].get(),
-            'remind_bg_alpha': vars_dict['remind_bg_alpha'].get() / 100,
-            'remind_fg': vars_dict['remind_fg'].get(),
-            'remind_fg_alpha': vars_dict['remind_fg_alpha'].get() / 100,
-            'warning_bg': vars_dict['warning_bg'].get(),
-            'warning_bg_alpha': vars_dict['warning_bg_alpha'].get() / 100,
-            'warning_fg': vars_dict['warning_fg'].get(),
-            'warning_fg_alpha': vars_dict['warning_fg_alpha'].get() / 100,
-            'timer_font_size': vars_dict['timer_font'].get(),
-            'timeout_mode': vars_dict['timeout_mode'].get(),
-            'timeout_text': vars_dict['timeout_text'].get(),
-            'timeout_text_size': vars_dict['timeout_text_size'].get(),
-            'timeout_text_color': vars_dict['timeout_text_color'].get()
-        }
+    def _open_homepage(self):
+        """打开项目主页（首次点击时才导入webbrowser）"""
+        import webbrowser
+        webbrowser.open("https://github.com/Daaaaxianer/countDowner")
+
+    def _bind_validation(self, window, vars_dict, initial, swatches, conditional):
+        """
+        合并校验：变量写入只登记字段，同一空闲周期内的所有修改合并为一次校验；
+        只写回被修正的字段（写回期间不再登记，避免连锁触发），只刷新变化的颜色预览
+        """
+        current = dict(initial)  # 最近一次校验后的设置（结果形式）
+        dirty = set()  # 待校验的字段
+        state = {'idle_id': None, 'writing': False}
+
+        def on_write(key):
+            if state['writing']:
+                return
+            dirty.add(key)
+            if state['idle_id'] is None:
+                state['idle_id'] = window.after_idle(run_pass)
+
+        def run_pass():
+            state['idle_id'] = None
+            if not window.winfo_exists():
+                return
+            changed = set(dirty)
+            dirty.clear()
+            values = dict(current)
+            unparsed = set()  # 输入中途无法解析（如清空数字框）的字段暂不修正
+            for key in changed:
+                try:
+                    values[key] = settings_schema.FIELDS_BY_KEY[key].from_ui(vars_dict[key].get())
+                except ValueError:
+                    unparsed.add(key)
+            result = settings_schema.validate(values, changed=changed - unparsed, base=current)[0]
+            refreshed = set(changed)
+            state['writing'] = True
+            try:
+                for key, value in result.items():
+                    if key in unparsed:
+                        continue
+                    if value != values[key]:
+                        vars_dict[key].set(settings_schema.FIELDS_BY_KEY[key].to_ui(value))
+                        refreshed.add(key)
+                    current[key] = value
+            finally:
+                state['writing'] = False
+            apply_preview(refreshed)
+
+        def apply_preview(keys):
+            for key in keys:
+                if key in swatches:
+                    swatches[key].config(background=current[key])
+            for widget, key, value in conditional:
+                if key in keys:
+                    widget.config(state='normal' if current[key] == value else 'disabled')
+
+        for key, var in vars_dict.items():
+            var.trace_add("write", lambda *args, key=key: on_write(key))
+        apply_preview(set(vars_dict))  # 初始化颜色预览与控件状态
+        return current
+
+    def _get_settings_result(self, vars_dict, current):
+        """整理设置窗口的配置结果：按声明完整校验一次，无法解析的输入沿用最近一次校验通过的值"""
+        values = {}
+        for field in settings_schema.FIELDS:
+            try:
+                values[field.key] = field.from_ui(vars_dict[field.key].get())
+            except ValueError:
+                pass
+        return settings_schema.validate(values, base=current)[0]
 
     def _create_right_menu(self):
         """懒加载创建右键菜单（首次右键时创建，减少初始化开销）"""
         self.right_menu = tk.Menu(self.root, tearoff=0)
+        self.right_menu.add_command(label="设置...", command=self.open_settings)
         self.right_menu.add_command(label="重置", command=self.reset_timer)
         self.right_menu.add_command(label="暂停/继续", command=self.pause_timer)
         self.right_menu.add_command(label="停止", command=self.stop_timer)
+        if self.agenda:
+            self.right_menu.add_command(label="上一项", command=lambda: self.skip_segment(-1))
+            self.right_menu.add_command(label="下一项", command=lambda: self.skip_segment(1))
+        self.right_menu.add_command(label="导出计时记录", command=self.export_trace)
         self.right_menu.add_command(label="关闭", command=self.close_window)
+        if self.app_exit:
+            self.right_menu.add_command(label="退出常驻", command=self.app_exit)
 
     def show_right_menu(self, event):
         """显示右键菜单（懒加载创建菜单）"""
@@ -488,96 +584,640 @@ class PPTCountdown:
         finally:
             self.right_menu.grab_release()
 
+    def open_settings(self):
+        """运行中按需打开参数设置窗口，确认后以新设置重新开始倒计时"""
+        settings = self.show_settings_window(self.settings)
+        if not settings or not self.root.winfo_exists():
+            return
+        if self.agenda:
+            # 议程模式：新设置只作用于当前项，时长仍按议程
+            self.agenda.segments[self.segment_index].settings = settings
+            self.advance_agenda()
+            return
+        self.settings = settings
+        profile_store.save_profile(settings, self.profile_name)
+        self._apply_settings()
+
+    def _apply_settings(self):
+        """按 self.settings 重新创建核心与阶段样式，立即刷新并重新开始调度"""
+        self._cancel_wakeup()
+        self.init_parameters()
+        # 复用已创建的字体对象，只修改字号
+        self.timer_font.configure(size=self.timer_font_size)
+        self.timeout_text_font.configure(size=self.timeout_text_size)
+        self.fitter.invalidate()
+        self._build_stage_table()
+        self.renderer.invalidate()
+        self.update_timer()
+        self._notify_state()
+
+    def _locate_segment(self):
+        """议程模式：定位当前项（空档时为即将开始的项），取其设置与距下一次切换的秒数；议程已结束返回False"""
+        now = time.time()
+        index, transition, gap = self.agenda.locate(now)
+        if transition is None:
+            return False
+        segment = self.agenda.segments[index]
+        self.settings = segment.settings
+        self.segment_index = index
+        self.segment_gap = gap
+        self.segment_transition = transition
+        self.segment_seconds = transition - now
+        self.segment_title = f"下一项：{segment.title}" if gap else segment.title
+        print(f"议程：{self.segment_title}（{format_time(math.ceil(self.segment_seconds))}）")
+        return True
+
+    def _schedule_segment(self):
+        """在下一次切换时刻重新定位议程"""
+        self._cancel_segment()
+        delay = max(0, math.ceil((self.segment_transition - time.time()) * 1000)) + 1
+        self.segment_after_id = self.root.after(delay, self.advance_agenda)
+
+    def _cancel_segment(self):
+        """取消已调度的议程切换"""
+        if self.segment_after_id:
+            self.root.after_cancel(self.segment_after_id)
+            self.segment_after_id = None
+
+    def advance_agenda(self):
+        """议程模式：切换到当前时刻对应的项，以该项的设置与剩余时长重新开始倒计时"""
+        self.segment_after_id = None
+        if not self.root.winfo_exists():
+            return
+        if not self._locate_segment():
+            print("议程已全部结束")
+            return  # 最后一项继续按其超时设置显示
+        self._agenda_paused_at = None
+        self.root.title(self.segment_title)
+        self._apply_settings()
+        self._schedule_segment()
+
+    def skip_segment(self, step):
+        """议程模式：跳到下一项（1）/上一项（-1）/重新开始当前项（0），其后的项随之平移"""
+        self.agenda.skip(step, time.time())
+        self.advance_agenda()
+
     def start_drag(self, event):
-        """拖拽开始：记录鼠标相对于窗口的初始坐标"""
-        self.drag_x = event.x
-        self.drag_y = event.y
+        """拖拽开始：记录窗口位置与鼠标偏移（只查询这一次）；按在缩放手柄上时由手柄处理"""
+        if event.widget is self.size_grip:
+            return
+        self.drag.start(event)
 
     def do_drag(self, event):
-        """拖拽执行：计算窗口新坐标并移动"""
-        dx = event.x - self.drag_x
-        dy = event.y - self.drag_y
-        new_x = self.root.winfo_x() + dx
-        new_y = self.root.winfo_y() + dy
-        self.root.geometry(f"+{new_x}+{new_y}")
+        """拖拽执行：合并移动事件，每帧最多移动一次窗口"""
+        self.drag.motion(event)
 
     def end_drag(self, event):
-        """拖拽结束：清空坐标缓存"""
-        self.drag_x = 0
-        self.drag_y = 0
+        """拖拽结束：吸附屏幕边缘并记住位置"""
+        self.drag.end(event)
+
+    def _save_position(self, x, y, layout):
+        """按显示器布局保存窗口位置"""
+        profile_store.save_position(layout, x, y)
+
+    def _cancel_wakeup(self):
+        """取消已调度的下一次唤醒"""
+        if self.after_id:
+            self.root.after_cancel(self.after_id)
+            self.after_id = None
+        self._scheduled_at = None
 
     def reset_timer(self):
-        """重置倒计时：恢复初始状态"""
-        self.is_paused = False
-        self.is_stopped = False
-        self.total_seconds = self.original_total_seconds
-        self.negative_seconds = 0
-        self.update_style()
-        self.timer_label.config(text=self.format_time(self.total_seconds))
+        """重置倒计时：恢复初始状态并重新开始调度（停止后也可重置）"""
+        if self.agenda:
+            if self.segment_gap:
+                # 空档中没有进行中的项：不提前开始下一项，只按议程时间重新定位（停止后恢复自动切换）
+                self.advance_agenda()
+            else:
+                self.skip_segment(0)  # 议程模式：重新开始当前项
+            return
+        self._cancel_wakeup()
+        self.core.reset()
+        self.update_timer()
+        self._notify_state()
 
     def pause_timer(self):
-        """暂停/继续倒计时：切换暂停状态"""
-        self.is_paused = not self.is_paused
+        """暂停/继续倒计时：暂停时记录偏移并停止唤醒，继续时立即恢复调度"""
+        if self.core.pause():
+            self._cancel_wakeup()
+        elif not self.is_stopped:
+            self.update_timer()
+        if self.agenda:
+            self._pause_agenda()
+        self._notify_state()
+
+    def _pause_agenda(self):
+        """议程模式：暂停时停止自动切换，继续时当前项及其后的项顺延暂停时长"""
+        if self.is_paused:
+            self._agenda_paused_at = time.time()
+            self._cancel_segment()
+        elif self._agenda_paused_at is not None:
+            now = time.time()
+            self.agenda.shift(now - self._agenda_paused_at, now)
+            self.advance_agenda()
 
     def stop_timer(self):
         """停止倒计时：冻结显示"""
-        self.is_stopped = True
-        self.is_paused = False
+        self.core.stop()
+        self._cancel_wakeup()
+        self._cancel_segment()  # 议程模式：停止后不再自动切换，重置时从当前项重新开始
+        self._notify_state()
+
+    def adjust_time(self, seconds):
+        """加时（正数）或减时（负数）：立即刷新显示，运行中则按新的整秒边界重新调度"""
+        if self.agenda and self.core.is_running:
+            # 议程模式：当前项及其后的项一起顺延/提前
+            self.agenda.shift(seconds, time.time())
+            self.advance_agenda()
+            return
+        self.core.adjust(seconds)
+        self._refresh()
+        self._notify_state()
+
+    def apply_sync_state(self, state):
+        """多机同步跟随端：采用时间源的截止时刻与暂停/停止状态"""
+        if self.core is None or not self.root.winfo_exists():
+            return
+        self.core.apply_sync_state(state)
+        self._refresh()
+
+    def restore_state(self, remaining, paused, stopped):
+        """崩溃或休眠后重启：按恢复的剩余秒数与暂停/停止状态继续倒计时"""
+        now = self.core_clock()
+        self.apply_sync_state({'deadline': now + remaining, 'paused_at': now if paused or stopped else None,
+                               'paused': paused, 'stopped': stopped})
+
+    def _refresh(self):
+        """状态被外部修改后立即刷新显示：运行中重新调度到新的整秒边界，否则只重绘"""
+        if self.core.is_running:
+            self._cancel_wakeup()
+            self.update_timer()
+        else:
+            self.update_style()
+
+    def _notify_state(self):
+        """通知状态监听函数（多机同步时间源等）"""
+        for listener in self.state_listeners:
+            listener(self)
+
+    def set_thresholds(self, remind_seconds=None, warning_seconds=None):
+        """修改提醒/警告阈值（秒）并立即刷新阶段样式"""
+        self.core.set_thresholds(remind_seconds, warning_seconds)
+        if self.color_lut:
+            self._build_stage_table()  # 渐变关键点随阈值变化
+        self.update_style()
 
     def close_window(self):
         """关闭程序：终止倒计时循环并销毁窗口"""
-        if self.after_id:
-            self.root.after_cancel(self.after_id)  # 终止倒计时循环，避免内存泄漏
+        self._cancel_wakeup()  # 终止倒计时循环，避免内存泄漏
+        self._cancel_segment()
+        if self.frames:
+            self.frames.stop()
+        if self.profiler.enabled or self.trace_path:
+            self.print_stats()
+        if self.trace_path:
+            self.export_trace(self.trace_path)
         self.root.destroy()
 
+    def print_stats(self):
+        """打印各模块的运行统计（--startup-profile 或 --trace 时关闭窗口打印）"""
+        if self.frames:
+            print(f"动画统计：{self.frames.stats()}")
+        if self.core:
+            print(f"倒计时统计：{self.core.stats()}")
+        print(f"渲染统计：{self.renderer.stats()}")
+        print(f"拖拽统计：{self.drag.stats()}")
+        if self.font_fit:
+            print(f"字号自适应统计：{self.fitter.stats()}")
+
+    def export_trace(self, path=None):
+        """导出计时记录为JSON（未指定路径时保存到配置目录），打印汇总与路径"""
+        if path is None:
+            path = os.path.join(profile_store.get_config_dir(), time.strftime("trace-%Y%m%d-%H%M%S.json"))
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            self.trace.export(path, {'settings': self.settings, 'core': self.core.stats() if self.core else None})
+        except OSError as e:
+            print(f"导出计时记录失败：{str(e)}")
+            return None
+        print(f"计时记录：{self.trace.summary()}，已导出到 {path}")
+        return path
+
     def format_time(self, seconds):
-        """时间格式化：秒数转换为 MM:SS 格式"""
-        mins = seconds // 60
-        secs = seconds % 60
-        return f"{mins:02d}:{secs:02d}"
+        """时间格式化：秒数转换为 MM:SS 格式，满一小时为 HH:MM:SS"""
+        return format_time(seconds)
+
+    def _build_stage_table(self):
+        """预计算各阶段样式，阶段切换由核心判定，这里只做查表"""
+        if self.timeout_mode == 'negative':
+            timeout_style = (self.timer_font, self.warning_fg, self.warning_bg, self.warning_bg_alpha,
+                             self.warning_fg_alpha)
+        else:
+            timeout_style = (self.timeout_text_font, self.timeout_text_color, self.warning_bg, self.warning_bg_alpha,
+                             self.warning_fg_alpha)
+        # 阶段样式：(字体, 文字色, 背景色, 背景透明度, 文字透明度)
+        self.stage_styles = {
+            'normal': (self.timer_font, self.normal_fg, self.normal_bg, self.normal_bg_alpha, self.normal_fg_alpha),
+            'remind': (self.timer_font, self.remind_fg, self.remind_bg, self.remind_bg_alpha, self.remind_fg_alpha),
+            'warning': (self.timer_font, self.warning_fg, self.warning_bg, self.warning_bg_alpha,
+                        self.warning_fg_alpha),
+            'timeout': timeout_style,
+            # 幻灯片同步：正常/提醒阶段中落后于每页时间预算时显示
+            'behind': (self.timer_font, self.pace_fg, self.pace_bg, self.pace_bg_alpha, self.pace_fg_alpha),
+        }
+        if self.animate_fps:
+            # 动画模式：按核心阈值预先计算各阶段之间的渐变颜色
+            import animation
+            self.color_lut = animation.build_color_lut(
+                self.core, {stage: self.stage_styles[stage][1:] for stage in ('normal', 'remind', 'warning')})
+
+    def display_stage(self):
+        """显示的阶段：核心阶段；同步幻灯片时，正常/提醒阶段落后于当前页的时间预算显示为 behind"""
+        stage = self.core.stage
+        if self.slide_plan and stage in ('normal', 'remind') \
+                and self.slide_plan.is_behind(self.slide, self.core.clock.elapsed()):
+            return 'behind'
+        return stage
+
+    def show_slide(self, slide):
+        """幻灯片同步：切换到第 slide 页，立即按新页的时间预算重新判定阶段并重绘"""
+        self.slide = self.slide_plan.clamp(slide)
+        if self.core and self.root.winfo_exists():
+            self.update_style()
 
     def update_style(self):
-        """更新倒计时样式：根据剩余时间切换正常/提醒/警告状态"""
-        if self.total_seconds <= self.warning_seconds:
-            # 警告状态
-            self.timer_label.config(bg=self.warning_bg, fg=self.warning_fg)
-            self.root.configure(bg=self.warning_bg)
-            self.root.attributes("-alpha", self.warning_bg_alpha)
-        elif self.total_seconds <= self.remind_seconds:
-            # 提醒状态
-            self.timer_label.config(bg=self.remind_bg, fg=self.remind_fg)
-            self.root.configure(bg=self.remind_bg)
-            self.root.attributes("-alpha", self.remind_bg_alpha)
-        else:
-            # 正常状态
-            self.timer_label.config(bg=self.normal_bg, fg=self.normal_fg)
-            self.root.configure(bg=self.normal_bg)
-            self.root.attributes("-alpha", self.normal_bg_alpha)
+        """渲染核心当前状态：阶段样式查表，由渲染层推送变化字段，返回所用样式"""
+        stage = self.display_stage()
+        style = self.stage_styles[stage]
+        if self.color_lut and stage not in ('timeout', 'behind'):
+            # 动画模式：颜色按连续的剩余时间查渐变表，字体仍取阶段样式
+            style = (style[0],) + self.color_lut.lookup(self.core.clock.remaining())
+        text = self.core.display_text()
+        if self.font_fit:
+            # 字号自适应：同一文字形状与窗口尺寸只查表，字号变化时才修改字体
+            self.fitter.fit(style[0], text)
+        self.renderer.render(text, *style)
+        return style
+
+    def on_resize(self, event):
+        """窗口尺寸变化：记录新尺寸，自适应字号时在空闲时重新适配（连续缩放只适配一次）"""
+        if event.widget is not self.root or not self.fitter.resize(event.width, event.height):
+            return
+        if self.font_fit and self._fit_idle_id is None:
+            self._fit_idle_id = self.root.after_idle(self._refit)
+
+    def _refit(self):
+        self._fit_idle_id = None
+        if self.core and self.root.winfo_exists():
+            self.update_style()
+
+    def draw_frame(self):
+        """动画帧：刷新渐变颜色与进度条（数字只在整秒边界由 update_timer 更新），返回False停止动画"""
+        if not self.core.is_running or not self.root.winfo_exists():
+            return False
+        _, fg, bg = self.update_style()[:3]
+        self.progress.render(self.core.clock.remaining() / self.core.original_total_seconds, fg, bg)
+        # 超时后颜色与进度条不再变化
+        return self.core.stage != 'timeout'
 
     def update_timer(self):
-        """倒计时核心更新循环：每秒执行一次"""
-        if self.is_stopped or not self.root.winfo_exists():
+        """倒计时核心更新循环：按截止时刻计算显示秒数，在下一个整秒边界唤醒"""
+        self.after_id = None
+        scheduled, self._scheduled_at = self._scheduled_at, None
+        # 停止/暂停期间不调度唤醒，继续或重置时重新启动循环
+        if not self.core.is_running or not self.root.winfo_exists():
             return
 
-        if not self.is_paused:
-            if self.total_seconds >= 0:
-                self.update_style()
-                self.timer_label.config(text=self.format_time(self.total_seconds))
-                self.total_seconds -= 1
-            else:
-                # 超时后处理
-                self.root.configure(bg=self.warning_bg)
-                self.root.attributes("-alpha", self.warning_bg_alpha)
-                if self.timeout_mode == 'negative':
-                    self.negative_seconds += 1
-                    self.timer_label.config(text=f"-{self.format_time(self.negative_seconds)}", fg=self.warning_fg, bg=self.warning_bg)
-                else:
-                    self.timer_label.config(text=self.timeout_text, font=self.timeout_text_font, fg=self.timeout_text_color, bg=self.warning_bg)
+        trace_clock = self.trace.clock
+        actual = trace_clock()
+        self.core.tick()
+        style_begin = trace_clock()
+        self.update_style()
+        self.trace.record(scheduled, actual, trace_clock() - style_begin, self.renderer.last_tick_calls, self.core.stage)
+        for listener in self.tick_listeners:
+            listener(self)
+        if self.frames:
+            self.frames.start()  # 动画帧在暂停/停止/超时后自行停止，这里重新启动
+
+        # 调度到下一个整秒边界，保存任务ID用于终止
+        delay = self.core.next_wakeup_ms()
+        self._scheduled_at = trace_clock() + delay / 1000
+        self.after_id = self.root.after(delay, self.update_timer)
+
+class WindowController:
+    """远程控制适配：按计时器ID把控制命令转发给倒计时窗口（接口同 TimerManager）"""
+    def __init__(self):
+        self.windows = {}  # 计时器ID -> PPTCountdown
+        self._next_id = 1
+
+    def register(self, app):
+        """登记倒计时窗口，返回计时器ID"""
+        timer_id = self._next_id
+        self._next_id += 1
+        self.windows[timer_id] = app
+        return timer_id
+
+    def timer_ids(self):
+        """仍在显示的窗口ID，顺带清理已关闭的窗口"""
+        for timer_id, app in list(self.windows.items()):
+            if app.core is None or not app.root.winfo_exists():
+                del self.windows[timer_id]
+        return list(self.windows)
+
+    def _get(self, timer_id):
+        app = self.windows.get(timer_id)
+        if app is None or app.core is None or not app.root.winfo_exists():
+            self.windows.pop(timer_id, None)
+            raise KeyError(timer_id)
+        return app
+
+    def reset(self, timer_id):
+        self._get(timer_id).reset_timer()
+
+    def pause(self, timer_id, paused=None):
+        app = self._get(timer_id)
+        if paused is None or paused != app.is_paused:
+            app.pause_timer()
+
+    def stop(self, timer_id):
+        self._get(timer_id).stop_timer()
+
+    def adjust(self, timer_id, seconds):
+        self._get(timer_id).adjust_time(seconds)
+
+    def set_thresholds(self, timer_id, remind_seconds=None, warning_seconds=None):
+        self._get(timer_id).set_thresholds(remind_seconds, warning_seconds)
+
+    def status(self, timer_id):
+        return self._get(timer_id).core.snapshot()
+
+def start_clock_sync(root, app, args, follower=None):
+    """多机同步：作为时间源发布截止时刻，或作为跟随端按时间源的截止时刻显示"""
+    import clock_sync
+    if args.sync_authority:
+        try:
+            authority = clock_sync.SyncAuthority(port=args.sync_port, clock=app.core_clock)
+        except OSError as e:
+            print(f"时间源启动失败：{str(e)}")
+            return None
+        app.state_listeners.append(lambda changed: authority.publish(changed.core.sync_state()))
+        authority.publish(app.core.sync_state())
+        print(f"时间源已启动：UDP端口 {authority.port}")
+        return authority
 
-        # 递归调用倒计时循环，保存任务ID用于终止
-        self.after_id = self.root.after(1000, self.update_timer)
+    def on_state(state):
+        # 网络线程收到新状态，转交Tk线程
+        try:
+            root.after(0, app.apply_sync_state, state)
+        except RuntimeError:
+            pass
+
+    follower.on_state = on_state
+    return follower.start()
+
+def start_web_stream(app, args):
+    """网页显示：每次整秒刷新与状态变化时推送一次状态（编码与分发在后台线程）"""
+    import web_stream
+    try:
+        server = web_stream.StreamServer(port=args.web_port).start()
+    except OSError as e:
+        print(f"网页显示启动失败：{str(e)}")
+        return None
+
+    def publish(changed):
+        server.publish(web_stream.display_state(changed.core, changed.stage_styles[changed.display_stage()][1:]))
+
+    app.tick_listeners.append(publish)
+    app.state_listeners.append(publish)
+    publish(app)
+    print(f"网页显示已启动：http://localhost:{server.port}/")
+    return server
+
+def start_state_journal(app, recovered=None):
+    """状态日志：状态变化写入内存映射的状态文件与事件日志；recovered 为恢复的记录时先还原剩余时间"""
+    import state_journal
+    try:
+        journal = state_journal.StateJournal().open()
+    except OSError as e:
+        print(f"状态日志启动失败：{str(e)}")
+        return None
+    if recovered:
+        remaining = state_journal.remaining_seconds(recovered)
+        app.restore_state(remaining, recovered['paused'], recovered['stopped'])
+        print(f"已恢复倒计时：剩余 {remaining:.1f} 秒")
+    journal.observe(app)
+    app.state_listeners.append(journal.observe)
+    return journal
+
+def start_live_state(app, args):
+    """实时状态共享：每次整秒刷新与状态变化时写入内存映射的状态记录，本机其它进程映射同一文件读取"""
+    import live_state
+    try:
+        writer = live_state.LiveStateWriter(args.live_state_path).open()
+    except OSError as e:
+        print(f"实时状态共享启动失败：{str(e)}")
+        return None
+    app.tick_listeners.append(writer.observe)
+    app.state_listeners.append(writer.observe)
+    writer.observe(app)
+    print(f"实时状态共享已启动：{writer.path}")
+    return writer
+
+def start_session_log(app, args):
+    """场次统计：跟踪暂停与结果，每场结束（重置、新设置、议程切换、关闭窗口）时追加到按列存放的统计文件"""
+    import session_store
+    try:
+        store = session_store.SessionStore().open()
+    except OSError as e:
+        print(f"场次统计启动失败：{str(e)}")
+        return None
+    recorder = session_store.SessionRecorder(store, room=args.room, speaker=args.speaker)
+    app.tick_listeners.append(recorder.observe)
+    app.state_listeners.append(recorder.observe)
+    recorder.observe(app)
+    return recorder
+
+def start_slide_sync(root, app, args):
+    """幻灯片同步：后台线程接收翻页事件，经 root.after 转交Tk线程重绘，并统计事件到显示的延迟"""
+    import slide_sync
+    try:
+        app.slide_plan = slide_sync.load_plan(args.slides)
+    except (OSError, ValueError) as e:
+        print(f"幻灯片预算加载失败：{str(e)}")
+        return None
+    if app.slide_plan.total_seconds > app.core.original_total_seconds:
+        print(f"幻灯片预算合计 {app.slide_plan.total_seconds / 60:.1f} 分钟，超过倒计时总时长")
+
+    def show(event):
+        app.show_slide(event.target(app.slide))
+        app.root.update_idletasks()  # 立即重绘，延迟包含实际绘制
+        source.displayed(event)
+
+    def on_event(event):
+        # 后台线程收到翻页事件，转交Tk线程
+        try:
+            root.after(0, show, event)
+        except RuntimeError:
+            pass
+
+    port = args.slide_port
+    if port is None and not (args.slide_file or args.slide_fifo):
+        port = slide_sync.SLIDE_PORT  # 未指定文件与管道时默认从UDP端口接收
+    source = slide_sync.SlideInput(on_event, path=args.slide_file, fifo=args.slide_fifo, port=port)
+    try:
+        source.start()
+    except OSError as e:
+        print(f"幻灯片同步启动失败：{str(e)}")
+        app.slide_plan = None
+        return None
+    app.update_style()
+    print(f"幻灯片同步已启动：{args.slide_file or args.slide_fifo or f'UDP端口 {source.port}'}"
+          f"{'（文件按修改时间检查）' if source.polling else ''}")
+    return source
+
+def start_control_server(root, controller, args):
+    """启动远程控制服务，网络收发在后台线程，命令经 root.after 转交Tk线程执行"""
+    import remote_control
+    options = {'path': args.control_socket} if args.control_socket else {'port': args.control_port}
+    try:
+        server = remote_control.ControlServer(controller, lambda fn: root.after(0, fn), **options).start()
+    except OSError as e:
+        print(f"远程控制服务启动失败：{str(e)}")
+        return None
+    print(f"远程控制服务已启动：{args.control_socket or server.port}")
+    return server
+
+def parse_args(argv=None):
+    """命令行参数：快速启动与启动分析"""
+    import argparse
+    parser = argparse.ArgumentParser(description="countDowner 汇报展示倒计时")
+
+    def fps_type(text):
+        """帧率：1-240的整数（0或负数会让动画调度器除零或停摆）"""
+        try:
+            value = int(text)
+        except ValueError:
+            raise argparse.ArgumentTypeError(f"帧率必须是整数：{text!r}") from None
+        if not 1 <= value <= MAX_FPS:
+            raise argparse.ArgumentTypeError(f"帧率应为1-{MAX_FPS}：{value}")
+        return value
+
+    parser.add_argument('--quick', action='store_true', help="使用上次的设置直接开始倒计时，跳过设置窗口")
+    parser.add_argument('--profile', metavar='NAME', help="使用指定名称的配置档案直接开始倒计时")
+    parser.add_argument('--save-as', metavar='NAME', help="设置窗口确认后另存为命名档案")
+    parser.add_argument('--minutes', type=int, metavar='N', help="本次倒计时分钟数（其余参数取档案或上次设置）")
+    parser.add_argument('--resident', action='store_true', help="常驻模式：首次启动常驻后台，之后的启动直接移交给它")
+    parser.add_argument('--control', action='store_true', help="启动本机远程控制服务（JSON-lines）")
+    parser.add_argument('--control-port', type=int, default=47292, help="远程控制TCP端口")
+    parser.add_argument('--control-socket', metavar='PATH', help="远程控制改用Unix套接字")
+    parser.add_argument('--sync-authority', action='store_true', help="多机同步：作为时间源")
+    parser.add_argument('--sync-follow', metavar='HOST[:PORT]', help="多机同步：跟随指定的时间源")
+    parser.add_argument('--sync-port', type=int, default=47293, help="多机同步：时间源UDP端口")
+    parser.add_argument('--sync-interval', type=float, default=5.0, help="多机同步：跟随端对时间隔（秒）")
+    parser.add_argument('--resume', action='store_true', help="恢复上次崩溃或未正常关闭时的倒计时（剩余时间按截止时刻计算）")
+    parser.add_argument('--agenda', metavar='FILE', help="议程模式：按JSON议程文件逐项倒计时，到点自动切换")
+    parser.add_argument('--web', action='store_true', help="网页显示：本机HTTP服务推送倒计时状态，浏览器打开即可观看")
+    parser.add_argument('--web-port', type=int, default=47294, help="网页显示HTTP端口")
+    parser.add_argument('--slides', metavar='FILE', help="幻灯片同步：按JSON时间预算判断每页是否落后于进度")
+    parser.add_argument('--slide-file', metavar='PATH', help="幻灯片同步：从演示工具写入页码的文件接收翻页")
+    parser.add_argument('--slide-fifo', metavar='PATH', help="幻灯片同步：从命名管道接收翻页")
+    parser.add_argument('--slide-port', type=int, help="幻灯片同步：从本机UDP端口接收翻页（未指定文件与管道时默认47295）")
+    parser.add_argument('--live-state', action='store_true', help="实时状态共享：倒计时状态写入内存映射文件，供直播叠加层等本机程序读取")
+    parser.add_argument('--live-state-path', metavar='PATH', help="实时状态共享文件（默认在配置目录下）")
+    parser.add_argument('--room', default="", help="场次统计：会场名称")
+    parser.add_argument('--speaker', default="", help="场次统计：讲者（议程模式默认取议程项标题）")
+    parser.add_argument('--no-session-log', action='store_true', help="不记录场次统计（超时、暂停等）")
+    parser.add_argument('--glyph', action='store_true', help="字形合成渲染：文字与背景透明度相互独立（需要Pillow）")
+    parser.add_argument('--animate', action='store_true', help="动画模式：进度条连续扫过，颜色在各阶段之间渐变")
+    parser.add_argument('--fps', type=fps_type, default=30, help=f"动画模式目标帧率（1-{MAX_FPS}）")
+    parser.add_argument('--trace', metavar='PATH', help="关闭窗口时把计时记录（唤醒迟到、样式刷新耗时）导出为JSON并打印运行统计")
+    parser.add_argument('--startup-profile', action='store_true', help="打印启动各阶段耗时（首帧时间），关闭窗口时打印运行统计")
+    return parser.parse_args(argv)
+
+def load_startup_settings(args):
+    """快速启动路径：读取命名档案或上次使用的设置，找不到时返回None（回退到设置窗口）"""
+    settings = None
+    if args.profile:
+        settings = profile_store.load_profile(args.profile)
+        if settings is None:
+            print(f"配置档案不存在：{args.profile}，打开设置窗口")
+    elif args.quick or args.minutes:
+        settings = profile_store.load_profile()
+    if args.minutes:
+        # 指定时长时直接开始，没有档案则使用默认设置
+        settings = profile_store.with_duration(settings or profile_store.DEFAULT_SETTINGS, args.minutes)
+    return settings
+
+def load_agenda(args):
+    """议程模式：加载议程文件（各项设置以启动设置或上次使用的设置为基础），失败时返回None"""
+    if not args.agenda:
+        return None
+    import agenda
+    try:
+        timeline = agenda.load(args.agenda, base=load_startup_settings(args) or profile_store.load_profile())
+    except (OSError, ValueError) as e:
+        print(f"议程加载失败：{str(e)}")
+        return None
+    for note in timeline.notes:
+        print(f"议程已修正：{note}")
+    return timeline
+
+def run_resident(root, ico_path, args, profiler, controller=None):
+    """常驻模式：监听本机端口，之后的启动移交参数后由本进程直接打开新的倒计时窗口"""
+    import resident
+
+    def open_window(launch_args, launch_profiler):
+        window = tk.Toplevel(root)
+        window.withdraw()  # 设置完成后由init_ui显示
+        app = PPTCountdown(window, ico_path, settings=load_startup_settings(launch_args),
+                           profile_name=launch_args.save_as or launch_args.profile,
+                           profiler=launch_profiler, app_exit=shutdown, glyph=launch_args.glyph,
+                           animate_fps=launch_args.fps if launch_args.animate else None,
+                           trace_path=launch_args.trace, agenda=load_agenda(launch_args))
+        if controller:
+            controller.register(app)
+
+    def handle(message):
+        """Tk线程中处理移交请求，打印启动到窗口的延迟"""
+        try:
+            launch_args = parse_args(message['argv'])
+        except SystemExit:
+            print(f"常驻模式：无法解析移交的参数 {message['argv']}")
+            return
+        open_window(launch_args, StartupProfiler(time.perf_counter(), enabled=launch_args.startup_profile))
+        root.update_idletasks()
+        print(f"常驻模式：启动到窗口 {(time.time() - message['launched_at']) * 1000:.1f}ms")
+
+    def on_request(message):
+        # 后台线程收到请求，转交Tk线程处理
+        try:
+            root.after(0, handle, message)
+        except RuntimeError:
+            pass  # 主循环已退出
+
+    def shutdown():
+        server.close()
+        root.destroy()
+
+    try:
+        server = resident.ResidentServer(on_request)
+    except OSError as e:
+        # 端口不可用时按普通模式运行，关闭窗口即退出
+        print(f"常驻模式启动失败，按普通模式运行：{str(e)}")
+        app = PPTCountdown(root, ico_path, settings=load_startup_settings(args),
+                           profile_name=args.save_as or args.profile, profiler=profiler, glyph=args.glyph,
+                           animate_fps=args.fps if args.animate else None, trace_path=args.trace,
+                           agenda=load_agenda(args))
+        if controller:
+            controller.register(app)
+        return
+    open_window(args, profiler)
 
 if __name__ == "__main__":
+    args = parse_args()
+    profiler = StartupProfiler(_STARTUP_T0, enabled=args.startup_profile)
+    profiler.mark('imports')
+
     # 主程序入口：初始化主窗口并隐藏，仅显示设置窗口
     root = tk.Tk()
     root.withdraw()  # 隐藏主窗口
@@ -590,6 +1230,61 @@ if __name__ == "__main__":
     # 可选：打印路径用于调试
     print(f"图标实际加载路径：{ico_path}")
 
+    # 远程控制：所有倒计时窗口按打开顺序编号（从1开始）
+    controller = WindowController() if args.control else None
+    # 多机同步跟随端：倒计时核心使用换算到时间源时间轴的时钟
+    follower = None
+    if args.sync_follow:
+        import clock_sync
+        follower = clock_sync.SyncFollower(clock_sync.parse_address(args.sync_follow, args.sync_port),
+                                           interval=args.sync_interval)
+
+    # 恢复上次未正常关闭的倒计时：设置取自状态日志
+    recovered = None
+    journal = None
+    slides = None
+    live = None
+    sessions = None
+    if args.resume and not args.resident:
+        import state_journal
+        recovered = state_journal.recover()
+        if recovered is None:
+            print("没有可恢复的倒计时")
+
     # 实例化时传入处理后的ICO路径
-    app = PPTCountdown(root, ico_path)
-    root.mainloop()
\ No newline at end of file
+    if args.resident:
+        run_resident(root, ico_path, args, profiler, controller)
+    else:
+        app = PPTCountdown(root, ico_path, settings=recovered[1] if recovered else load_startup_settings(args),
+                           profile_name=args.save_as or args.profile,
+                           profiler=profiler, clock=follower, glyph=args.glyph,
+                           animate_fps=args.fps if args.animate else None, trace_path=args.trace,
+                           agenda=load_agenda(args))
+        if controller:
+            controller.register(app)
+        if app.core is not None and (args.sync_authority or follower):
+            start_clock_sync(root, app, args, follower)
+        if app.core is not None and args.web:
+            start_web_stream(app, args)
+        if app.core is not None and args.slides:
+            slides = start_slide_sync(root, app, args)
+        if app.core is not None and args.live_state:
+            live = start_live_state(app, args)
+        if app.core is not None and not args.no_session_log:
+            sessions = start_session_log(app, args)
+        if app.core is not None and not app.agenda and not follower:
+            # 议程按墙钟时间轴，重新加载即可接上；跟随端以时间源为准，二者都不需要状态日志
+            journal = start_state_journal(app, recovered[0] if recovered else None)
+    if controller and (args.resident or controller.timer_ids()):
+        start_control_server(root, controller, args)
+    root.mainloop()
+    if journal:
+        journal.close(app.core)  # 正常关闭：记录关闭事件，之后不再恢复
+    if sessions:
+        sessions.close(app)  # 记下最后一场
+    if live:
+        live.close(app.core)  # 标记为已关闭，读取端据此停止显示
+    if slides:
+        slides.close()
+        if args.startup_profile or args.trace:
+            print(f"幻灯片同步统计：{slides.stats()}")
\ No newline at end of file
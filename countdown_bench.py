@@ -0,0 +1,160 @@
+"""
+countDowner 倒计时核心基准测试与正确性校验（无需显示器）
+用虚拟时钟在毫秒级的真实耗时内回放数小时的模拟时间：
+    python countdown_bench.py [--hours 10]
+"""
+import argparse
+import random
+import sys
+import time
+import timeit
+import tracemalloc
+
+from countdown_core import CountdownCore, VirtualClock, format_time
+
+# 基准测试使用的默认设置（与设置窗口默认值一致）
+DEFAULT_SETTINGS = {
+    'total': 10, 'remind': 2, 'warning': 30,
+    'timeout_mode': 'negative', 'timeout_text': "时间到！",
+}
+
+
+def make_core(clock, **overrides):
+    """按默认设置创建核心，可覆盖部分参数"""
+    settings = dict(DEFAULT_SETTINGS)
+    settings.update(overrides)
+    return CountdownCore(settings, clock=clock)
+
+
+def replay(core, clock, seconds, jitter=0.0, rng=None):
+    """按核心给出的唤醒间隔推进虚拟时钟（可附加随机回调延迟），返回tick次数"""
+    end = clock.now + seconds
+    ticks = 0
+    while clock.now < end:
+        delay = core.next_wakeup_ms() / 1000
+        if jitter:
+            delay += rng.random() * jitter
+        clock.advance(delay)
+        core.tick()
+        ticks += 1
+    return ticks
+
+
+def check_stage_instants():
+    """校验各阶段恰好在预期的模拟时刻切换：切换点前1ms为上一阶段，切换点处为新阶段"""
+    errors = []
+    for overrides in ({}, {'total': 1, 'remind': 1, 'warning': 59}, {'total': 60, 'remind': 59, 'warning': 1}):
+        clock = VirtualClock()
+        core = make_core(clock, **overrides)
+        start = clock.now
+        previous = 'normal'
+        for stage, instant in sorted(core.stage_instants().items(), key=lambda item: item[1]):
+            if stage == 'normal':
+                continue
+            for offset, expected in ((-0.001, previous), (0.0, stage)):
+                clock.now = start + instant + offset
+                core.update(core.clock.shown_seconds())
+                if core.stage != expected:
+                    errors.append(f"{overrides} t={instant + offset:.3f}s 阶段为 {core.stage}，预期 {expected}")
+            previous = stage
+    return errors
+
+
+def check_timeout_modes():
+    """校验超时处理：归零时显示00:00，之后负计时或显示自定义文字"""
+    errors = []
+    for mode, expected in (('negative', ['00:00', '-00:01', '-01:00']), ('text', ['00:00', "时间到！", "时间到！"])):
+        clock = VirtualClock()
+        core = make_core(clock, total=1, timeout_mode=mode)
+        for elapsed, text in zip((60, 61, 120), expected):
+            clock.now = elapsed
+            core.update(core.clock.shown_seconds())
+            if core.display_text() != text:
+                errors.append(f"{mode} t={elapsed}s 显示 {core.display_text()!r}，预期 {text!r}")
+    return errors
+
+
+def check_jittered_replay(seconds=3600, jitter=0.25):
+    """带随机回调延迟回放：每次tick的显示值都必须等于 总秒数 - 已运行整秒数"""
+    errors = []
+    rng = random.Random(0)
+    clock = VirtualClock()
+    core = make_core(clock)
+    end = clock.now + seconds
+    while clock.now < end and not errors:
+        clock.advance(core.next_wakeup_ms() / 1000 + rng.random() * jitter)
+        shown = core.tick()
+        expected = core.original_total_seconds - int(clock.now // 1)
+        if shown != expected:
+            errors.append(f"t={clock.now:.3f}s 显示 {shown}，预期 {expected}")
+    # 暂停期间时间冻结，继续后整体顺延
+    core.reset()
+    clock.advance(10)
+    core.pause()
+    clock.advance(100)
+    core.pause()
+    clock.advance(0.5)
+    if core.tick() != core.original_total_seconds - 10:
+        errors.append("暂停后剩余时间未顺延")
+    return errors
+
+
+def bench_replay(hours):
+    """回放指定小时数的模拟时间，统计每秒处理的状态转换（tick）数"""
+    clock = VirtualClock()
+    core = make_core(clock)
+    begin = time.perf_counter()
+    ticks = replay(core, clock, hours * 3600)
+    elapsed = time.perf_counter() - begin
+    return {
+        'simulated_hours': hours,
+        'ticks': ticks,
+        'wall_ms': elapsed * 1000,
+        'ticks_per_second': ticks / elapsed if elapsed else 0.0,
+    }
+
+
+def bench_allocations(ticks=10000):
+    """统计每次tick的内存分配：净增内存块数与tracemalloc峰值"""
+    clock = VirtualClock()
+    core = make_core(clock)
+    replay(core, clock, 10)  # 预热
+    blocks_before = sys.getallocatedblocks()
+    tracemalloc.start()
+    for _ in range(ticks):
+        clock.advance(core.next_wakeup_ms() / 1000)
+        core.tick()
+        core.display_text()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        'ticks': ticks,
+        'net_blocks_per_tick': (sys.getallocatedblocks() - blocks_before) / ticks,
+        'retained_bytes': current,
+        'peak_bytes': peak,
+    }
+
+
+def bench_format_time(number=200000):
+    """format_time 单次调用耗时（纳秒）"""
+    cost = timeit.timeit("format_time(3599)", globals={'format_time': format_time}, number=number)
+    return {'calls': number, 'ns_per_call': cost / number * 1e9}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="countDowner 倒计时核心基准测试")
+    parser.add_argument('--hours', type=float, default=10, help="回放的模拟小时数")
+    args = parser.parse_args(argv)
+
+    errors = check_stage_instants() + check_timeout_modes() + check_jittered_replay()
+    print(f"正确性校验：{'通过' if not errors else '失败'}")
+    for error in errors:
+        print(f"  {error}")
+    print(f"回放：{bench_replay(args.hours)}")
+    print(f"内存分配：{bench_allocations()}")
+    print(f"format_time：{bench_format_time()}")
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
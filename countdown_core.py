@@ -0,0 +1,286 @@
+"""
+countDowner 无界面倒计时核心
+状态机（剩余秒数、负计时、暂停/停止、阶段切换、超时处理）与Tk解耦，
+时钟可注入：实际运行用 time.monotonic，测试与基准测试用 VirtualClock
+"""
+import time
+import math  # 截止时刻换算显示秒数（向上取整）
+
+# 阶段名称，按倒计时推进顺序排列
+STAGES = ('normal', 'remind', 'warning', 'timeout')
+
+
+def format_time(seconds):
+    """时间格式化：秒数转换为 MM:SS 格式，满一小时为 HH:MM:SS"""
+    mins = seconds // 60
+    secs = seconds % 60
+    if mins >= 60:
+        return f"{mins // 60:02d}:{mins % 60:02d}:{secs:02d}"
+    return f"{mins:02d}:{secs:02d}"
+
+
+class VirtualClock:
+    """虚拟时钟：可调用对象，手动推进时间，用于无界面模拟数小时的倒计时"""
+    def __init__(self, start=0.0):
+        self.now = start  # 当前虚拟时刻（秒）
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, seconds):
+        """推进虚拟时间"""
+        self.now += seconds
+        return self.now
+
+
+class CountdownClock:
+    """
+    基于截止时刻的倒计时引擎：剩余时间 = 目标结束时刻 - time.monotonic()
+    不再逐次减1，回调延迟、事件循环阻塞、对话框抓取都不会累积误差
+    """
+    EPSILON = 1e-6  # 浮点容差：避免 (t+60)-t 得到 60.00000000001 而多显示一秒
+    # 使用__slots__压缩单个计时器的内存，便于一个进程内承载数百个倒计时
+    __slots__ = ('total_seconds', 'clock', 'deadline', 'paused_at', 'last_shown', 'wakeups',
+                 'max_display_error', 'active_seconds', '_active_since')
+
+    def __init__(self, total_seconds, clock=time.monotonic):
+        self.total_seconds = total_seconds  # 倒计时总秒数（用于重置）
+        self.clock = clock  # 单调时钟函数，可替换便于测量
+        self.deadline = 0.0  # 目标结束时刻（单调时钟）
+        self.paused_at = None  # 暂停/停止时刻，非None表示时间冻结
+        self.reset()
+
+    def reset(self):
+        """重置引擎：以当前时刻重新计算截止时刻，并清空统计"""
+        now = self.clock()
+        self.deadline = now + self.total_seconds
+        self.paused_at = None
+        self.last_shown = self.total_seconds  # 上一次显示的秒数，用于计算显示误差
+        self.wakeups = 0  # 运行期间的唤醒次数
+        self.max_display_error = 0.0  # 最坏显示误差（秒）：旧数字超期停留的时长
+        self.active_seconds = 0.0  # 累计运行时长（不含暂停），用于计算每分钟唤醒数
+        self._active_since = now
+
+    @property
+    def is_frozen(self):
+        """时间是否冻结（暂停或停止）"""
+        return self.paused_at is not None
+
+    def pause(self):
+        """暂停：记录暂停时刻，之后不再需要唤醒"""
+        if self.paused_at is None:
+            now = self.clock()
+            self.paused_at = now
+            self.active_seconds += now - self._active_since
+
+    def resume(self):
+        """继续：截止时刻顺延暂停时长"""
+        if self.paused_at is not None:
+            now = self.clock()
+            self.deadline += now - self.paused_at
+            self.paused_at = None
+            self._active_since = now
+
+    def adjust(self, seconds):
+        """加时/减时：截止时刻平移，显示跳变不计入显示误差"""
+        self.deadline += seconds
+        self.last_shown = self.shown_seconds()
+
+    def remaining(self):
+        """剩余时间（浮点秒），超时后为负数；冻结期间保持不变"""
+        now = self.paused_at if self.paused_at is not None else self.clock()
+        return self.deadline - now
+
+    def shown_seconds(self):
+        """当前应显示的整数秒：剩余时间向上取整，负数表示已超时的秒数"""
+        return math.ceil(self.remaining() - self.EPSILON)
+
+    def tick(self):
+        """唤醒时调用：返回应显示的秒数，并记录唤醒次数与显示误差"""
+        remaining = self.remaining()
+        shown = math.ceil(remaining - self.EPSILON)
+        self.wakeups += 1
+        if shown != self.last_shown:
+            # 旧数字应在 剩余时间 == last_shown - 1 时被替换，超出部分即显示误差
+            error = (self.last_shown - 1) - remaining
+            if error > self.max_display_error:
+                self.max_display_error = error
+            self.last_shown = shown
+        return shown
+
+    def next_wakeup_ms(self):
+        """距下一个整秒边界（显示数字变化时刻）的毫秒数，多留1ms避免提前唤醒"""
+        remaining = self.remaining()
+        delay = remaining - math.ceil(remaining - self.EPSILON) + 1
+        return int(math.ceil(delay * 1000)) + 1
+
+    def elapsed(self):
+        """自重置以来累计运行的秒数（不含暂停与停止期间，不受加减时影响）"""
+        if self.paused_at is None:
+            return self.active_seconds + self.clock() - self._active_since
+        return self.active_seconds
+
+    def stats(self):
+        """统计信息：唤醒次数、每分钟唤醒数、最坏显示误差（毫秒）"""
+        minutes = self.elapsed() / 60
+        return {
+            'wakeups': self.wakeups,
+            'wakeups_per_minute': self.wakeups / minutes if minutes > 0 else 0.0,
+            'max_display_error_ms': self.max_display_error * 1000,
+        }
+
+
+class CountdownCore:
+    """
+    无界面倒计时状态机：输入为设置字典（同 _get_settings_result 的返回值）与时钟，
+    Tk窗口只负责把 stage / display_text() 渲染出来
+    """
+    __slots__ = ('settings', 'original_total_seconds', 'remind_seconds', 'warning_seconds', 'timeout_mode',
+                 'timeout_text', 'clock', 'stage_transitions', 'is_paused', 'is_stopped', 'total_seconds',
+                 'negative_seconds', 'stage_index', 'stage')
+
+    def __init__(self, settings, clock=time.monotonic, total_seconds=None):
+        # total_seconds 指定时以秒为单位覆盖设置中的总分钟数（议程模式按各项的剩余时长创建）
+        self.settings = settings  # 设置字典
+        # 原始总秒数（用于重置）
+        self.original_total_seconds = settings['total'] * 60 if total_seconds is None else total_seconds
+        self.remind_seconds = settings['remind'] * 60  # 提醒时间秒数
+        self.warning_seconds = settings['warning']  # 最后警告秒数
+        self.timeout_mode = settings['timeout_mode']  # 超时模式：negative / text
+        self.timeout_text = settings['timeout_text']  # 自定义超时文字
+        self.clock = CountdownClock(self.original_total_seconds, clock)  # 截止时刻倒计时引擎
+        self._build_stage_table()
+        self.reset()
+
+    def _build_stage_table(self):
+        """预计算阶段切换点：显示秒数降到阈值即进入该阶段（按阈值降序）"""
+        self.stage_transitions = tuple(sorted(
+            [(self.remind_seconds, 'remind'), (self.warning_seconds, 'warning'), (-1, 'timeout')],
+            key=lambda item: -item[0]
+        ))
+
+    def reset(self):
+        """重置倒计时：恢复初始状态"""
+        self.is_paused = False  # 倒计时暂停状态
+        self.is_stopped = False  # 倒计时停止状态
+        self.total_seconds = self.original_total_seconds  # 实时倒计时秒数（超时后为-1）
+        self.negative_seconds = 0  # 超时后负计时秒数
+        self.stage_index = 0  # 已越过的切换点数量
+        self.stage = 'normal'  # 当前阶段
+        self.clock.reset()
+        self.update(self.clock.shown_seconds())
+
+    @property
+    def is_running(self):
+        """是否需要继续唤醒（未暂停且未停止）"""
+        return not (self.is_paused or self.is_stopped)
+
+    def pause(self):
+        """暂停/继续倒计时：切换暂停状态，停止后无效；返回切换后的暂停状态"""
+        if self.is_stopped:
+            return self.is_paused
+        self.is_paused = not self.is_paused
+        if self.is_paused:
+            self.clock.pause()
+        else:
+            self.clock.resume()
+        return self.is_paused
+
+    def stop(self):
+        """停止倒计时：冻结显示"""
+        self.is_stopped = True
+        self.is_paused = False
+        self.clock.pause()
+
+    def adjust(self, seconds):
+        """加时（正数）或减时（负数），立即按新的剩余时间更新状态"""
+        self.clock.adjust(seconds)
+        self.update(self.clock.shown_seconds())
+
+    def set_thresholds(self, remind_seconds=None, warning_seconds=None):
+        """修改提醒/警告阈值（秒），重建切换点并重新定位当前阶段"""
+        if remind_seconds is not None:
+            self.remind_seconds = int(remind_seconds)
+        if warning_seconds is not None:
+            self.warning_seconds = int(warning_seconds)
+        self._build_stage_table()
+        self.stage_index = 0
+        self.update(self.clock.shown_seconds())
+
+    def snapshot(self):
+        """当前状态快照（可JSON序列化），供远程控制、状态输出等使用"""
+        return {
+            'remaining': self.total_seconds,
+            'negative': self.negative_seconds,
+            'stage': self.stage,
+            'paused': self.is_paused,
+            'stopped': self.is_stopped,
+            'text': self.display_text(),
+            'remind_seconds': self.remind_seconds,
+            'warning_seconds': self.warning_seconds,
+        }
+
+    def sync_state(self):
+        """时间同步用的状态：截止时刻与冻结时刻均为本核心时钟下的绝对时刻"""
+        return {
+            'deadline': self.clock.deadline,
+            'paused_at': self.clock.paused_at,
+            'paused': self.is_paused,
+            'stopped': self.is_stopped,
+        }
+
+    def apply_sync_state(self, state):
+        """跟随端：采用时间源的截止时刻与暂停/停止状态（时钟需已换算到时间源的时间轴）"""
+        self.clock.deadline = state['deadline']
+        self.clock.paused_at = state['paused_at']
+        self.clock.last_shown = self.clock.shown_seconds()
+        self.is_paused = state['paused']
+        self.is_stopped = state['stopped']
+        self.update(self.clock.shown_seconds())
+
+    def stage_instants(self):
+        """各阶段开始的时刻（相对开始的已运行秒数），用于校验切换是否准时"""
+        total = self.original_total_seconds
+        instants = {'normal': 0}
+        for threshold, stage in self.stage_transitions:
+            instants[stage] = max(0, total - threshold)
+        return instants
+
+    def update(self, shown):
+        """按显示秒数更新状态与阶段；显示值单调递减时阶段指针均摊O(1)"""
+        if shown > self.total_seconds:
+            # 时间回退（重置/加时），阶段指针从头定位
+            self.stage_index = 0
+        transitions = self.stage_transitions
+        while self.stage_index < len(transitions) and shown <= transitions[self.stage_index][0]:
+            self.stage_index += 1
+        self.stage = transitions[self.stage_index - 1][1] if self.stage_index else 'normal'
+        if shown >= 0:
+            self.total_seconds = shown
+            self.negative_seconds = 0
+        else:
+            # 超时后处理
+            self.total_seconds = -1
+            self.negative_seconds = -shown
+
+    def tick(self):
+        """唤醒时调用：从截止时刻推算显示秒数并更新状态，返回显示秒数"""
+        shown = self.clock.tick()
+        self.update(shown)
+        return shown
+
+    def display_text(self):
+        """当前应显示的文字：MM:SS（满一小时为 HH:MM:SS）、负计时 -MM:SS 或自定义超时文字"""
+        if self.total_seconds >= 0:
+            return format_time(self.total_seconds)
+        if self.timeout_mode == 'negative':
+            return f"-{format_time(self.negative_seconds)}"
+        return self.timeout_text
+
+    def next_wakeup_ms(self):
+        """距下一次显示变化的毫秒数"""
+        return self.clock.next_wakeup_ms()
+
+    def stats(self):
+        """倒计时引擎统计信息"""
+        return self.clock.stats()
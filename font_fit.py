@@ -0,0 +1,181 @@
+"""
+countDowner 字号自适应：按窗口大小选出能放下当前文字的最大字号
+文字宽度与行高按 (字体族, 字号, 粗细, 文字形状) 缓存，文字形状把数字统一为最宽的数字，
+MM:SS 的每一秒共用同一次测量；每个 (形状, 窗口尺寸) 的适配结果也缓存，
+窗口缩放与每秒刷新只需查表，不再反复调用Tk测量
+    python font_fit.py --bench   # 模拟拖拽缩放窗口，统计Tk测量次数与缓存命中率（需要显示器或Xvfb）
+"""
+DIGITS = "0123456789"
+MIN_SIZE = 8  # 适配字号下限（磅）
+MAX_SIZE = 400  # 适配字号上限（磅）
+PADDING = 8  # 文字与窗口边缘的留白（像素）
+REFERENCE_SIZE = 100  # 比较数字宽度时使用的字号
+FIT_CACHE_LIMIT = 4096  # 适配结果缓存条数上限，超过时清空（拖拽缩放会产生大量不同尺寸）
+
+
+class TextMetrics:
+    """
+    字体测量缓存：以字体描述 (族, 字号, 粗细) 直接调用Tk的 font measure / font metrics，
+    不为每个字号创建命名字体；同一参数只测量一次
+    """
+    def __init__(self, tk_app):
+        self.tk = tk_app  # Tcl解释器（root.tk）
+        self.widths = {}  # (族, 字号, 粗细, 文字) -> 像素宽度
+        self.linespaces = {}  # (族, 字号, 粗细) -> 行高
+        self.widest_digits = {}  # (族, 粗细) -> 最宽的数字
+        self.hits = 0
+        self.misses = 0  # 即实际的Tk测量调用次数
+
+    def width(self, family, size, weight, text):
+        key = (family, size, weight, text)
+        width = self.widths.get(key)
+        if width is None:
+            self.misses += 1
+            width = self.widths[key] = int(self.tk.call('font', 'measure', (family, size, weight), text))
+        else:
+            self.hits += 1
+        return width
+
+    def linespace(self, family, size, weight):
+        key = (family, size, weight)
+        linespace = self.linespaces.get(key)
+        if linespace is None:
+            self.misses += 1
+            linespace = self.linespaces[key] = int(
+                self.tk.call('font', 'metrics', (family, size, weight), '-linespace'))
+        else:
+            self.hits += 1
+        return linespace
+
+    def shape(self, family, weight, text):
+        """文字形状：数字替换为该字体最宽的数字，保证倒计时中字号不随数字跳动"""
+        widest = self.widest_digits.get((family, weight))
+        if widest is None:
+            widest = self.widest_digits[(family, weight)] = max(
+                DIGITS, key=lambda digit: self.width(family, REFERENCE_SIZE, weight, digit))
+        return "".join(widest if char in DIGITS else char for char in text)
+
+
+class FontFitter:
+    """
+    字号适配：窗口尺寸来自 <Configure> 事件（不查询窗口），二分查找能放下文字形状的最大字号，
+    结果按 (族, 粗细, 形状, 宽, 高) 缓存，字号不变时不调用 configure
+    """
+    def __init__(self, root, metrics=None, padding=PADDING, minimum=MIN_SIZE, maximum=MAX_SIZE):
+        self.metrics = metrics or TextMetrics(root.tk)
+        self.padding = padding
+        self.minimum = minimum
+        self.maximum = maximum
+        self.width = None  # 最近一次 <Configure> 的窗口尺寸
+        self.height = None
+        self.fits = {}  # (族, 粗细, 形状, 宽, 高) -> 字号
+        self.fonts = {}  # 字体名 -> (族, 粗细)
+        self.applied = {}  # 字体名 -> 已设置的字号
+        self.fit_hits = 0
+        self.fit_misses = 0
+        self.configure_calls = 0
+
+    def resize(self, width, height):
+        """记录窗口尺寸，尺寸有变化时返回True"""
+        if (width, height) == (self.width, self.height):
+            return False
+        self.width, self.height = width, height
+        return True
+
+    def best_size(self, family, weight, text):
+        """当前窗口尺寸下能放下 text 的最大字号"""
+        metrics = self.metrics
+        shape = metrics.shape(family, weight, text)
+        key = (family, weight, shape, self.width, self.height)
+        size = self.fits.get(key)
+        if size is not None:
+            self.fit_hits += 1
+            return size
+        self.fit_misses += 1
+        available_width = self.width - 2 * self.padding
+        available_height = self.height - 2 * self.padding
+        low, high = self.minimum, self.maximum
+        while low < high:
+            middle = (low + high + 1) // 2
+            if (metrics.width(family, middle, weight, shape) <= available_width
+                    and metrics.linespace(family, middle, weight) <= available_height):
+                low = middle
+            else:
+                high = middle - 1
+        if len(self.fits) >= FIT_CACHE_LIMIT:
+            self.fits.clear()
+        self.fits[key] = low
+        return low
+
+    def fit(self, tk_font, text):
+        """把字体调整为能放下 text 的最大字号（字号不变时不调用Tk），尚未收到窗口尺寸时不调整"""
+        if self.width is None:
+            return None
+        name = str(tk_font)
+        info = self.fonts.get(name)
+        if info is None:
+            info = self.fonts[name] = (tk_font.cget('family'), tk_font.cget('weight'))
+        size = self.best_size(info[0], info[1], text)
+        if self.applied.get(name) != size:
+            tk_font.configure(size=size)
+            self.applied[name] = size
+            self.configure_calls += 1
+        return size
+
+    def invalidate(self):
+        """字体被外部改回固定字号后调用，下次适配时重新设置"""
+        self.applied.clear()
+
+    def stats(self):
+        """统计信息：测量与适配结果的缓存命中率、Tk测量调用数与字号设置次数"""
+        measured = self.metrics.hits + self.metrics.misses
+        fitted = self.fit_hits + self.fit_misses
+        return {
+            'tk_measure_calls': self.metrics.misses,
+            'metrics_hit_rate': self.metrics.hits / measured if measured else 0.0,
+            'fit_hit_rate': self.fit_hits / fitted if fitted else 0.0,
+            'configure_calls': self.configure_calls,
+        }
+
+
+def benchmark(events=2000):
+    """
+    模拟拖拽缩放：窗口宽度来回变化，每个尺寸适配 MM:SS / -MM:SS 两种文字并模拟每秒刷新，
+    与不使用缓存时每次二分查找所需的Tk测量次数对比
+    """
+    import time
+    import tkinter as tk
+    from tkinter import font
+    root = tk.Tk()
+    root.withdraw()
+    try:
+        tk_font = font.Font(root, family="SimHei", size=60, weight="bold")
+        fitter = FontFitter(root)
+        begin = time.perf_counter()
+        for index in range(events):
+            width = 200 + (index * 7) % 600
+            fitter.resize(width, width // 3)
+            for seconds in range(5):
+                fitter.fit(tk_font, f"0{seconds}:5{seconds}")
+            fitter.fit(tk_font, "-00:01")
+        elapsed = time.perf_counter() - begin
+        result = fitter.stats()
+        # 不缓存时：每次适配二分查找约 log2(字号范围) 步，每步测量宽度与行高
+        fits = events * 6
+        result['uncached_measure_calls'] = fits * 2 * (MAX_SIZE - MIN_SIZE).bit_length()
+        result['fit_us'] = elapsed / fits * 1e6
+        return result
+    finally:
+        root.destroy()
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="countDowner 字号自适应基准测试")
+    parser.add_argument('--bench', action='store_true')
+    parser.add_argument('--events', type=int, default=2000, help="模拟的窗口尺寸变化次数")
+    args = parser.parse_args()
+    if args.bench:
+        print(f"字号自适应：{benchmark(args.events)}")
+    else:
+        parser.print_help()
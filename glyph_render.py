@@ -0,0 +1,436 @@
+"""
+countDowner 字形缓存合成渲染（需要 Pillow）
+数字、冒号、负号按 字体/字号/颜色/透明度 预先栅格化一次，放入有上限的LRU缓存；
+每秒只重新合成内容变化的字符格子，文字透明度与背景透明度相互独立
+显示方式：
+    Windows：分层窗口（UpdateLayeredWindow）逐像素透明，数字与背景各自的透明度都生效
+    其它平台：Tk无法逐像素透明，背景透明度作用于整个窗口，文字透明度相对背景色混合
+    python glyph_render.py --bench
+"""
+import collections
+import sys
+import time
+
+try:
+    from PIL import Image, ImageChops, ImageDraw, ImageFont
+except ImportError:  # Pillow为可选依赖，缺失时回退到普通标签渲染
+    Image = None
+
+GLYPH_CHARS = "0123456789:-"  # 预栅格化的字符
+DIGITS = "0123456789"
+# Tk字体族 -> 字体文件（Pillow在Windows下会自动到系统字体目录查找）
+FONT_FILES = {'SimHei': 'simhei.ttf'}
+FALLBACK_FONT_FILES = ('simhei.ttf', 'arialbd.ttf', 'DejaVuSans-Bold.ttf', 'Arial Bold.ttf')
+
+
+def is_available():
+    """Pillow是否可用"""
+    return Image is not None
+
+
+def hex_to_rgb(color):
+    """#rrggbb -> (r, g, b)"""
+    color = color.lstrip('#')
+    if len(color) == 3:
+        color = ''.join(c * 2 for c in color)
+    return tuple(int(color[i:i + 2], 16) for i in (0, 2, 4))
+
+
+def load_font(family, pixel_size):
+    """按Tk字体族加载Pillow字体，找不到时依次尝试后备字体"""
+    candidates = ((FONT_FILES[family],) if family in FONT_FILES else ()) + FALLBACK_FONT_FILES
+    for path in candidates:
+        try:
+            return ImageFont.truetype(path, pixel_size)
+        except OSError:
+            continue
+    return ImageFont.load_default()
+
+
+class GlyphCache:
+    """有上限的字形LRU缓存：键为 (字体族, 像素字号, 文字, 颜色, 文字透明度)"""
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries  # 最大缓存条目数
+        self.entries = collections.OrderedDict()  # 键 -> RGBA字形图像
+        self.fonts = {}  # (字体族, 像素字号) -> Pillow字体
+        self.digit_widths = {}  # (字体族, 像素字号) -> 最宽数字的宽度
+        self.bytes = 0  # 缓存占用的像素字节数
+        self.hits = 0
+        self.misses = 0
+
+    def font(self, family, pixel_size):
+        key = (family, pixel_size)
+        if key not in self.fonts:
+            self.fonts[key] = load_font(family, pixel_size)
+        return self.fonts[key]
+
+    def cell_height(self, family, pixel_size):
+        """字符格子高度（上行高度+下行高度），同字号的所有字形等高便于对齐"""
+        ascent, descent = self.font(family, pixel_size).getmetrics()
+        return ascent + descent
+
+    def digit_width(self, family, pixel_size):
+        """数字格子宽度：取最宽的数字，数字宽度不等的字体下每个数字都放得下"""
+        key = (family, pixel_size)
+        width = self.digit_widths.get(key)
+        if width is None:
+            font = self.font(family, pixel_size)
+            width = self.digit_widths[key] = max(max(1, round(font.getlength(digit))) for digit in DIGITS)
+        return width
+
+    def get(self, family, pixel_size, text, fg, fg_alpha):
+        """取字形，未命中时栅格化：覆盖率蒙版 × 文字透明度 作为alpha通道"""
+        key = (family, pixel_size, text, fg, fg_alpha)
+        glyph = self.entries.get(key)
+        if glyph is not None:
+            self.hits += 1
+            self.entries.move_to_end(key)
+            return glyph
+        self.misses += 1
+        font = self.font(family, pixel_size)
+        width = max(1, round(font.getlength(text)))
+        height = self.cell_height(family, pixel_size)
+        mask = Image.new('L', (width, height), 0)
+        ImageDraw.Draw(mask).text((0, 0), text, font=font, fill=255)
+        if fg_alpha < 1:
+            mask = mask.point(lambda value: round(value * fg_alpha))
+        glyph = Image.new('RGBA', (width, height), hex_to_rgb(fg) + (0,))
+        glyph.putalpha(mask)
+        self.entries[key] = glyph
+        self.bytes += width * height * 4
+        while len(self.entries) > self.max_entries:
+            _, evicted = self.entries.popitem(last=False)
+            self.bytes -= evicted.width * evicted.height * 4
+        return glyph
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'entries': len(self.entries),
+            'bytes': self.bytes,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+        }
+
+
+class FrameCompositor:
+    """
+    逐格合成：文字按字符切成格子，相同布局下只重绘内容变化的格子
+    数字/冒号/负号各自一格；自定义超时文字（含其它字符）整体作为一格，渲染一次后缓存
+    """
+    def __init__(self, cache=None, min_size=(300, 100)):
+        self.cache = cache or GlyphCache()
+        self.min_size = min_size  # 画面最小尺寸（与倒计时窗口默认尺寸一致）
+        self.frame = None  # 当前RGBA画面
+        self._key = None  # 当前画面的 (字体族, 像素字号, 颜色, 透明度, 布局)
+        self._cells = []  # [(字符, 左上角x, 宽度)]
+        self._origin_y = 0
+        self._cell_height = 0
+        self.frames = 0
+        self.cells_drawn = 0  # 累计重绘的格子数
+        self.total_seconds = 0.0  # 累计合成耗时
+        self.max_seconds = 0.0  # 单帧最大合成耗时
+
+    def _split(self, text):
+        """拆分为格子：全部为预栅格化字符时逐字拆分，否则整体一格"""
+        if all(char in GLYPH_CHARS for char in text):
+            return list(text)
+        return [text]
+
+    def _layout(self, family, pixel_size, parts, fg, fg_alpha):
+        """计算格子位置与画面尺寸，文字整体居中；数字格子一律按最宽数字，字形在格内居中"""
+        digit_width = self.cache.digit_width(family, pixel_size)
+        widths = [digit_width if part in DIGITS else self.cache.get(family, pixel_size, part, fg, fg_alpha).width
+                  for part in parts]
+        height = self.cache.cell_height(family, pixel_size)
+        frame_w = max(self.min_size[0], sum(widths))
+        frame_h = max(self.min_size[1], height)
+        x = (frame_w - sum(widths)) // 2
+        cells = []
+        for part, width in zip(parts, widths):
+            cells.append((part, x, width))
+            x += width
+        return (frame_w, frame_h), cells, (frame_h - height) // 2
+
+    def render(self, text, family, pixel_size, fg, fg_alpha, bg, bg_alpha):
+        """合成一帧，返回本帧变化的矩形列表 [(x0, y0, x1, y1)]，整帧重绘时为画面全区域"""
+        begin = time.perf_counter()
+        parts = self._split(text)
+        # 布局由字符宽度模式决定（如 MM:SS 与 -MM:SS 不同），布局不变时才能逐格比较
+        shape = tuple(part if part not in DIGITS else '0' for part in parts)
+        key = (family, pixel_size, fg, fg_alpha, bg, bg_alpha, shape)
+        bg_pixel = hex_to_rgb(bg) + (round(bg_alpha * 255),)
+        if key != self._key:
+            size, cells, self._origin_y = self._layout(family, pixel_size, parts, fg, fg_alpha)
+            self._cell_height = self.cache.cell_height(family, pixel_size)
+            self.frame = Image.new('RGBA', size, bg_pixel)
+            self._cells = [(None, x, width) for _, x, width in cells]
+            self._key = key
+            full = True
+        else:
+            full = False
+        dirty = []
+        for index, part in enumerate(parts):
+            old, x, width = self._cells[index]
+            if old == part:
+                continue
+            glyph = self.cache.get(family, pixel_size, part, fg, fg_alpha)
+            box = (x, self._origin_y, x + width, self._origin_y + self._cell_height)
+            if old is not None:
+                self.frame.paste(bg_pixel, box)  # 先用背景清空整个格子
+            self.frame.alpha_composite(glyph, (x + (width - glyph.width) // 2, self._origin_y))
+            self._cells[index] = (part, x, width)
+            dirty.append(box)
+        elapsed = time.perf_counter() - begin
+        self.frames += 1
+        self.cells_drawn += len(dirty)
+        self.total_seconds += elapsed
+        self.max_seconds = max(self.max_seconds, elapsed)
+        if full:
+            return [(0, 0) + self.frame.size]
+        return dirty
+
+    def stats(self):
+        result = {
+            'frames': self.frames,
+            'cells_per_frame': self.cells_drawn / self.frames if self.frames else 0.0,
+            'composite_avg_ms': self.total_seconds / self.frames * 1000 if self.frames else 0.0,
+            'composite_max_ms': self.max_seconds * 1000,
+        }
+        result.update({f"cache_{key}": value for key, value in self.cache.stats().items()})
+        return result
+
+
+class LayeredWindowPresenter:
+    """
+    Windows分层窗口：把预乘alpha的BGRA画面交给 UpdateLayeredWindow，实现逐像素透明
+    调用失败时抛出OSError，GlyphRenderer 据此调用 close() 恢复窗口样式并改用 PhotoPresenter
+    """
+    def __init__(self, root):
+        import ctypes
+        from ctypes import wintypes
+        self.ctypes = ctypes
+        # 独立的DLL对象：声明参数与返回类型（句柄在64位系统上不能按int截断），不影响 ctypes.windll 的全局原型
+        user32 = ctypes.WinDLL('user32', use_last_error=True)
+        gdi32 = ctypes.WinDLL('gdi32', use_last_error=True)
+        user32.GetParent.argtypes = [wintypes.HWND]
+        user32.GetParent.restype = wintypes.HWND
+        user32.GetWindowLongW.argtypes = [wintypes.HWND, ctypes.c_int]
+        user32.GetWindowLongW.restype = wintypes.LONG
+        user32.SetWindowLongW.argtypes = [wintypes.HWND, ctypes.c_int, wintypes.LONG]
+        user32.SetWindowLongW.restype = wintypes.LONG
+        user32.GetDC.argtypes = [wintypes.HWND]
+        user32.GetDC.restype = wintypes.HDC
+        user32.ReleaseDC.argtypes = [wintypes.HWND, wintypes.HDC]
+        user32.UpdateLayeredWindow.argtypes = [wintypes.HWND, wintypes.HDC, ctypes.c_void_p, ctypes.c_void_p,
+                                               wintypes.HDC, ctypes.c_void_p, wintypes.DWORD, ctypes.c_void_p,
+                                               wintypes.DWORD]
+        user32.UpdateLayeredWindow.restype = wintypes.BOOL
+        gdi32.CreateCompatibleDC.argtypes = [wintypes.HDC]
+        gdi32.CreateCompatibleDC.restype = wintypes.HDC
+        gdi32.CreateDIBSection.argtypes = [wintypes.HDC, ctypes.c_void_p, wintypes.UINT, ctypes.c_void_p,
+                                           wintypes.HANDLE, wintypes.DWORD]
+        gdi32.CreateDIBSection.restype = wintypes.HBITMAP
+        gdi32.SelectObject.argtypes = [wintypes.HDC, wintypes.HGDIOBJ]
+        gdi32.SelectObject.restype = wintypes.HGDIOBJ
+        gdi32.DeleteObject.argtypes = [wintypes.HGDIOBJ]
+        gdi32.DeleteDC.argtypes = [wintypes.HDC]
+        self.user32 = user32
+        self.gdi32 = gdi32
+        self.root = root
+        root.update_idletasks()
+        self.hwnd = user32.GetParent(root.winfo_id()) or root.winfo_id()
+        self.GWL_EXSTYLE, WS_EX_LAYERED = -20, 0x80000
+        self.style = user32.GetWindowLongW(self.hwnd, self.GWL_EXSTYLE)  # 原样式，close() 时恢复
+        user32.SetWindowLongW(self.hwnd, self.GWL_EXSTYLE, self.style | WS_EX_LAYERED)
+
+        class BLENDFUNCTION(ctypes.Structure):
+            _fields_ = [('BlendOp', ctypes.c_ubyte), ('BlendFlags', ctypes.c_ubyte),
+                        ('SourceConstantAlpha', ctypes.c_ubyte), ('AlphaFormat', ctypes.c_ubyte)]
+
+        class BITMAPINFOHEADER(ctypes.Structure):
+            _fields_ = [('biSize', wintypes.DWORD), ('biWidth', wintypes.LONG), ('biHeight', wintypes.LONG),
+                        ('biPlanes', wintypes.WORD), ('biBitCount', wintypes.WORD),
+                        ('biCompression', wintypes.DWORD), ('biSizeImage', wintypes.DWORD),
+                        ('biXPelsPerMeter', wintypes.LONG), ('biYPelsPerMeter', wintypes.LONG),
+                        ('biClrUsed', wintypes.DWORD), ('biClrImportant', wintypes.DWORD)]
+
+        class SIZE(ctypes.Structure):
+            _fields_ = [('cx', ctypes.c_long), ('cy', ctypes.c_long)]
+
+        class POINT(ctypes.Structure):
+            _fields_ = [('x', ctypes.c_long), ('y', ctypes.c_long)]
+
+        self.BITMAPINFOHEADER = BITMAPINFOHEADER
+        self.SIZE = SIZE
+        self.origin = POINT(0, 0)
+        self.blend = BLENDFUNCTION(0, 0, 255, 1)  # AC_SRC_OVER，使用逐像素alpha（AC_SRC_ALPHA）
+        self.screen_dc = user32.GetDC(None)
+        self.mem_dc = gdi32.CreateCompatibleDC(self.screen_dc)
+        self.bitmap = None
+        self.bits = None  # DIB像素内存
+        self.size = None
+        if not self.screen_dc or not self.mem_dc:
+            self.close()
+            raise OSError("无法创建分层窗口的绘图设备")
+
+    def _ensure_surface(self, size):
+        """画面尺寸变化时重建DIB（自上而下，32位BGRA）"""
+        if size == self.size:
+            return
+        ctypes = self.ctypes
+        header = self.BITMAPINFOHEADER()
+        header.biSize = ctypes.sizeof(self.BITMAPINFOHEADER)
+        header.biWidth, header.biHeight = size[0], -size[1]
+        header.biPlanes, header.biBitCount = 1, 32
+        bits = ctypes.c_void_p()
+        bitmap = self.gdi32.CreateDIBSection(self.mem_dc, ctypes.byref(header), 0, ctypes.byref(bits), None, 0)
+        if not bitmap or not bits.value:
+            raise ctypes.WinError(ctypes.get_last_error())
+        old = self.gdi32.SelectObject(self.mem_dc, bitmap)
+        if self.bitmap:
+            self.gdi32.DeleteObject(old)
+        self.bitmap, self.bits, self.size = bitmap, bits.value, size
+
+    def present(self, frame, dirty):
+        """只把变化区域的像素写入DIB，再整体提交给窗口管理器合成"""
+        ctypes = self.ctypes
+        self._ensure_surface(frame.size)
+        stride = frame.size[0] * 4
+        for x0, y0, x1, y1 in dirty:
+            region = frame.crop((x0, y0, x1, y1))
+            r, g, b, a = region.split()
+            # UpdateLayeredWindow 要求预乘alpha，且像素顺序为BGRA
+            data = Image.merge('RGBA', (ImageChops.multiply(b, a), ImageChops.multiply(g, a),
+                                        ImageChops.multiply(r, a), a)).tobytes()
+            row = (x1 - x0) * 4
+            for y in range(y1 - y0):
+                ctypes.memmove(self.bits + (y0 + y) * stride + x0 * 4, data[y * row:(y + 1) * row], row)
+        size = self.SIZE(*frame.size)
+        if not self.user32.UpdateLayeredWindow(self.hwnd, self.screen_dc, None, ctypes.byref(size), self.mem_dc,
+                                               ctypes.byref(self.origin), 0, ctypes.byref(self.blend),
+                                               2):  # ULW_ALPHA
+            raise ctypes.WinError(ctypes.get_last_error())
+        return 1
+
+    def set_window_alpha(self, alpha):
+        """逐像素透明已包含背景透明度，不再设置整窗透明度"""
+        return 0
+
+    def close(self):
+        """释放绘图资源并恢复窗口原样式（去掉分层样式后Tk重新负责绘制窗口内容）"""
+        if self.bitmap:
+            self.gdi32.DeleteObject(self.bitmap)
+            self.bitmap = None
+        if self.mem_dc:
+            self.gdi32.DeleteDC(self.mem_dc)
+            self.mem_dc = None
+        if self.screen_dc:
+            self.user32.ReleaseDC(None, self.screen_dc)
+            self.screen_dc = None
+        self.user32.SetWindowLongW(self.hwnd, self.GWL_EXSTYLE, self.style)
+
+
+class PhotoPresenter:
+    """非Windows平台：画面先与不透明背景色混合后显示在标签上，背景透明度作用于整个窗口"""
+    def __init__(self, root, label):
+        from PIL import ImageTk
+        self.ImageTk = ImageTk
+        self.root = root
+        self.label = label
+        self.photo = None
+        self.alpha = None
+
+    def present(self, frame, dirty):
+        # 叠加到不透明背景色上：结果等于文字按文字透明度与背景色混合
+        opaque = Image.new('RGBA', frame.size, frame.getpixel((0, 0))[:3] + (255,))
+        opaque.alpha_composite(frame)
+        if self.photo is None or self.photo.width() != frame.size[0] or self.photo.height() != frame.size[1]:
+            self.photo = self.ImageTk.PhotoImage(opaque)
+            self.label.config(image=self.photo)
+        else:
+            self.photo.paste(opaque)
+        return 1
+
+    def set_window_alpha(self, alpha):
+        if alpha == self.alpha:
+            return 0
+        self.root.attributes("-alpha", alpha)
+        self.alpha = alpha
+        return 1
+
+    def close(self):
+        pass
+
+
+class GlyphRenderer:
+    """
+    与 TkRenderCache 接口一致的渲染层：render(text, font, fg, bg, alpha, fg_alpha)
+    alpha 为背景透明度，fg_alpha 为文字透明度
+    """
+    def __init__(self, root, label, presenter=None, compositor=None):
+        self.root = root
+        self.label = label
+        if presenter is None and sys.platform == "win32":
+            try:
+                presenter = LayeredWindowPresenter(root)
+            except (OSError, AttributeError) as e:
+                print(f"分层窗口不可用，改为整窗透明：{e}")
+        self.presenter = presenter or PhotoPresenter(root, label)
+        self.compositor = compositor or FrameCompositor()
+        self.points_to_pixels = root.winfo_fpixels('1i') / 72  # Tk字号单位为磅
+        self.ticks = 0
+        self.tk_calls = 0
+        self.last_tick_calls = 0
+
+    def invalidate(self):
+        self.compositor._key = None
+
+    def render(self, text, font, fg, bg, alpha, fg_alpha=1.0):
+        actual = font.actual()
+        size = actual['size']
+        pixel_size = -size if size < 0 else round(size * self.points_to_pixels)
+        dirty = self.compositor.render(text, actual['family'], pixel_size, fg, fg_alpha, bg, alpha)
+        if dirty:
+            try:
+                calls = self.presenter.present(self.compositor.frame, dirty)
+            except OSError as e:  # 分层窗口提交失败：恢复窗口样式，改用整窗透明后重画整幅画面
+                print(f"分层窗口绘制失败，改为整窗透明：{e}")
+                self.presenter.close()
+                self.presenter = PhotoPresenter(self.root, self.label)
+                calls = self.presenter.present(self.compositor.frame, [(0, 0) + self.compositor.frame.size])
+        else:
+            calls = 0
+        calls += self.presenter.set_window_alpha(alpha)
+        self.ticks += 1
+        self.tk_calls += calls
+        self.last_tick_calls = calls
+        return calls
+
+    def stats(self):
+        result = {
+            'ticks': self.ticks,
+            'tk_calls': self.tk_calls,
+            'tk_calls_per_tick': self.tk_calls / self.ticks if self.ticks else 0.0,
+            'last_tick_calls': self.last_tick_calls,
+        }
+        result.update(self.compositor.stats())
+        return result
+
+
+def benchmark(seconds=3600, pixel_size=80, family='SimHei'):
+    """无界面合成一整段倒计时（60磅约等于80像素），统计单帧合成耗时与缓存内存"""
+    from countdown_core import format_time
+    compositor = FrameCompositor()
+    stages = (("#3399ff", 1.0, "#bdc3c7", 0.6), ("#EEEE00", 1.0, "#bdc3c7", 0.6), ("#ff0000", 0.8, "#EEEE00", 0.6))
+    for remaining in range(seconds, -60, -1):
+        style = stages[0] if remaining > 120 else stages[1] if remaining > 30 else stages[2]
+        text = format_time(remaining) if remaining >= 0 else f"-{format_time(-remaining)}"
+        compositor.render(text, family, pixel_size, style[0], style[1], style[2], style[3])
+    return compositor.stats()
+
+
+if __name__ == "__main__":
+    if not is_available():
+        print("需要安装 Pillow：pip install pillow")
+        sys.exit(1)
+    print(f"字形合成：{benchmark()}")
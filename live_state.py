@@ -0,0 +1,254 @@
+"""
+countDowner 实时状态共享：倒计时状态写入固定布局的内存映射记录，本机任何进程（直播叠加层、会议室中控）
+映射同一文件即可读取，每次读取无系统调用、无进程间往返；写入端用序号（seqlock）标记写入中，读取端据此发现并重试撕裂的读取
+    python live_state.py           # 持续打印当前状态（读取端示例）
+    python live_state.py --bench   # 另一进程持续写入时的一致读取速率
+记录布局（小端，共64字节，其它语言按此映射读取）：
+    0  char[4] magic "CDLS"      4  u16 版本      6  u16 记录字节数
+    8  u64 序号：写入前加1（奇数表示写入中），写完再加1；读取前后序号相同且为偶数，读到的即为一致的状态
+    16 f64 剩余秒数（浮点，超时后为负）   24 f64 截止时刻（time.monotonic，运行中可据此自行推算剩余时间）
+    32 i32 显示秒数（超时后为-1）         36 i32 超时秒数（负计时）
+    40 i32 议程项序号（-1为非议程模式）   44 u8 阶段（见 STAGES）  45 u8 标志（1暂停 2停止 4已关闭）  46 u16 保留
+    48 f64 发布时刻（time.monotonic）     56 u32 写入进程PID   60 u32 保留
+"""
+import mmap
+import os
+import struct
+import sys
+import time
+
+import profile_store
+
+LIVE_FILE = "live_state.bin"  # 配置目录下的共享状态文件
+MAGIC = b"CDLS"
+VERSION = 1
+HEADER = struct.Struct('<4sHH')
+SEQ = struct.Struct('<Q')
+SEQ_OFFSET = 8
+BODY = struct.Struct('<ddiiiBBHdII')  # 序号之后的状态字段
+BODY_OFFSET = 16
+FULL = struct.Struct('<QddiiiBBHdII')  # 序号+状态，读取端一次解包
+RECORD_SIZE = BODY_OFFSET + BODY.size  # 64
+STAGES = ('normal', 'remind', 'warning', 'timeout', 'behind')  # 阶段编号（behind 为幻灯片同步的落后进度）
+PAUSED = 1
+STOPPED = 2
+CLOSED = 4
+SPIN_RETRIES = 64  # 连续读到写入中时先自旋重试的次数，之后让出CPU（写入端可能被抢占，如单核机器）
+READ_TIMEOUT = 1.0  # 一直处于写入中（写入端在写入中途退出）的判定时间（秒）
+
+
+def default_path():
+    return os.path.join(profile_store.get_config_dir(), LIVE_FILE)
+
+
+class LiveStateWriter:
+    """写入端（倒计时进程）：每次发布只有三次内存拷贝（序号置奇、写状态、序号置偶），不调用系统接口"""
+    def __init__(self, path=None):
+        self.path = path or default_path()
+        self.map = None
+        self.seq = 0
+        self.pid = os.getpid()
+        self.publishes = 0
+        self.publish_seconds = 0.0
+
+    def open(self):
+        """创建（或复用）共享文件并映射，失败时抛出OSError"""
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            if os.fstat(fd).st_size != RECORD_SIZE:
+                os.ftruncate(fd, RECORD_SIZE)
+            self.map = mmap.mmap(fd, RECORD_SIZE)
+        finally:
+            os.close(fd)
+        # 沿用文件中的序号（读取端以序号变化判断更新），保持为偶数
+        self.seq = (SEQ.unpack_from(self.map, SEQ_OFFSET)[0] + 1) & ~1 if self.map[:4] == MAGIC else 0
+        HEADER.pack_into(self.map, 0, MAGIC, VERSION, RECORD_SIZE)
+        return self
+
+    def publish(self, remaining, deadline, shown, negative, segment, stage, flags):
+        """写入一次完整状态"""
+        begin = time.perf_counter()
+        seq = self.seq + 1
+        SEQ.pack_into(self.map, SEQ_OFFSET, seq)  # 奇数：写入中
+        BODY.pack_into(self.map, BODY_OFFSET, remaining, deadline, shown, negative, segment, stage, flags, 0,
+                       time.monotonic(), self.pid, 0)
+        self.seq = seq + 1
+        SEQ.pack_into(self.map, SEQ_OFFSET, self.seq)
+        self.publishes += 1
+        self.publish_seconds += time.perf_counter() - begin
+
+    def observe(self, app):
+        """状态/整秒刷新监听函数：发布倒计时窗口的当前状态"""
+        core = app.core
+        flags = (PAUSED if core.is_paused else 0) | (STOPPED if core.is_stopped else 0)
+        segment = app.segment_index if app.agenda and app.segment_index is not None else -1
+        remaining = core.clock.remaining()
+        # 截止时刻按本机 time.monotonic 换算：跟随授权端同步时 core.clock 使用的是授权端的时间轴
+        self.publish(remaining, time.monotonic() + remaining, core.total_seconds, core.negative_seconds,
+                     segment, STAGES.index(app.display_stage()), flags)
+
+    def close(self, core=None):
+        """窗口关闭：标记为已关闭（读取端据此停止显示）并解除映射"""
+        if self.map is None:
+            return
+        if core is not None:
+            remaining = core.clock.remaining()
+            self.publish(remaining, time.monotonic() + remaining, core.total_seconds, core.negative_seconds,
+                         -1, STAGES.index(core.stage), STOPPED | CLOSED)
+        self.map.close()
+        self.map = None
+
+    def stats(self):
+        return {'publishes': self.publishes,
+                'publish_us': self.publish_seconds / self.publishes * 1e6 if self.publishes else 0.0}
+
+
+class LiveStateReader:
+    """
+    读取端库：映射一次共享文件，之后每次读取只是两次内存解包（无系统调用）
+        reader = LiveStateReader()
+        state = reader.read()   # {'seq', 'remaining', 'stage', 'paused', ...}
+    """
+    def __init__(self, path=None):
+        self.path = path or default_path()
+        with open(self.path, "rb") as f:
+            self.map = mmap.mmap(f.fileno(), RECORD_SIZE, access=mmap.ACCESS_READ)
+        magic, version, size = HEADER.unpack_from(self.map, 0)
+        if magic != MAGIC or version != VERSION or size != RECORD_SIZE:
+            self.map.close()
+            raise ValueError(f"不是countDowner实时状态文件或版本不符：{self.path}")
+        self.seqs = memoryview(self.map).cast('Q')  # 按8字节整数索引映射，seqs[1] 即序号（比再解包一次快）
+        self.retries = 0  # 因写入中或读取期间被改写而重试的次数
+
+    def read_raw(self):
+        """
+        一致地读取一次：返回 (序号, 剩余秒数, 截止时刻, 显示秒数, 超时秒数, 议程项, 阶段, 标志, 保留, 发布时刻, PID, 保留)
+        写入端持续写入时重试；超过 READ_TIMEOUT 仍在写入中（写入端在写入中途退出）抛出RuntimeError
+        """
+        data, seqs = self.map, self.seqs
+        attempts = 0
+        while True:
+            values = FULL.unpack_from(data, SEQ_OFFSET)
+            if not values[0] & 1 and seqs[SEQ_OFFSET // 8] == values[0]:
+                return values
+            self.retries += 1
+            attempts += 1
+            if attempts == SPIN_RETRIES:
+                give_up = time.monotonic() + READ_TIMEOUT
+            elif attempts > SPIN_RETRIES:
+                if time.monotonic() > give_up:
+                    raise RuntimeError("实时状态一直处于写入中")
+                time.sleep(0)
+
+    def read(self):
+        """读取为字典；运行中的 live_remaining 按截止时刻推算到当前时刻（发布之间也连续变化）"""
+        seq, remaining, deadline, shown, negative, segment, stage, flags, _, published, pid, _ = self.read_raw()
+        frozen = flags & (PAUSED | STOPPED)
+        return {
+            'seq': seq,
+            'remaining': remaining,
+            'live_remaining': remaining if frozen else deadline - time.monotonic(),
+            'shown_seconds': shown,
+            'negative_seconds': negative,
+            'segment': segment if segment >= 0 else None,
+            'stage': STAGES[stage] if stage < len(STAGES) else None,
+            'paused': bool(flags & PAUSED),
+            'stopped': bool(flags & STOPPED),
+            'closed': bool(flags & CLOSED),
+            'published_at': published,
+            'pid': pid,
+        }
+
+    def close(self):
+        self.seqs.release()
+        self.map.close()
+
+
+def _stress_writer(path, seconds):
+    """基准测试写入进程：不停发布，各字段都由同一个计数推导，读取端可校验一致性"""
+    writer = LiveStateWriter(path).open()
+    end = time.monotonic() + seconds
+    count = 0
+    while time.monotonic() < end:
+        count += 1
+        writer.publish(count * 0.5, count * 0.25, count, count * 3, count % 1000, count % len(STAGES), count % 4)
+    print(count, writer.stats()['publish_us'])
+
+
+def benchmark(seconds=3.0):
+    """
+    另一进程不间断写入（远高于倒计时每秒一次的发布频率）时，统计读取端的一致读取速率、重试次数，
+    并校验每次读到的各字段属于同一次写入
+    """
+    import subprocess
+    import tempfile
+    directory = tempfile.mkdtemp(prefix="countdowner-live-")
+    path = os.path.join(directory, LIVE_FILE)
+    LiveStateWriter(path).open().map.close()
+    writer = subprocess.Popen([sys.executable, __file__, '--writer-only', path, '--seconds', str(seconds + 1)],
+                              stdout=subprocess.PIPE, text=True)
+    try:
+        reader = LiveStateReader(path)
+        time.sleep(0.3)  # 等待写入进程启动
+        reads = inconsistent = 0
+        read_raw = reader.read_raw
+        end = time.perf_counter() + seconds
+        begin = time.perf_counter()
+        cpu_begin = time.process_time()
+        while True:
+            for _ in range(1000):
+                values = read_raw()
+                count = values[3]
+                if count and (values[1] != count * 0.5 or values[4] != count * 3 or values[7] != count % 4):
+                    inconsistent += 1
+            reads += 1000
+            now = time.perf_counter()
+            if now >= end:
+                break
+        elapsed = now - begin
+        cpu = time.process_time() - cpu_begin
+        reader.close()
+        publishes, publish_us = writer.communicate()[0].split()
+    finally:
+        if writer.poll() is None:
+            writer.kill()
+        for entry in os.listdir(directory):
+            os.remove(os.path.join(directory, entry))
+        os.rmdir(directory)
+    return {
+        'reads_per_second': round(reads / elapsed),
+        'reads_per_cpu_second': round(reads / cpu),  # 与写入进程共用CPU时按读取端实际占用的CPU计
+        'read_ns': cpu / reads * 1e9,
+        'retries': reader.retries,
+        'inconsistent': inconsistent,
+        'writer_publishes': int(publishes),
+        'publish_us': float(publish_us),
+    }
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="countDowner 实时状态共享")
+    parser.add_argument('--path', help="共享状态文件（默认在配置目录下）")
+    parser.add_argument('--bench', action='store_true')
+    parser.add_argument('--seconds', type=float, default=3.0)
+    parser.add_argument('--writer-only', metavar='PATH', help=argparse.SUPPRESS)
+    parser.add_argument('--interval', type=float, default=0.5, help="打印状态的间隔（秒）")
+    args = parser.parse_args()
+    if args.writer_only:
+        _stress_writer(args.writer_only, args.seconds)
+    elif args.bench:
+        print(f"实时状态共享：{benchmark(args.seconds)}")
+    else:
+        try:
+            reader = LiveStateReader(args.path)
+        except (OSError, ValueError) as e:
+            print(f"无法读取实时状态（倒计时未以 --live-state 启动？）：{e}")
+            sys.exit(1)
+        try:
+            while True:
+                print(reader.read())
+                time.sleep(args.interval)
+        except KeyboardInterrupt:
+            pass
@@ -0,0 +1,116 @@
+"""
+countDowner 配置档案缓存：把设置结果保存为磁盘上的小JSON文件
+快速启动时直接读取上次使用的或指定名称的档案，跳过参数设置窗口
+"""
+import json
+import os
+import sys
+
+import settings_schema
+
+# 默认设置（与 _get_settings_result 的返回格式一致，透明度为0-1），由设置项声明生成
+DEFAULT_SETTINGS = settings_schema.defaults()
+
+PROFILE_FILE = "profiles.json"  # 档案缓存文件名
+
+
+def get_config_dir():
+    """配置目录：可用环境变量 COUNTDOWNER_CONFIG_DIR 覆盖，否则按系统惯例选择"""
+    override = os.environ.get('COUNTDOWNER_CONFIG_DIR')
+    if override:
+        return override
+    if sys.platform == "win32":
+        base = os.environ.get('APPDATA') or os.path.expanduser("~")
+    else:
+        base = os.environ.get('XDG_CONFIG_HOME') or os.path.join(os.path.expanduser("~"), ".config")
+    return os.path.join(base, "countDowner")
+
+
+def _profile_path():
+    return os.path.join(get_config_dir(), PROFILE_FILE)
+
+
+def _read_store():
+    """读取档案缓存，文件不存在或损坏时返回空结构"""
+    try:
+        with open(_profile_path(), encoding="utf-8") as f:
+            store = json.load(f)
+    except (OSError, ValueError):
+        return {'last': None, 'profiles': {}, 'positions': {}}
+    if not isinstance(store, dict):
+        return {'last': None, 'profiles': {}, 'positions': {}}
+    store.setdefault('last', None)
+    store.setdefault('profiles', {})
+    store.setdefault('positions', {})
+    return store
+
+
+def _write_store(store):
+    """原子写入：先写临时文件再替换，避免中途退出留下半个文件"""
+    path = _profile_path()
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(store, f, ensure_ascii=False, indent=1)
+    os.replace(tmp_path, path)
+
+
+def complete_settings(profile):
+    """按设置项声明校验档案：补全缺失字段、修正越界或无效值、忽略未知字段；档案格式不对时返回None"""
+    if not isinstance(profile, dict):
+        return None
+    settings, notes = settings_schema.validate(profile)
+    for note in notes:
+        print(f"档案已修正：{note}")
+    return settings
+
+
+def with_duration(settings, minutes):
+    """返回指定总时长的设置副本，并按设置项依赖规则修正提醒/警告时间"""
+    settings = dict(settings, total=max(1, int(minutes)))
+    return settings_schema.validate(settings, changed=('total',))[0]
+
+
+def load_profile(name=None):
+    """读取指定名称的档案，name为None时读取上次使用的设置；不存在时返回None"""
+    store = _read_store()
+    profile = store['last'] if name is None else store['profiles'].get(name)
+    if profile is None:
+        return None
+    return complete_settings(profile)
+
+
+def save_profile(settings, name=None):
+    """保存为上次使用的设置，指定name时同时保存为命名档案"""
+    store = _read_store()
+    store['last'] = settings
+    if name:
+        store['profiles'][name] = settings
+    try:
+        _write_store(store)
+    except OSError as e:
+        # 配置目录不可写时仅打印日志，不影响倒计时
+        print(f"保存配置档案失败：{str(e)}")
+
+
+def list_profiles():
+    """已保存的命名档案列表"""
+    return sorted(_read_store()['profiles'])
+
+
+def load_position(layout):
+    """读取该显示器布局下记住的窗口位置 (x, y)，没有时返回None"""
+    position = _read_store()['positions'].get(layout)
+    if not (isinstance(position, list) and len(position) == 2):
+        return None
+    return int(position[0]), int(position[1])
+
+
+def save_position(layout, x, y):
+    """按显示器布局记住窗口位置"""
+    store = _read_store()
+    store['positions'][layout] = [x, y]
+    try:
+        _write_store(store)
+    except OSError as e:
+        print(f"保存窗口位置失败：{str(e)}")
@@ -0,0 +1,367 @@
+"""
+countDowner 远程控制：基于asyncio的本机控制服务（TCP或Unix套接字，JSON-lines）
+一行一个命令对象，或一行一个命令数组（批量）；每个命令回复一个结果对象（批量则回复数组）：
+    {"id": 1, "timer": 3, "action": "adjust", "seconds": -60}
+    [{"timer": "*", "action": "pause", "paused": true}, {"timer": 2, "action": "status"}]
+支持的动作：reset / pause / stop / adjust / thresholds / status
+网络收发在后台线程的事件循环中完成，命令按批转交Tk线程执行，不阻塞界面
+
+    python remote_control.py --send '{"timer": "*", "action": "reset"}'
+    python remote_control.py --bench --rate 3000 --seconds 5
+"""
+import asyncio
+import collections
+import json
+import math
+import queue
+import sys
+import threading
+import time
+
+CONTROL_HOST = "127.0.0.1"
+CONTROL_PORT = 47292  # 默认控制端口
+ACTIONS = ('reset', 'pause', 'stop', 'adjust', 'thresholds', 'status')
+MAX_ADJUST_SECONDS = 24 * 3600  # 单次加减时的上限（秒）
+MAX_THRESHOLD_SECONDS = 999 * 60  # 阈值上限（秒），与设置中总时长的上限一致
+
+
+def _number(command, key, low, high, integer=False):
+    """取命令中的数值参数：必须是有限数且在 [low, high] 内，否则抛出ValueError（执行前校验，不把无效值交给计时器）"""
+    value = command[key]
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or not math.isfinite(value):
+        raise ValueError(f"{key} 必须是有限的数值：{value!r}")
+    if not low <= value <= high:
+        raise ValueError(f"{key} 超出范围 [{low}, {high}]：{value!r}")
+    return int(value) if integer else float(value)
+
+
+def execute_command(controller, command):
+    """
+    在界面线程中执行单个命令，返回结果对象
+    controller 需提供 timer_ids/reset/pause/stop/adjust/set_thresholds/status 方法（如 TimerManager）
+    """
+    result = {'id': command.get('id')} if isinstance(command, dict) else {'id': None}
+    try:
+        if not isinstance(command, dict):
+            raise ValueError("命令必须是JSON对象")
+        action = command.get('action')
+        if action not in ACTIONS:
+            raise ValueError(f"未知动作：{action}")
+        target = command.get('timer', '*')
+        timer_ids = controller.timer_ids() if target == '*' else [target]
+        if action == 'adjust':
+            seconds = _number(command, 'seconds', -MAX_ADJUST_SECONDS, MAX_ADJUST_SECONDS)
+        elif action == 'thresholds':
+            remind, warning = (_number(command, key, 0, MAX_THRESHOLD_SECONDS, integer=True)
+                               if command.get(key) is not None else None
+                               for key in ('remind_seconds', 'warning_seconds'))
+            for timer_id in timer_ids:
+                current = controller.status(timer_id)
+                if (current['warning_seconds'] if warning is None else warning) > \
+                        (current['remind_seconds'] if remind is None else remind):
+                    raise ValueError("警告阈值不能超过提醒阈值")
+        statuses = {}
+        for timer_id in timer_ids:
+            if action == 'reset':
+                controller.reset(timer_id)
+            elif action == 'pause':
+                paused = command.get('paused')
+                controller.pause(timer_id, None if paused is None else bool(paused))
+            elif action == 'stop':
+                controller.stop(timer_id)
+            elif action == 'adjust':
+                controller.adjust(timer_id, seconds)
+            elif action == 'thresholds':
+                controller.set_thresholds(timer_id, remind, warning)
+            statuses[str(timer_id)] = controller.status(timer_id)
+        result['ok'] = True
+        result['timers'] = statuses
+    except KeyError as e:
+        result['ok'] = False
+        result['error'] = f"计时器或参数不存在：{e}"
+    except (TypeError, ValueError) as e:
+        result['ok'] = False
+        result['error'] = str(e)
+    except Exception as e:  # 任何异常都只作为该命令的结果返回，不能中断批次
+        result['ok'] = False
+        result['error'] = f"执行失败：{type(e).__name__}: {e}"
+    return result
+
+
+class ControlServer:
+    """
+    本机控制服务：后台线程运行asyncio事件循环
+    :param controller: 命令执行对象，只在界面线程中被调用
+    :param dispatch: 把函数转交界面线程执行，如 lambda fn: root.after(0, fn)
+    :param path: 指定时监听Unix套接字，否则监听 host:port
+    :param max_batch: 每次转交界面线程执行的最大命令数，超出部分下一轮再执行，保证界面响应
+    """
+    def __init__(self, controller, dispatch, host=CONTROL_HOST, port=CONTROL_PORT, path=None, max_batch=256):
+        self.controller = controller
+        self.dispatch = dispatch
+        self.host = host
+        self.port = port
+        self.path = path
+        self.max_batch = max_batch
+        self.loop = None  # 后台事件循环
+        self._server = None
+        self._pending = []  # 待执行的 (命令, future, 接收时刻)
+        self._lock = threading.Lock()  # 保护 _pending 与 _dispatched
+        self._dispatched = False  # 是否已有一批转交给界面线程
+        self.latencies = collections.deque(maxlen=10000)  # 接收到执行完成的延迟（秒），保留最近的
+        self.commands = 0  # 已执行的命令数
+        self.batches = 0  # 界面线程执行的批次数
+        self._ready = threading.Event()
+        self.error = None  # 启动失败的异常
+        self.thread = None
+
+    def start(self):
+        """启动后台线程并等待监听就绪，失败时抛出启动异常"""
+        self.thread = threading.Thread(target=self._run, name="countDowner-control", daemon=True)
+        self.thread.start()
+        self._ready.wait()
+        if self.error:
+            raise self.error
+        return self
+
+    def _run(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        try:
+            if self.path:
+                server = asyncio.start_unix_server(self._handle_client, path=self.path)
+            else:
+                server = asyncio.start_server(self._handle_client, self.host, self.port)
+            self._server = self.loop.run_until_complete(server)
+            if not self.path:
+                self.port = self._server.sockets[0].getsockname()[1]
+        except OSError as e:
+            self.error = e
+            self._ready.set()
+            return
+        self._ready.set()
+        try:
+            self.loop.run_forever()
+        finally:
+            self._server.close()
+            self.loop.run_until_complete(self._server.wait_closed())
+            self.loop.close()
+
+    async def _handle_client(self, reader, writer):
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    payload = json.loads(line)
+                except ValueError:
+                    error = {'id': None, 'ok': False, 'error': "JSON格式错误"}
+                    writer.write(json.dumps(error, ensure_ascii=False).encode("utf-8") + b"\n")
+                    continue
+                batch = payload if isinstance(payload, list) else [payload]
+                results = await asyncio.gather(*[self._submit(command) for command in batch])
+                reply = results if isinstance(payload, list) else results[0]
+                writer.write(json.dumps(reply, ensure_ascii=False).encode("utf-8") + b"\n")
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    def _submit(self, command):
+        """命令入队；没有批次在界面线程排队时才转交一次，同一时间到达的命令合并执行"""
+        future = self.loop.create_future()
+        with self._lock:
+            self._pending.append((command, future, time.perf_counter()))
+            if self._dispatched:
+                return future
+            self._dispatched = True
+        self._dispatch()
+        return future
+
+    def _dispatch(self):
+        try:
+            self.dispatch(self._run_batch)
+        except RuntimeError:
+            # 界面主循环已退出
+            with self._lock:
+                self._dispatched = False
+
+    def _run_batch(self):
+        """界面线程：执行一批命令，再把结果一次性交回事件循环"""
+        with self._lock:
+            batch = self._pending[:self.max_batch]
+            del self._pending[:self.max_batch]
+        done = []
+        try:
+            for command, future, received in batch:
+                result = execute_command(self.controller, command)
+                self.latencies.append(time.perf_counter() - received)
+                done.append((future, result))
+        finally:
+            # 无论执行中出现什么异常，本批的每个命令都要有回复，且后续命令仍能转交执行
+            for command, future, _ in batch[len(done):]:
+                command_id = command.get('id') if isinstance(command, dict) else None
+                done.append((future, {'id': command_id, 'ok': False, 'error': "执行中断"}))
+            self.commands += len(batch)
+            self.batches += 1
+            self.loop.call_soon_threadsafe(self._resolve, done)
+            with self._lock:
+                more = bool(self._pending)
+                if not more:
+                    self._dispatched = False
+            if more:
+                self._dispatch()
+
+    @staticmethod
+    def _resolve(done):
+        for future, result in done:
+            if not future.done():
+                future.set_result(result)
+
+    def stats(self):
+        """统计信息：命令数、批次数、接收到执行完成的延迟分位数（毫秒）"""
+        latencies = sorted(self.latencies)
+        count = len(latencies)
+
+        def percentile(p):
+            return latencies[min(count - 1, int(count * p))] * 1000 if count else None
+
+        return {
+            'commands': self.commands,
+            'batches': self.batches,
+            'commands_per_batch': self.commands / self.batches if self.batches else 0.0,
+            'latency_p50_ms': percentile(0.5),
+            'latency_p99_ms': percentile(0.99),
+            'latency_max_ms': latencies[-1] * 1000 if count else None,
+        }
+
+    def close(self):
+        """停止服务"""
+        if self.loop and self.loop.is_running():
+            self.loop.call_soon_threadsafe(self.loop.stop)
+        if self.thread:
+            self.thread.join(2)
+
+
+class ThreadDispatcher:
+    """无界面运行时模拟Tk线程：在专用线程中依次执行转交的函数"""
+    def __init__(self):
+        self.queue = queue.SimpleQueue()
+        self.thread = threading.Thread(target=self._run, name="countDowner-ui", daemon=True)
+        self.thread.start()
+
+    def __call__(self, fn):
+        self.queue.put(fn)
+
+    def _run(self):
+        while True:
+            fn = self.queue.get()
+            if fn is None:
+                break
+            try:
+                fn()
+            except Exception:
+                # 与Tk的after回调一样：报告异常后继续处理后续任务
+                import traceback
+                traceback.print_exc()
+
+    def close(self):
+        self.queue.put(None)
+
+
+def send_commands(commands, host=CONTROL_HOST, port=CONTROL_PORT, timeout=5):
+    """同步客户端：发送一个命令或命令数组，返回服务端回复"""
+    import socket
+    with socket.create_connection((host, port), timeout=timeout) as conn:
+        conn.sendall(json.dumps(commands, ensure_ascii=False).encode("utf-8") + b"\n")
+        return json.loads(conn.makefile("rb").readline())
+
+
+async def load_generator(host, port, rate, seconds, timer_ids, connections=4, batch=1):
+    """本机负载生成：多个连接按总速率发送命令，返回客户端往返延迟（秒）列表"""
+    round_trips = []
+    per_connection = rate / connections / batch  # 每个连接每秒发送的行数
+    actions = ({'action': 'adjust', 'seconds': 1}, {'action': 'adjust', 'seconds': -1},
+               {'action': 'thresholds', 'warning_seconds': 30}, {'action': 'status'})
+
+    async def worker(index):
+        reader, writer = await asyncio.open_connection(host, port)
+        interval = 1 / per_connection
+        next_send = time.perf_counter()
+        end = next_send + seconds
+        sequence = index
+        while next_send < end:
+            commands = []
+            for _ in range(batch):
+                command = dict(actions[sequence % len(actions)])
+                command['timer'] = timer_ids[sequence % len(timer_ids)]
+                commands.append(command)
+                sequence += connections
+            sent = time.perf_counter()
+            writer.write(json.dumps(commands if batch > 1 else commands[0]).encode() + b"\n")
+            await writer.drain()
+            await reader.readline()
+            round_trips.append(time.perf_counter() - sent)
+            next_send += interval
+            delay = next_send - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+        writer.close()
+
+    await asyncio.gather(*[worker(index) for index in range(connections)])
+    return round_trips
+
+
+def benchmark(rate=3000, seconds=5, timers=200, connections=4, batch=1):
+    """无界面基准测试：TimerManager + 模拟界面线程，测量命令到显示更新的延迟"""
+    from timer_manager import TimerManager
+    import profile_store
+
+    manager = TimerManager()
+    for _ in range(timers):
+        manager.add(profile_store.DEFAULT_SETTINGS)
+    dispatcher = ThreadDispatcher()
+    server = ControlServer(manager, dispatcher, port=0).start()
+    begin = time.perf_counter()
+    try:
+        round_trips = asyncio.run(load_generator(CONTROL_HOST, server.port, rate, seconds,
+                                                 manager.timer_ids(), connections, batch))
+    finally:
+        server.close()
+        dispatcher.close()
+    elapsed = time.perf_counter() - begin
+    round_trips.sort()
+    result = server.stats()
+    result.update({
+        'commands_per_second': server.commands / elapsed,
+        'round_trip_p50_ms': round_trips[len(round_trips) // 2] * 1000 if round_trips else None,
+        'round_trip_p99_ms': round_trips[int(len(round_trips) * 0.99)] * 1000 if round_trips else None,
+    })
+    return result
+
+
+def main(argv=None):
+    import argparse
+    parser = argparse.ArgumentParser(description="countDowner 远程控制客户端与基准测试")
+    parser.add_argument('--host', default=CONTROL_HOST)
+    parser.add_argument('--port', type=int, default=CONTROL_PORT)
+    parser.add_argument('--send', metavar='JSON', help="发送一个命令或命令数组并打印回复")
+    parser.add_argument('--bench', action='store_true', help="运行本机负载测试")
+    parser.add_argument('--rate', type=int, default=3000, help="负载测试：每秒命令数")
+    parser.add_argument('--seconds', type=float, default=5, help="负载测试：持续秒数")
+    parser.add_argument('--timers', type=int, default=200, help="负载测试：计时器数")
+    parser.add_argument('--batch', type=int, default=1, help="负载测试：每行批量命令数")
+    args = parser.parse_args(argv)
+    if args.send:
+        print(json.dumps(send_commands(json.loads(args.send), args.host, args.port), ensure_ascii=False))
+    elif args.bench:
+        print(f"远程控制负载测试：{benchmark(args.rate, args.seconds, args.timers, batch=args.batch)}")
+    else:
+        parser.print_help()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,126 @@
+"""
+countDowner 单实例常驻模式
+第一次以 --resident 启动的实例在本机回环端口监听并常驻后台；之后的启动连接该端口，
+把命令行参数（档案、时长）交给常驻实例后立即退出，由常驻实例直接打开新的倒计时窗口
+    python resident.py --bench 20    # 无界面测量二次启动的移交延迟
+"""
+import json
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+
+RESIDENT_HOST = "127.0.0.1"
+RESIDENT_PORT = 47291  # 默认监听端口，可用环境变量 COUNTDOWNER_RESIDENT_PORT 覆盖
+APP_NAME = "countDowner"  # 报文标识，避免误接其它程序的连接
+
+
+def get_port():
+    """常驻实例使用的端口"""
+    return int(os.environ.get('COUNTDOWNER_RESIDENT_PORT', RESIDENT_PORT))
+
+
+def hand_off(argv, launched_at, timeout=0.5):
+    """
+    尝试把启动参数移交给常驻实例
+    :param argv: 本次启动的命令行参数
+    :param launched_at: 本次启动时刻（time.time()），常驻实例据此计算启动到窗口的延迟
+    :return: 移交成功返回True（调用方应立即退出），没有常驻实例时返回False
+    """
+    try:
+        conn = socket.create_connection((RESIDENT_HOST, get_port()), timeout=timeout)
+    except OSError:
+        return False
+    message = {'app': APP_NAME, 'argv': list(argv), 'launched_at': launched_at}
+    try:
+        with conn:
+            conn.sendall(json.dumps(message, ensure_ascii=False).encode("utf-8") + b"\n")
+            return conn.makefile("rb").readline().strip() == b"ok"
+    except OSError:
+        return False
+
+
+class ResidentServer:
+    """常驻实例的监听端：后台线程接收移交请求，回调 on_request(message) 在后台线程中执行"""
+    def __init__(self, on_request, port=None):
+        self.on_request = on_request  # 请求回调，需自行切换到Tk线程
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        try:
+            self.sock.bind((RESIDENT_HOST, get_port() if port is None else port))
+            self.sock.listen(8)
+        except OSError:
+            # 端口被占用（已有实例或其它程序），由调用方回退为普通启动
+            self.sock.close()
+            raise
+        self.port = self.sock.getsockname()[1]
+        self.closed = False
+        self.thread = threading.Thread(target=self._serve, name="countDowner-resident", daemon=True)
+        self.thread.start()
+
+    def _serve(self):
+        while not self.closed:
+            try:
+                conn, _ = self.sock.accept()
+            except OSError:
+                break
+            with conn:
+                try:
+                    conn.settimeout(2)
+                    line = conn.makefile("rb").readline()
+                    message = json.loads(line.decode("utf-8"))
+                    if not isinstance(message, dict) or message.get('app') != APP_NAME:
+                        continue
+                    conn.sendall(b"ok\n")
+                except (OSError, ValueError):
+                    continue
+            self.on_request(message)
+
+    def close(self):
+        """停止监听"""
+        self.closed = True
+        self.sock.close()
+
+
+def measure_warm_launches(count=20, script=None):
+    """
+    无界面测量二次启动：启动一个监听端，再逐次以 --resident --quick 启动脚本，
+    统计 进程启动 -> 常驻实例收到参数 的移交延迟与二次启动进程的总耗时
+    """
+    script = script or os.path.join(os.path.dirname(os.path.abspath(__file__)), "countDowner.py")
+    latencies = []
+    received = threading.Event()
+
+    def on_request(message):
+        latencies.append(time.time() - message['launched_at'])
+        received.set()
+
+    server = ResidentServer(on_request, port=0)
+    env = dict(os.environ, COUNTDOWNER_RESIDENT_PORT=str(server.port))
+    process_times = []
+    try:
+        for _ in range(count):
+            received.clear()
+            begin = time.perf_counter()
+            subprocess.run([sys.executable, script, '--resident', '--quick'], env=env, check=True,
+                           stdout=subprocess.DEVNULL)
+            process_times.append(time.perf_counter() - begin)
+            received.wait(2)
+    finally:
+        server.close()
+    latencies.sort()
+    process_times.sort()
+    return {
+        'launches': count,
+        'handoff_median_ms': latencies[len(latencies) // 2] * 1000 if latencies else None,
+        'handoff_max_ms': latencies[-1] * 1000 if latencies else None,
+        'process_median_ms': process_times[len(process_times) // 2] * 1000,
+    }
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="countDowner 常驻模式移交延迟测量")
+    parser.add_argument('--bench', type=int, default=20, metavar='N', help="二次启动次数")
+    print(f"常驻模式二次启动：{measure_warm_launches(parser.parse_args().bench)}")
@@ -0,0 +1,620 @@
+"""
+countDowner 场次统计：每场结束的倒计时（计划时长、阈值、实际结束、超时秒数、暂停次数与时长、各阶段的暂停次数、会场、讲者）
+追加到按列存放的只追加文件（每列一个本机字节序的定长数组文件，可直接内存映射），
+查询时整列映射后做聚合：分位数、按会场/讲者分组；安装了 NumPy 时用其向量化计算，否则用 array 与内置迭代
+    python session_store.py                          # 全部场次的汇总
+    python session_store.py --by speaker             # 按讲者分组的超时秒数分位数
+    python session_store.py --by room --column pause_seconds --since 2026-01-01
+    python session_store.py --bench --sessions 1000000
+"""
+import array
+import bisect
+import collections
+import contextlib
+import json
+import mmap
+import operator
+import os
+import sys
+import time
+from itertools import compress, repeat
+
+import profile_store
+from countdown_core import STAGES
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+SESSION_DIR = "sessions"  # 配置目录下的场次统计目录
+META_FILE = "sessions.json"  # 已提交的行数与会场/讲者名称表
+LOCK_FILE = "sessions.lock"  # 多个写入端追加时的锁文件
+VERSION = 1
+MIN_SESSION_SECONDS = 10  # 运行不足该秒数的场次（误开始、立即重置）不记录
+RESET_TOLERANCE = 0.5  # 累计运行时长回退超过该秒数视为重置（新的一场）
+DEFAULT_PERCENTILES = (50, 90, 99)
+NAME_COLUMNS = {'room': 'rooms', 'speaker': 'speakers'}  # 名称列 -> 名称表（编号0为未填写）
+# 列：名称, array类型码, 说明
+COLUMNS = (
+    ('started_at', 'd', "开始时刻（墙钟时间戳）"),
+    ('ended_at', 'd', "实际结束时刻（墙钟时间戳）"),
+    ('planned', 'i', "计划时长（秒）"),
+    ('remind', 'i', "提醒阈值（秒）"),
+    ('warning', 'i', "警告阈值（秒）"),
+    ('elapsed', 'd', "实际运行时长（秒，不含暂停）"),
+    ('adjusted', 'i', "加减时合计（秒）"),
+    ('remaining', 'i', "结束时显示的剩余秒数（提前结束为正，超时为负）"),
+    ('overrun', 'i', "超时秒数"),
+    ('end_stage', 'B', "结束时的阶段"),
+    ('pauses', 'H', "暂停次数"),
+    ('pause_seconds', 'd', "暂停总时长（秒）"),
+) + tuple((f'pauses_{stage}', 'H', f"{stage} 阶段的暂停次数") for stage in STAGES) + (
+    ('room', 'I', "会场（名称编号）"),
+    ('speaker', 'I', "讲者（名称编号）"),
+)
+TYPECODES = {name: typecode for name, typecode, _ in COLUMNS}
+
+
+def default_directory():
+    return os.path.join(profile_store.get_config_dir(), SESSION_DIR)
+
+
+def _column_path(directory, name):
+    return os.path.join(directory, f"{name}.col")
+
+
+def _read_meta(directory):
+    """读取已提交的行数与名称表，不存在或损坏时返回空表"""
+    try:
+        with open(os.path.join(directory, META_FILE), encoding="utf-8") as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        meta = None
+    if not isinstance(meta, dict) or meta.get('version') != VERSION:
+        meta = {'version': VERSION, 'rows': 0}
+    for names in NAME_COLUMNS.values():
+        meta.setdefault(names, [""])
+    return meta
+
+
+class SessionStore:
+    """
+    写入端：每列一个只追加文件；先追加各列并落盘，再原子替换元数据中的行数，
+    中途退出时多出的半行在下次追加时截掉，读取端只读到已提交的行。
+    多个窗口/进程共用同一目录：每次追加都在锁文件的独占锁内重新读取元数据，
+    从已提交的行数处写入，并把新名称合并到磁盘上的名称表
+    """
+    def __init__(self, directory=None):
+        self.directory = directory or default_directory()
+        self.fds = {}
+        self.lock_fd = None
+
+    def open(self):
+        """打开（必要时创建）各列文件与锁文件，失败时抛出OSError"""
+        os.makedirs(self.directory, exist_ok=True)
+        self.lock_fd = os.open(os.path.join(self.directory, LOCK_FILE), os.O_RDWR | os.O_CREAT, 0o644)
+        for name, _, _ in COLUMNS:
+            self.fds[name] = os.open(_column_path(self.directory, name),
+                                     os.O_RDWR | os.O_CREAT | getattr(os, 'O_BINARY', 0), 0o644)
+        return self
+
+    @contextlib.contextmanager
+    def _locked(self):
+        """独占锁（阻塞等待其它写入端）"""
+        if fcntl is not None:
+            fcntl.flock(self.lock_fd, fcntl.LOCK_EX)
+        else:
+            os.lseek(self.lock_fd, 0, os.SEEK_SET)
+            msvcrt.locking(self.lock_fd, msvcrt.LK_LOCK, 1)  # 约10秒仍未取得时抛出OSError
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(self.lock_fd, fcntl.LOCK_UN)
+            else:
+                os.lseek(self.lock_fd, 0, os.SEEK_SET)
+                msvcrt.locking(self.lock_fd, msvcrt.LK_UNLCK, 1)
+
+    @staticmethod
+    def _code(meta, codes, column, name):
+        """名称的编号（codes 为本次追加时由磁盘名称表建立的索引），新名称追加到名称表"""
+        table = codes[column]
+        name = name or ""
+        code = table.get(name)
+        if code is None:
+            names = meta[NAME_COLUMNS[column]]
+            code = table[name] = len(names)
+            names.append(name)
+        return code
+
+    @staticmethod
+    def _index(meta):
+        """名称表 -> {名称: 编号} 的索引"""
+        return {column: {name: code for code, name in enumerate(meta[names])}
+                for column, names in NAME_COLUMNS.items()}
+
+    def register(self, column, names):
+        """预先登记会场/讲者名称，返回各名称的编号（批量追加时可直接传编号）"""
+        with self._locked():
+            meta = _read_meta(self.directory)
+            codes = self._index(meta)
+            result = [self._code(meta, codes, column, name) for name in names]
+            self._write_meta(meta)
+        return result
+
+    def append(self, session):
+        """追加一场：session 为 列名 -> 值 的字典，会场/讲者为名称"""
+        self.append_many({name: [value] for name, value in session.items()})
+
+    def append_many(self, columns):
+        """批量追加：columns 为 列名 -> 值列表（各列等长，会场/讲者可为名称或编号），缺少的列补0"""
+        count = len(next(iter(columns.values())))
+        with self._locked():
+            meta = _read_meta(self.directory)
+            codes = self._index(meta)
+            rows = meta['rows']
+            for name, typecode, _ in COLUMNS:
+                values = columns.get(name)
+                if values is None:
+                    values = [0] * count
+                elif name in NAME_COLUMNS:
+                    values = [value if isinstance(value, int) else self._code(meta, codes, name, value)
+                              for value in values]
+                fd = self.fds[name]
+                offset = rows * array.array(typecode).itemsize
+                if os.fstat(fd).st_size != offset:
+                    os.ftruncate(fd, offset)  # 截掉中途退出留下的未提交尾部
+                os.lseek(fd, offset, os.SEEK_SET)
+                os.write(fd, array.array(typecode, values).tobytes())
+            for fd in self.fds.values():
+                os.fsync(fd)
+            meta['rows'] = rows + count
+            self._write_meta(meta)
+
+    def _write_meta(self, meta):
+        path = os.path.join(self.directory, META_FILE)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(meta, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    def close(self):
+        for fd in self.fds.values():
+            os.close(fd)
+        self.fds = {}
+        if self.lock_fd is not None:
+            os.close(self.lock_fd)
+            self.lock_fd = None
+
+
+class SessionTable:
+    """
+    读取端：各列整列内存映射（不复制），只取已提交的行；
+    column() 在有 NumPy 时返回数组视图，否则返回 memoryview
+    """
+    def __init__(self, directory=None, use_numpy=True):
+        self.directory = directory or default_directory()
+        self.numpy = use_numpy and np is not None
+        meta = _read_meta(self.directory)
+        self.rows = meta['rows']
+        self.names = {column: meta[names] for column, names in NAME_COLUMNS.items()}
+        self.maps = []
+        self.columns = {}
+        for name, typecode, _ in COLUMNS:
+            self.columns[name] = self._map(name, typecode)
+
+    def _map(self, name, typecode):
+        size = self.rows * array.array(typecode).itemsize
+        if not size:
+            return np.zeros(0, dtype=typecode) if self.numpy else memoryview(array.array(typecode))
+        with open(_column_path(self.directory, name), "rb") as f:
+            data = mmap.mmap(f.fileno(), size, access=mmap.ACCESS_READ)
+        self.maps.append(data)
+        if self.numpy:
+            return np.frombuffer(data, dtype=typecode, count=self.rows)
+        return memoryview(data).cast(typecode)
+
+    def column(self, name):
+        return self.columns[name]
+
+    def code(self, column, name):
+        """名称对应的编号，不存在时抛出ValueError"""
+        try:
+            return self.names[column].index(name)
+        except ValueError:
+            raise ValueError(f"没有名为 {name} 的{'会场' if column == 'room' else '讲者'}") from None
+
+    def mask(self, room=None, speaker=None, since=None):
+        """按会场/讲者/开始日期筛选的行掩码，没有筛选条件时返回None"""
+        conditions = []
+        for column, name in (('room', room), ('speaker', speaker)):
+            if name is not None:
+                conditions.append((column, operator.eq, self.code(column, name)))
+        if since is not None:
+            conditions.append(('started_at', operator.ge, since))
+        if not conditions:
+            return None
+        result = None
+        for column, compare, value in conditions:
+            values = self.columns[column]
+            if self.numpy:
+                selected = compare(values, value)
+                result = selected if result is None else result & selected
+            else:
+                selected = bytes(map(compare, values, repeat(value)))
+                result = selected if result is None else bytes(map(operator.and_, result, selected))
+        return result
+
+    def values(self, name, mask=None):
+        """某列（按掩码筛选后）的值"""
+        values = self.columns[name]
+        if mask is None:
+            return values
+        if self.numpy:
+            return values[mask]
+        return memoryview(array.array(TYPECODES[name], compress(values, mask)))
+
+    def close(self):
+        """释放映射（仍有数组引用时由垃圾回收释放）"""
+        self.columns = {}
+        for data in self.maps:
+            try:
+                data.close()
+            except BufferError:
+                pass
+        self.maps = []
+
+
+def _percentile(ordered, p):
+    """已排序序列的分位数（线性插值，与 numpy.percentile 默认方式一致）"""
+    position = (len(ordered) - 1) * p / 100
+    low = int(position)
+    fraction = position - low
+    if not fraction or low + 1 >= len(ordered):
+        return float(ordered[low])
+    return ordered[low] + (ordered[low + 1] - ordered[low]) * fraction
+
+
+def _aggregate_python(codes, values, percentiles):
+    """按编号把值分发到各组（map + list.append，无逐行Python代码），组内排序后取分位数"""
+    if codes is None:
+        groups = {None: sorted(values)}
+    else:
+        buckets = [[] for _ in range(max(codes) + 1)] if len(codes) else []
+        collections.deque(map(list.append, map(buckets.__getitem__, codes), values), maxlen=0)
+        groups = {code: bucket for code, bucket in enumerate(buckets) if bucket}
+        for bucket in groups.values():
+            bucket.sort()
+    results = []
+    for code, ordered in groups.items():
+        count = len(ordered)
+        if not count:
+            continue
+        row = {'group': code, 'sessions': count, 'mean': sum(ordered) / count,
+               'over_share': (count - bisect.bisect_right(ordered, 0)) / count}
+        for p in percentiles:
+            row[f'p{p:g}'] = _percentile(ordered, p)
+        results.append(row)
+    return results
+
+
+def _group_sort(codes, values):
+    """
+    按 (编号, 值) 排序：编号放在64位键的高32位、值（整数列减去最小值，浮点列用名次）放在低32位，
+    只排序一次整数键，比多键排序快一个数量级
+    """
+    if values.dtype.kind in 'iu':
+        low = int(values.min())
+        keys = (codes.astype(np.int64) << 32) | (values.astype(np.int64) - low)
+        keys.sort()
+        return keys >> 32, (keys & 0xFFFFFFFF) + low
+    order = np.argsort(values)
+    ranks = np.empty(len(values), dtype=np.int64)
+    ranks[order] = np.arange(len(values))
+    keys = (codes.astype(np.int64) << 32) | ranks
+    keys.sort()
+    return keys >> 32, values[order][keys & 0xFFFFFFFF]
+
+
+def _aggregate_numpy(codes, values, percentiles):
+    """排序一次后，组边界、均值、占比与各分位数都是整组向量运算"""
+    if not len(values):
+        return []
+    if codes is None:
+        ordered = np.sort(values)
+        group_codes = [None]
+        starts = np.zeros(1, dtype=np.int64)
+    else:
+        codes, ordered = _group_sort(codes, values)
+        starts = np.concatenate(([0], np.flatnonzero(np.diff(codes)) + 1))
+        group_codes = codes[starts]
+    counts = np.diff(np.append(starts, len(ordered)))
+    ordered = ordered.astype(np.float64)
+    means = np.add.reduceat(ordered, starts) / counts
+    over = np.add.reduceat((ordered > 0).astype(np.int64), starts) / counts
+    columns = {}
+    for p in percentiles:
+        position = starts + (counts - 1) * p / 100
+        low = np.floor(position).astype(np.int64)
+        high = np.minimum(low + 1, starts + counts - 1)
+        columns[f'p{p:g}'] = ordered[low] + (ordered[high] - ordered[low]) * (position - low)
+    results = []
+    for index, code in enumerate(group_codes):
+        row = {'group': None if code is None else int(code), 'sessions': int(counts[index]),
+               'mean': float(means[index]), 'over_share': float(over[index])}
+        for key, column in columns.items():
+            row[key] = float(column[index])
+        results.append(row)
+    return results
+
+
+def aggregate(table, column='overrun', by=None, percentiles=DEFAULT_PERCENTILES, mask=None):
+    """
+    某列的聚合：场次、均值、大于0的占比（超时场次占比）与各分位数；by 为 'room' / 'speaker' 时按组，
+    组名取自名称表，按均值降序
+    """
+    values = table.values(column, mask)
+    codes = table.values(by, mask) if by else None
+    engine = _aggregate_numpy if table.numpy else _aggregate_python
+    results = engine(codes, values, percentiles)
+    if by:
+        names = table.names[by]
+        for row in results:
+            row['group'] = names[row['group']] or "（未填写）"
+        results.sort(key=lambda row: -row['mean'])
+    return results
+
+
+def pause_stages(table, mask=None):
+    """各阶段的暂停次数、暂停总次数与暂停总时长（讲者通常在哪个阶段暂停）"""
+    total = (lambda values: values.sum()) if table.numpy else sum
+    return {
+        'stages': {stage: int(total(table.values(f'pauses_{stage}', mask))) for stage in STAGES},
+        'pauses': int(total(table.values('pauses', mask))),
+        'pause_seconds': float(total(table.values('pause_seconds', mask))),
+    }
+
+
+class SessionRecorder:
+    """
+    倒计时窗口的场次记录：作为状态/整秒刷新监听函数，跟踪暂停（次数、时长、所在阶段），
+    每次观察时记下当前结果；换了核心（新设置、议程切换）或累计运行时长回退（重置）即为一场结束，
+    关闭窗口时结束最后一场。议程模式的讲者默认取议程项标题，空档不记录
+    """
+    def __init__(self, store, room="", speaker=""):
+        self.store = store
+        self.room = room or ""
+        self.speaker = speaker or ""
+        self.core = None
+        self.recorded = 0
+        self.record_seconds = 0.0
+        self._start(None)
+
+    def _start(self, app):
+        self.core = app.core if app else None
+        self.session_speaker = self.speaker
+        self.skip = False
+        if app and app.agenda and app.segment_index is not None:
+            self.skip = app.segment_gap
+            if not self.speaker and not app.segment_gap:
+                self.session_speaker = app.agenda.segments[app.segment_index].title
+        self.started_at = time.time()
+        self.paused = False
+        self.paused_since = 0.0
+        self.pauses = [0] * len(STAGES)
+        self.pause_seconds = 0.0
+        self.elapsed = 0.0
+        self.last = None  # 最近一次观察到的结果
+
+    def observe(self, app):
+        """状态/整秒刷新监听函数"""
+        core = app.core
+        clock = core.clock
+        elapsed = clock.elapsed()
+        if core is not self.core or elapsed < self.elapsed - RESET_TOLERANCE:
+            self._finish()
+            self._start(app)
+        now = clock.clock()
+        if core.is_paused != self.paused:
+            self.paused = core.is_paused
+            if self.paused:
+                self.pauses[STAGES.index(core.stage)] += 1
+                self.paused_since = now
+            else:
+                self.pause_seconds += now - self.paused_since  # 继续或暂停中停止
+        self.elapsed = elapsed
+        # 议程模式的计划时长为浮点秒数（距下一次切换），整数列按四舍五入记录
+        self.last = (time.time(), round(core.original_total_seconds), round(core.remind_seconds),
+                     round(core.warning_seconds),
+                     round(clock.remaining() + elapsed - core.original_total_seconds),
+                     core.total_seconds if core.total_seconds >= 0 else -core.negative_seconds,
+                     core.negative_seconds, STAGES.index(core.stage), now)
+
+    def _finish(self):
+        """结束当前场次：运行足够长时追加到场次统计"""
+        if self.last is None or self.skip or self.elapsed < MIN_SESSION_SECONDS:
+            return
+        begin = time.perf_counter()
+        ended_at, planned, remind, warning, adjusted, remaining, overrun, stage, now = self.last
+        pause_seconds = self.pause_seconds + (now - self.paused_since if self.paused else 0.0)
+        session = {
+            'started_at': self.started_at, 'ended_at': ended_at, 'planned': planned, 'remind': remind,
+            'warning': warning, 'elapsed': self.elapsed, 'adjusted': adjusted, 'remaining': remaining,
+            'overrun': overrun, 'end_stage': stage, 'pauses': sum(self.pauses), 'pause_seconds': pause_seconds,
+            'room': self.room, 'speaker': self.session_speaker,
+        }
+        for stage_name, count in zip(STAGES, self.pauses):
+            session[f'pauses_{stage_name}'] = count
+        try:
+            self.store.append(session)
+        except Exception as e:  # 统计失败不能影响倒计时（本函数在整秒刷新与议程切换中调用）
+            print(f"场次统计写入失败：{str(e)}")
+            return
+        self.recorded += 1
+        self.record_seconds += time.perf_counter() - begin
+
+    def close(self, app=None):
+        """窗口关闭：记下最终结果并结束最后一场"""
+        if app is not None and app.core is not None:
+            self.observe(app)
+        self._finish()
+        self.last = None
+        self.store.close()
+
+    def stats(self):
+        return {'recorded': self.recorded,
+                'record_ms': self.record_seconds / self.recorded * 1000 if self.recorded else 0.0}
+
+
+def _synthesize(store, sessions, rooms=50, speakers=5000, chunk=100000, seed=1):
+    """生成模拟场次（确定性随机）：计划时长、超时、暂停与会场/讲者"""
+    import random
+    rng = random.Random(seed)
+    store.register('room', [f"会场{name}" for name in range(1, rooms + 1)])
+    store.register('speaker', [f"讲者{name}" for name in range(1, speakers + 1)])
+    start = 1.7e9
+    for offset in range(0, sessions, chunk):
+        count = min(chunk, sessions - offset)
+        planned = [rng.choice((300, 600, 900, 1200, 1800, 2700)) for _ in range(count)]
+        overrun = [max(0, int(rng.gauss(-60, 120))) for _ in range(count)]
+        pauses = [min(3, int(rng.expovariate(1.5))) for _ in range(count)]
+        stages = [[0] * count for _ in STAGES]
+        for row, pause_count in enumerate(pauses):
+            for _ in range(pause_count):
+                stages[rng.choice((0, 0, 1, 2, 2, 2, 3))][row] += 1
+        columns = {
+            'started_at': [start + (offset + row) * 600.0 for row in range(count)],
+            'planned': planned,
+            'remind': [min(300, value // 5) for value in planned],
+            'warning': [30] * count,
+            'elapsed': [value + over for value, over in zip(planned, overrun)],
+            'remaining': [-over for over in overrun],
+            'overrun': overrun,
+            'end_stage': [3 if over else 2 for over in overrun],
+            'pauses': pauses,
+            'pause_seconds': [pause_count * rng.uniform(5, 90) for pause_count in pauses],
+            'room': [rng.randint(1, rooms) for _ in range(count)],
+            'speaker': [rng.randint(1, speakers) for _ in range(count)],
+        }
+        columns['ended_at'] = [begin + elapsed for begin, elapsed in zip(columns['started_at'], columns['elapsed'])]
+        for stage, counts in zip(STAGES, stages):
+            columns[f'pauses_{stage}'] = counts
+        store.append_many(columns)
+
+
+def benchmark(sessions=1000000, rooms=50, speakers=5000):
+    """
+    生成 sessions 场模拟数据，统计打开（映射）与各项查询的耗时；
+    安装了 NumPy 时两种计算方式都运行并核对结果一致
+    """
+    import shutil
+    import tempfile
+    directory = tempfile.mkdtemp(prefix="countdowner-sessions-")
+    try:
+        begin = time.perf_counter()
+        store = SessionStore(directory).open()
+        _synthesize(store, sessions, rooms, speakers)
+        store.close()
+        result = {'sessions': sessions, 'generate_seconds': round(time.perf_counter() - begin, 2),
+                  'bytes_per_session': sum(array.array(typecode).itemsize for _, typecode, _ in COLUMNS)}
+        answers = {}
+        for engine in (('numpy', 'array') if np is not None else ('array',)):
+            timings = {}
+            begin = time.perf_counter()
+            table = SessionTable(directory, use_numpy=engine == 'numpy')
+            timings['open'] = time.perf_counter() - begin
+            queries = (
+                ('overall', lambda: aggregate(table)),
+                ('by_room', lambda: aggregate(table, by='room')),
+                ('by_speaker', lambda: aggregate(table, by='speaker')),
+                ('room_by_speaker', lambda: aggregate(table, by='speaker', mask=table.mask(room="会场1"))),
+                ('pause_stages', lambda: pause_stages(table)),
+            )
+            answers[engine] = {}
+            for name, query in queries:
+                begin = time.perf_counter()
+                answers[engine][name] = query()
+                timings[name] = time.perf_counter() - begin
+            table.close()
+            timings['total'] = sum(timings.values())
+            result[engine] = {name: round(seconds, 3) for name, seconds in timings.items()}
+        if len(answers) == 2:
+            result['engines_agree'] = _same(answers['numpy'], answers['array'])
+        return result
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+def _same(left, right):
+    """两种计算方式的结果是否一致（浮点按相对误差比较）"""
+    if isinstance(left, dict):
+        return left.keys() == right.keys() and all(_same(left[key], right[key]) for key in left)
+    if isinstance(left, list):
+        return len(left) == len(right) and all(_same(a, b) for a, b in zip(left, right))
+    if isinstance(left, float) or isinstance(right, float):
+        return abs(left - right) <= 1e-9 * max(1.0, abs(left), abs(right))
+    return left == right
+
+
+def print_report(table, column, by, percentiles, mask, top):
+    rows = aggregate(table, column, by, percentiles, mask)
+    if not rows:
+        print("没有符合条件的场次")
+        return
+    label = dict((name, description) for name, _, description in COLUMNS)[column]
+    print(f"{label}：")
+    keys = [f'p{p:g}' for p in percentiles]
+    header = f"{'分组' if by else '':<12}{'场次':>8}{'均值':>10}{'大于0占比':>10}" + "".join(f"{key:>10}" for key in keys)
+    print(header)
+    for row in rows[:top] if by else rows:
+        print(f"{row['group'] or '全部':<12}{row['sessions']:>8}{row['mean']:>10.1f}{row['over_share']:>10.1%}"
+              + "".join(f"{row[key]:>10.1f}" for key in keys))
+    if by and len(rows) > top:
+        print(f"……共 {len(rows)} 组，按均值降序显示前 {top} 组")
+    pauses = pause_stages(table, mask)
+    total = sum(pauses['stages'].values())
+    print(f"暂停：共 {pauses['pauses']} 次，合计 {pauses['pause_seconds'] / 60:.1f} 分钟；按阶段："
+          + "，".join(f"{stage} {count}（{count / total:.0%}）" if total else f"{stage} 0"
+                     for stage, count in pauses['stages'].items()))
+
+
+if __name__ == "__main__":
+    import argparse
+    import datetime
+    parser = argparse.ArgumentParser(description="countDowner 场次统计查询")
+    parser.add_argument('--dir', help="场次统计目录（默认在配置目录下）")
+    parser.add_argument('--column', default='overrun', choices=[name for name, _, _ in COLUMNS
+                                                                  if name not in NAME_COLUMNS],
+                        help="聚合的列（默认超时秒数）")
+    parser.add_argument('--by', choices=tuple(NAME_COLUMNS), help="按会场或讲者分组")
+    parser.add_argument('--room', help="只看指定会场")
+    parser.add_argument('--speaker', help="只看指定讲者")
+    parser.add_argument('--since', help="只看该日期（YYYY-MM-DD）之后开始的场次")
+    parser.add_argument('--percentiles', default=",".join(map(str, DEFAULT_PERCENTILES)), help="分位数，逗号分隔")
+    parser.add_argument('--top', type=int, default=20, help="分组时显示的组数")
+    parser.add_argument('--no-numpy', action='store_true', help="不使用 NumPy（对比两种计算方式）")
+    parser.add_argument('--bench', action='store_true')
+    parser.add_argument('--sessions', type=int, default=1000000, help="基准测试的模拟场次数")
+    args = parser.parse_args()
+    if args.bench:
+        print(f"场次统计：{benchmark(args.sessions)}")
+        sys.exit(0)
+    table = SessionTable(args.dir, use_numpy=not args.no_numpy)
+    if not table.rows:
+        print("还没有场次记录（倒计时窗口关闭时记录）")
+        sys.exit(0)
+    try:
+        since = (datetime.datetime.strptime(args.since, "%Y-%m-%d").timestamp() if args.since else None)
+        mask = table.mask(args.room, args.speaker, since)
+        percentiles = [float(value) for value in args.percentiles.split(",")]
+    except ValueError as e:
+        print(str(e))
+        sys.exit(1)
+    print(f"共 {table.rows} 场（{'NumPy' if table.numpy else 'array'}）")
+    print_report(table, args.column, args.by, percentiles, mask, args.top)
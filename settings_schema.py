@@ -0,0 +1,220 @@
+"""
+countDowner 设置项声明：字段（类型、范围、默认值、所在分组）与字段间依赖规则集中在一处，
+设置窗口据此生成控件、校验顺序与结果字典；不依赖Tk，也用于校验磁盘上的档案与命令行参数
+    python settings_schema.py            # 校验已保存的全部档案
+    python settings_schema.py 档案.json  # 校验单个JSON档案
+"""
+import json
+import math
+import re
+import sys
+
+COLOR_PATTERN = re.compile(r"^#[0-9a-fA-F]{6}$")
+
+
+class Field:
+    """
+    单个设置项：值一律以结果字典的形式保存（透明度为0-1），界面换算由 to_ui/from_ui 完成
+    kind: int 数字框 / alpha 透明度百分比 / color 颜色选择 / choice 单选按钮 / text 文本框
+    """
+    __slots__ = ('key', 'kind', 'label', 'default', 'minimum', 'maximum', 'choices', 'section', 'enabled_when')
+
+    def __init__(self, key, kind, label, default, section, minimum=None, maximum=None, choices=(),
+                 enabled_when=None):
+        self.key = key  # 结果字典中的键
+        self.kind = kind
+        self.label = label  # 界面标签文字
+        self.default = default  # 默认值（结果形式）
+        self.section = section  # 所在分组
+        self.minimum = minimum  # 取值范围（int为原值，alpha为0-1）
+        self.maximum = maximum
+        self.choices = choices  # choice：((值, 显示文字), ...)
+        self.enabled_when = enabled_when  # (字段, 值)：该字段等于该值时控件才可用
+
+    def coerce(self, value):
+        """转换并限制到合法范围，无法转换时抛出ValueError"""
+        if self.kind in ('int', 'alpha') and isinstance(value, float) and not math.isfinite(value):
+            raise ValueError(f"数值无效：{value!r}")  # int(inf) 会抛出OverflowError
+        if self.kind == 'int':
+            value = int(value)
+        elif self.kind == 'alpha':
+            value = float(value)
+            if not math.isfinite(value):
+                raise ValueError(f"数值无效：{value!r}")
+        elif self.kind == 'color':
+            if not isinstance(value, str) or not COLOR_PATTERN.match(value):
+                raise ValueError(f"颜色格式应为 #rrggbb：{value!r}")
+            return value
+        elif self.kind == 'choice':
+            if value not in [choice for choice, _ in self.choices]:
+                raise ValueError(f"可选值为 {[choice for choice, _ in self.choices]}：{value!r}")
+            return value
+        else:
+            return str(value)
+        if self.minimum is not None:
+            value = max(self.minimum, value)
+        if self.maximum is not None:
+            value = min(self.maximum, value)
+        return value
+
+    def to_ui(self, value):
+        """结果值 -> 界面显示值"""
+        return round(value * 100) if self.kind == 'alpha' else value
+
+    def from_ui(self, text):
+        """界面文字 -> 结果值（未限制范围），无法转换时抛出ValueError"""
+        if self.kind == 'alpha':
+            return int(text) / 100
+        if self.kind == 'int':
+            return int(text)
+        return text
+
+
+class Rule:
+    """字段间依赖：depends 中任一字段变化后重新计算 target 的修正值"""
+    __slots__ = ('target', 'depends', 'fix', 'message')
+
+    def __init__(self, target, depends, fix, message):
+        self.target = target
+        self.depends = depends
+        self.fix = fix  # fix(设置字典) -> target 的修正值
+        self.message = message
+
+
+def _stage_fields(stage, bg, fg):
+    return (
+        Field(f"{stage}_bg", 'color', "背景色", bg, stage),
+        Field(f"{stage}_bg_alpha", 'alpha', "背景透明度(%)", 0.6, stage, 0.0, 1.0),
+        Field(f"{stage}_fg", 'color', "文字色", fg, stage),
+        Field(f"{stage}_fg_alpha", 'alpha', "文字透明度(%)", 1.0, stage, 0.0, 1.0),
+    )
+
+
+# 分组：(键, 标题, 布局)，布局 grid 为“标签+输入框”逐行排列，stage 为一行四项，choice 为单选按钮
+SECTIONS = (
+    ('time', "时间设置", 'grid'),
+    ('normal', "正常阶段", 'stage'),
+    ('remind', "提醒阶段", 'stage'),
+    ('warning', "警告阶段", 'stage'),
+    ('pace', "落后进度阶段（幻灯片同步）", 'stage'),
+    ('font', "倒计时字体设置", 'grid'),
+    ('timeout', "超时显示设置", 'choice'),
+    ('timeout_text', "自定义文字设置", 'grid'),
+)
+
+FIELDS = (
+    Field('total', 'int', "总计时间（分钟）：", 10, 'time', 1, 999),
+    Field('remind', 'int', "提醒时间（分钟）：", 2, 'time', 1, 998),
+    Field('warning', 'int', "警告时间（秒）：", 30, 'time', 1, 3600),
+) + _stage_fields('normal', "#bdc3c7", "#3399ff") + _stage_fields('remind', "#bdc3c7", "#EEEE00") \
+  + _stage_fields('warning', "#EEEE00", "#ff0000") + _stage_fields('pace', "#bdc3c7", "#ff8800") + (
+    Field('timer_font_size', 'int', "倒计时数字大小：", 60, 'font', 10, 200),
+    Field('font_fit', 'choice', "字号模式：", 'fixed', 'font',
+          choices=(('fixed', "固定字号"), ('fit', "随窗口大小自动适配"))),
+    Field('timeout_mode', 'choice', "超时模式", 'negative', 'timeout',
+          choices=(('negative', "负计时（显示-00:00及以上）"), ('text', "显示自定义文字"))),
+    Field('timeout_text', 'text', "文字内容：", "时间到！", 'timeout_text', enabled_when=('timeout_mode', 'text')),
+    Field('timeout_text_size', 'int', "文字大小：", 60, 'timeout_text', 10, 200,
+          enabled_when=('timeout_mode', 'text')),
+    Field('timeout_text_color', 'color', "文字颜色：", "#ff0000", 'timeout_text',
+          enabled_when=('timeout_mode', 'text')),
+)
+
+# 按声明顺序即为依赖顺序：总时长 -> 提醒时间 -> 警告时间
+RULES = (
+    Rule('remind', ('total',), lambda s: min(s['remind'], s['total'] - 1) if s['total'] > 1 else 1,
+         "提醒时间需小于总计时间"),
+    Rule('warning', ('remind',), lambda s: min(s['warning'], s['remind'] * 60), "警告时间不能超过提醒时间"),
+)
+
+FIELDS_BY_KEY = {field.key: field for field in FIELDS}
+
+
+def defaults():
+    """默认设置（结果形式）"""
+    return {field.key: field.default for field in FIELDS}
+
+
+def _rule_order():
+    """依赖图按拓扑顺序排列的规则（目标字段被其它规则依赖时排在前面）"""
+    pending = list(RULES)
+    ordered = []
+    while pending:
+        ready = [rule for rule in pending
+                 if not any(other.target in rule.depends for other in pending if other is not rule)]
+        if not ready:
+            raise ValueError("设置项依赖存在环")
+        ordered.extend(ready)
+        pending = [rule for rule in pending if rule not in ready]
+    return tuple(ordered)
+
+
+ORDERED_RULES = _rule_order()
+
+
+def affected_rules(changed):
+    """changed 中的字段变化后需要重新计算的规则（沿依赖图传递）"""
+    dirty = set(changed)
+    result = []
+    for rule in ORDERED_RULES:
+        if dirty.intersection(rule.depends) or rule.target in dirty:
+            result.append(rule)
+            dirty.add(rule.target)
+    return result
+
+
+def validate(values, changed=None, base=None):
+    """
+    一次性校验：逐字段转换并限制范围，再按依赖顺序应用字段间规则
+    :param values: 设置字典，可缺字段、可含未知字段（忽略）
+    :param changed: 只重新计算受这些字段影响的规则，None表示全部
+    :param base: 缺失或无效字段的取值来源，默认为默认设置
+    :return: (修正后的完整设置, 修正说明列表)
+    """
+    base = base or defaults()
+    result = {}
+    notes = []
+    for field in FIELDS:
+        if field.key not in values:
+            result[field.key] = base[field.key]
+            continue
+        try:
+            value = field.coerce(values[field.key])
+        except (TypeError, ValueError) as e:
+            notes.append(f"{field.key}：{str(e) or '无效值'}，使用 {base[field.key]!r}")
+            value = base[field.key]
+        else:
+            original = values[field.key]
+            if isinstance(original, (int, float)) and value != original:
+                notes.append(f"{field.key}：{original!r} 超出范围，修正为 {value!r}")
+        result[field.key] = value
+    rules = ORDERED_RULES if changed is None else affected_rules(changed)
+    for rule in rules:
+        fixed = rule.fix(result)
+        if fixed != result[rule.target]:
+            notes.append(f"{rule.target}：{rule.message}，{result[rule.target]!r} 修正为 {fixed!r}")
+            result[rule.target] = fixed
+    return result, notes
+
+
+def check_file(path):
+    """校验单个JSON档案文件，返回修正说明列表"""
+    with open(path, encoding="utf-8") as f:
+        profile = json.load(f)
+    if not isinstance(profile, dict):
+        return ["档案必须是JSON对象"]
+    return validate(profile)[1]
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        targets = {path: check_file(path) for path in sys.argv[1:]}
+    else:
+        import profile_store
+        store = profile_store._read_store()
+        targets = {'上次使用': validate(store['last'])[1] if isinstance(store['last'], dict) else []}
+        for name, profile in store['profiles'].items():
+            targets[name] = validate(profile)[1] if isinstance(profile, dict) else ["档案必须是JSON对象"]
+    for name, notes in targets.items():
+        print(f"{name}：{'通过' if not notes else '；'.join(notes)}")
+    sys.exit(1 if any(targets.values()) else 0)
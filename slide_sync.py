@@ -0,0 +1,517 @@
+"""
+countDowner 幻灯片同步：从本机文件、命名管道（FIFO）或UDP端口接收演示工具的翻页事件，
+按每页/每节的时间预算判断是否落后于进度，落后时显示“落后进度”阶段
+所有输入在一个后台线程中由 selectors 等待（文件用 inotify 通知，不轮询；非Linux平台回退为50ms检查修改时间），
+收到事件即转交界面线程重绘，并统计从收到事件（或发送端时间戳）到重绘完成的延迟
+    python slide_sync.py 预算.json                     # 打印每页的预计结束时刻
+    python slide_sync.py --send 5                      # 发送翻页事件（默认UDP端口47295）
+    python slide_sync.py --send next --fifo /tmp/slides
+    python slide_sync.py --play 1@0 2@20 3@45 --speed 10   # 按脚本依次翻页（第几页@第几秒）
+    python slide_sync.py --bench                       # 各输入方式的事件延迟
+预算文件：
+    {"tolerance": 30,
+     "sections": [{"title": "开场", "slides": "1-5", "duration": "4:00"},
+                  {"title": "案例", "slides": "6-12", "duration": 8},
+                  {"slides": 13, "duration": "1:30"}]}
+    duration 格式同议程（分钟数或 "MM:SS"/"H:MM:SS"），节内各页平分；已用时间超过当前页的预计结束时刻
+    tolerance 秒（默认30）即为落后进度；没有预算的页不占用时间
+事件：一行一个，页码 "12"、"next"/"prev"，或 {"slide": 12, "sent": 发送端time.monotonic()}
+"""
+import array
+import collections
+import ctypes
+import json
+import math
+import os
+import selectors
+import socket
+import struct
+import sys
+import threading
+import time
+
+from agenda import parse_duration
+
+SLIDE_HOST = "127.0.0.1"
+SLIDE_PORT = 47295  # 默认UDP端口
+TOLERANCE = 30  # 默认允许落后的秒数
+POLL_INTERVAL = 0.05  # 无 inotify 时检查文件修改时间的间隔（秒）
+FRAME_SECONDS = 1 / 60  # 延迟目标：一帧
+LATENCY_SAMPLES = 4096  # 延迟统计保留的最近样本数
+# inotify：文件写完关闭或被原子替换（写临时文件再改名）时通知
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+INOTIFY_EVENT = struct.Struct('iIII')  # wd, mask, cookie, len（其后为文件名）
+
+
+class SlidePlan:
+    """
+    每页时间预算：ends[n] 为第 n 页的预计结束时刻（距开始的秒数），limits[n] 为其加上允许落后的秒数，
+    判定是否落后只需一次数组查表与比较
+    """
+    def __init__(self, sections, tolerance=TOLERANCE):
+        """sections: [(标题, 首页, 末页, 秒数)]，页码从1开始，各节不能重叠"""
+        self.count = max(last for _, _, last, _ in sections)
+        self.tolerance = tolerance
+        budgets = [0.0] * (self.count + 1)
+        self.titles = [None] * (self.count + 1)  # 每页所属的节
+        for title, first, last, seconds in sections:
+            if first < 1 or last < first:
+                raise ValueError(f"{title}：页码范围无效 {first}-{last}")
+            for slide in range(first, last + 1):
+                if self.titles[slide] is not None:
+                    raise ValueError(f"{title}：第{slide}页已属于 {self.titles[slide]}")
+                self.titles[slide] = title
+                budgets[slide] = seconds / (last - first + 1)
+        self.ends = array.array('d', [0.0]) * (self.count + 1)
+        for slide in range(1, self.count + 1):
+            self.ends[slide] = self.ends[slide - 1] + budgets[slide]
+        self.limits = array.array('d', (end + tolerance for end in self.ends))
+
+    @property
+    def total_seconds(self):
+        return self.ends[self.count]
+
+    def clamp(self, slide):
+        """页码限制到预算范围内（超出最后一页按最后一页计）"""
+        return max(1, min(slide, self.count))
+
+    def pace(self, slide, elapsed):
+        """相对进度：正数为落后的秒数（已超过当前页的预计结束时刻），负数为领先"""
+        return elapsed - self.ends[self.clamp(slide)]
+
+    def is_behind(self, slide, elapsed):
+        return elapsed > self.limits[self.clamp(slide)]
+
+
+def build_plan(data):
+    """由预算字典构建 SlidePlan，格式错误时抛出ValueError"""
+    if not isinstance(data, dict) or not isinstance(data.get('sections'), list) or not data['sections']:
+        raise ValueError("预算文件必须包含非空的 sections 列表")
+    sections = []
+    for number, item in enumerate(data['sections'], 1):
+        if not isinstance(item, dict):
+            raise ValueError(f"第{number}节必须是JSON对象")
+        title = item.get('title') or f"第{number}节"
+        try:
+            first, _, last = str(item['slides']).partition("-")
+            first = int(first)
+            last = int(last) if last else first
+            seconds = parse_duration(item['duration'])
+        except KeyError as e:
+            raise ValueError(f"{title}：缺少 {e}") from None
+        except ValueError as e:
+            raise ValueError(f"{title}：{e}") from None
+        sections.append((title, first, last, seconds))
+    tolerance = data.get('tolerance', TOLERANCE)
+    if isinstance(tolerance, bool) or not isinstance(tolerance, (int, float)) or tolerance < 0:
+        raise ValueError(f"tolerance 应为非负秒数：{tolerance!r}")
+    return SlidePlan(sections, tolerance)
+
+
+def load_plan(path):
+    """从JSON文件加载时间预算"""
+    with open(path, encoding="utf-8") as f:
+        try:
+            data = json.load(f)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"预算文件不是有效的JSON：{e}") from None
+    return build_plan(data)
+
+
+class SlideEvent:
+    """翻页事件：slide 为目标页码，或 step 为相对翻页；sent 为发送端 time.monotonic()（可无）"""
+    __slots__ = ('slide', 'step', 'sent', 'received')
+
+    def __init__(self, slide=None, step=0, sent=None, received=None):
+        self.slide = slide
+        self.step = step
+        self.sent = sent
+        self.received = received  # 接收线程读到事件的时刻（time.monotonic）
+
+    def target(self, current):
+        """应用到当前页码后的页码"""
+        return self.slide if self.slide is not None else current + self.step
+
+
+def parse_event(line, received=None):
+    """解析一行事件，无法识别时返回None"""
+    line = line.strip()
+    if not line:
+        return None
+    if line[0] == "{":
+        try:
+            data = json.loads(line)
+            sent = data.get('sent')
+            if sent is not None and (isinstance(sent, bool) or not isinstance(sent, (int, float))
+                                     or not math.isfinite(sent)):
+                return None  # 发送时间戳必须是有限数值，否则无法计算延迟
+            if data.get('slide') is not None:
+                return SlideEvent(int(data['slide']), sent=sent, received=received)
+            return SlideEvent(step=int(data.get('step', 0)), sent=sent, received=received)
+        except (ValueError, TypeError, AttributeError, OverflowError):
+            return None
+    lowered = line.lower()
+    if lowered in ("next", "+"):
+        return SlideEvent(step=1, received=received)
+    if lowered in ("prev", "previous", "-"):
+        return SlideEvent(step=-1, received=received)
+    try:
+        return SlideEvent(int(line), received=received)
+    except ValueError:
+        return None
+
+
+def _inotify_watch(directory):
+    """Linux inotify：监视目录（文件被原子替换时 inode 会变，只能监视目录），不可用时返回None"""
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        libc = ctypes.CDLL(None, use_errno=True)
+        fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if fd < 0:
+            return None
+        if libc.inotify_add_watch(fd, os.fsencode(directory), IN_CLOSE_WRITE | IN_MOVED_TO) < 0:
+            os.close(fd)
+            return None
+        return fd
+    except (OSError, AttributeError):
+        return None
+
+
+class LatencyStats:
+    """延迟统计：保留最近的样本，报告中位数/95分位/最大值与一帧内完成的比例"""
+    def __init__(self, limit=LATENCY_SAMPLES):
+        self.samples = collections.deque(maxlen=limit)
+
+    def record(self, seconds):
+        self.samples.append(seconds)
+
+    def summary(self):
+        if not self.samples:
+            return {'events': 0}
+        ordered = sorted(self.samples)
+        count = len(ordered)
+        return {
+            'events': count,
+            'p50_ms': ordered[count // 2] * 1000,
+            'p95_ms': ordered[min(count - 1, int(count * 0.95))] * 1000,
+            'max_ms': ordered[-1] * 1000,
+            'within_frame': sum(1 for value in ordered if value <= FRAME_SECONDS) / count,
+        }
+
+
+class SlideInput:
+    """
+    翻页事件输入：文件、命名管道、UDP端口任选其一或组合，后台线程统一等待，
+    每个事件调用 on_event(SlideEvent)（在后台线程中，需自行转交界面线程）
+    """
+    def __init__(self, on_event, path=None, fifo=None, port=None, host=SLIDE_HOST):
+        self.on_event = on_event
+        self.path = path  # 演示工具写入当前页码的文件
+        self.fifo = fifo  # 命名管道路径（不存在时创建）
+        self.port = port  # UDP端口（0为任意可用端口）
+        self.host = host
+        self.selector = None
+        self.thread = None
+        self.polling = False  # 文件是否回退为检查修改时间
+        self._mtime = None
+        self._resources = []  # 需要关闭的文件描述符与套接字
+        self._wakeup = None  # 关闭时唤醒后台线程
+        self._fifo_buffer = b""
+        self.events = 0
+        self.ignored = 0  # 无法识别的行数
+        self.receive_latency = LatencyStats()  # 发送端时间戳 -> 后台线程读到
+        self.display_latency = LatencyStats()  # 后台线程读到 -> 界面重绘完成
+
+    def start(self):
+        """打开各输入并启动后台线程，无法打开时抛出OSError"""
+        self.selector = selectors.DefaultSelector()
+        try:
+            self._wakeup = socket.socketpair()
+            self._wakeup[0].setblocking(False)
+            self._resources.extend(self._wakeup)
+            self.selector.register(self._wakeup[0], selectors.EVENT_READ, self._drain_wakeup)
+            if self.path:
+                self._open_file()
+            if self.fifo:
+                self._open_fifo()
+            if self.port is not None:
+                self._open_udp()
+        except OSError:
+            self.close()
+            raise
+        self.thread = threading.Thread(target=self._run, name="slide-sync", daemon=True)
+        self.thread.start()
+        return self
+
+    def _open_file(self):
+        self.path = os.path.abspath(self.path)
+        fd = _inotify_watch(os.path.dirname(self.path))
+        if fd is None:
+            self.polling = True
+            self._mtime = self._stat()
+        else:
+            self._resources.append(fd)
+            self.selector.register(fd, selectors.EVENT_READ, self._read_inotify)
+        if os.path.exists(self.path):
+            self._read_file()  # 启动时先读一次当前页码
+
+    def _open_fifo(self):
+        if not os.path.exists(self.fifo):
+            os.mkfifo(self.fifo)
+        fd = os.open(self.fifo, os.O_RDONLY | os.O_NONBLOCK)
+        self._resources.append(fd)
+        # 自己保留一个写端：演示工具关闭写端后管道不会持续报告EOF
+        self._resources.append(os.open(self.fifo, os.O_WRONLY | os.O_NONBLOCK))
+        self.selector.register(fd, selectors.EVENT_READ, self._read_fifo)
+
+    def _open_udp(self):
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self._resources.append(sock)
+        sock.bind((self.host, self.port))
+        sock.setblocking(False)
+        self.port = sock.getsockname()[1]
+        self.selector.register(sock, selectors.EVENT_READ, self._read_udp)
+
+    def _run(self):
+        timeout = POLL_INTERVAL if self.polling else None
+        while self.selector is not None:
+            try:
+                ready = self.selector.select(timeout)
+            except (OSError, ValueError):
+                return  # 已关闭
+            for key, _ in ready:
+                try:
+                    if key.data(key.fileobj) is False:
+                        return
+                except Exception:  # 单个异常输入或回调出错不能结束后台线程
+                    self._failed()
+            if self.polling and self._stat() != self._mtime:
+                self._mtime = self._stat()
+                try:
+                    self._read_file()
+                except Exception:
+                    self._failed()
+
+    def _failed(self):
+        self.ignored += 1
+        import traceback
+        traceback.print_exc()
+
+    def _emit(self, line, received):
+        event = parse_event(line, received)
+        if event is None:
+            self.ignored += 1
+            return
+        self.events += 1
+        if event.sent is not None:
+            self.receive_latency.record(received - event.sent)
+        try:
+            self.on_event(event)
+        except Exception:  # 同一批的后续行仍要处理
+            self._failed()
+
+    def _drain_wakeup(self, sock):
+        return False  # 关闭请求
+
+    def _stat(self):
+        try:
+            return os.stat(self.path).st_mtime_ns
+        except OSError:
+            return None
+
+    def _read_inotify(self, fd):
+        received = time.monotonic()
+        try:
+            data = os.read(fd, 65536)
+        except BlockingIOError:
+            return
+        name = os.path.basename(self.path)
+        offset = 0
+        changed = False
+        while offset < len(data):
+            _, _, _, length = INOTIFY_EVENT.unpack_from(data, offset)
+            offset += INOTIFY_EVENT.size
+            if data[offset:offset + length].rstrip(b"\0").decode(errors="replace") == name:
+                changed = True
+            offset += length
+        if changed:
+            self._read_file(received)
+
+    def _read_file(self, received=None):
+        """文件内容的最后一个非空行即当前事件"""
+        received = received or time.monotonic()
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                lines = [line for line in f.read().splitlines() if line.strip()]
+        except (OSError, UnicodeDecodeError):
+            return
+        if lines:
+            self._emit(lines[-1], received)
+
+    def _read_fifo(self, fd):
+        received = time.monotonic()
+        try:
+            data = os.read(fd, 65536)
+        except BlockingIOError:
+            return
+        *lines, self._fifo_buffer = (self._fifo_buffer + data).split(b"\n")
+        for line in lines:
+            self._emit(line.decode(errors="replace"), received)
+
+    def _read_udp(self, sock):
+        while True:
+            try:
+                data = sock.recv(65536)
+            except (BlockingIOError, InterruptedError):
+                return
+            received = time.monotonic()
+            for line in data.decode(errors="replace").splitlines():
+                self._emit(line, received)
+
+    def close(self):
+        """停止后台线程并关闭全部输入"""
+        if self._wakeup:
+            try:
+                self._wakeup[1].send(b"\0")
+            except OSError:
+                pass
+        if self.thread and self.thread is not threading.current_thread():
+            self.thread.join(1)
+        selector, self.selector = self.selector, None
+        if selector:
+            selector.close()
+        for resource in self._resources:
+            try:
+                resource.close() if hasattr(resource, 'close') else os.close(resource)
+            except OSError:
+                pass
+        self._resources = []
+        self._wakeup = None
+
+    def displayed(self, event):
+        """界面线程重绘完成后调用，记录事件到显示的延迟"""
+        self.display_latency.record(time.monotonic() - event.received)
+
+    def stats(self):
+        return {'events': self.events, 'ignored': self.ignored, 'polling': self.polling,
+                'receive_latency': self.receive_latency.summary(),
+                'display_latency': self.display_latency.summary()}
+
+
+def send(line, port=None, fifo=None, path=None, host=SLIDE_HOST):
+    """
+    发送一行事件：UDP端口（默认）、命名管道或文件（写临时文件后原子替换，触发一次 inotify 通知）
+    页码与 next/prev 会包装为带发送时刻的JSON，便于接收端统计延迟
+    """
+    event = parse_event(line)
+    if event is None:
+        raise ValueError(f"无法识别的事件：{line!r}")
+    message = {'slide': event.slide} if event.slide is not None else {'step': event.step}
+    message['sent'] = time.monotonic()
+    data = json.dumps(message) + "\n"
+    if fifo:
+        try:
+            fd = os.open(fifo, os.O_WRONLY | os.O_NONBLOCK)
+        except OSError as e:
+            raise OSError(f"命名管道没有读取端（倒计时未启动？）：{e}") from None
+        try:
+            os.write(fd, data.encode())
+        finally:
+            os.close(fd)
+    elif path:
+        temporary = f"{path}.tmp"
+        with open(temporary, "w", encoding="utf-8") as f:
+            f.write(data)
+        os.replace(temporary, path)
+    else:
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+            sock.sendto(data.encode(), (host, port or SLIDE_PORT))
+
+
+def play(script, speed=1.0, **target):
+    """按脚本翻页：script 为 ["页码或next/prev@秒数", ...]，speed 为加速倍数"""
+    steps = []
+    for item in script:
+        line, _, at = item.partition("@")
+        steps.append((float(at or 0) / speed, line))
+    begin = time.monotonic()
+    for at, line in sorted(steps, key=lambda step: step[0]):
+        delay = begin + at - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+        send(line, **target)
+        print(f"{time.monotonic() - begin:7.2f}s  {line}")
+
+
+def benchmark(events=500, interval=0.002):
+    """每种输入方式发送 events 个带时间戳的翻页事件，统计发送到后台线程收到的延迟"""
+    import tempfile
+    results = {}
+    directory = tempfile.mkdtemp(prefix="countdowner-slides-")
+    channels = {'udp': {'port': 0}, 'file': {'path': os.path.join(directory, "slide.txt")}}
+    if hasattr(os, 'mkfifo'):
+        channels['fifo'] = {'fifo': os.path.join(directory, "slides.fifo")}
+    try:
+        for name, options in channels.items():
+            received = threading.Event()
+            seen = []
+
+            def on_event(event):
+                seen.append(event)
+                received.set()
+
+            source = SlideInput(on_event, **options).start()
+            target = {'port': source.port} if name == 'udp' else options
+            lost = 0
+            for slide in range(1, events + 1):
+                received.clear()
+                send(str(slide), **target)
+                if not received.wait(1):
+                    lost += 1
+                time.sleep(interval)
+            source.close()
+            result = source.stats()['receive_latency']
+            result['lost'] = lost
+            result['polling'] = source.polling
+            results[name] = result
+    finally:
+        for entry in os.listdir(directory):
+            os.remove(os.path.join(directory, entry))
+        os.rmdir(directory)
+    return results
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="countDowner 幻灯片同步")
+    parser.add_argument('plan', nargs='?', help="时间预算JSON文件")
+    parser.add_argument('--send', metavar='EVENT', help="发送一个翻页事件（页码或 next/prev）")
+    parser.add_argument('--play', nargs='+', metavar='EVENT@SECONDS', help="按脚本依次发送翻页事件")
+    parser.add_argument('--speed', type=float, default=1.0, help="脚本加速倍数")
+    parser.add_argument('--port', type=int, default=SLIDE_PORT, help="UDP端口")
+    parser.add_argument('--fifo', metavar='PATH', help="改为写入命名管道")
+    parser.add_argument('--file', metavar='PATH', help="改为写入文件")
+    parser.add_argument('--bench', action='store_true')
+    parser.add_argument('--events', type=int, default=500)
+    args = parser.parse_args()
+    target = {'port': args.port, 'fifo': args.fifo, 'path': args.file}
+    try:
+        if args.bench:
+            for name, result in benchmark(args.events).items():
+                print(f"{name}：{result}")
+        elif args.send:
+            send(args.send, **target)
+        elif args.play:
+            play(args.play, args.speed, **target)
+        elif args.plan:
+            plan = load_plan(args.plan)
+            for slide in range(1, plan.count + 1):
+                print(f"第{slide:3d}页  结束于 {plan.ends[slide] / 60:6.2f} 分钟  {plan.titles[slide] or ''}")
+            print(f"合计 {plan.total_seconds / 60:.2f} 分钟，允许落后 {plan.tolerance} 秒")
+        else:
+            parser.print_help()
+    except (OSError, ValueError) as e:
+        print(f"幻灯片同步：{e}")
+        sys.exit(1)
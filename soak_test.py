@@ -0,0 +1,278 @@
+"""
+countDowner 长时间运行（浸泡）与泄漏测试：用虚拟时钟加速驱动真实的 PPTCountdown 窗口，
+反复经历 重置/运行/暂停/加减时/超时/停止，并打开关闭右键菜单（Windows上只创建不弹出）与设置窗口；
+每个循环结束时采样 tracemalloc 内存、Tk控件/命令/字体/图片/变量数、Python对象数与挂起的after任务，
+热身之后按每循环的增长斜率判断泄漏，有增长时退出码为1
+    python soak_test.py --cycles 200            # 需要显示器
+    python soak_test.py --cycles 200 --xvfb     # 无显示器时自动启动 Xvfb（需已安装）
+    xvfb-run -a python soak_test.py --cycles 200
+"""
+import gc
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+WARMUP_CYCLES = 10  # 热身循环数（首次创建菜单、字体、缓存等一次性分配不计入）
+MEMORY_SLOPE = 512  # 每循环内存增长超过该字节数视为泄漏
+OBJECT_SLOPE = 0.5  # 每循环Python对象增长超过该数视为泄漏
+# 采样项：名称 -> 说明；Tk资源在稳定状态下每个循环结束时应完全一致
+METRICS = {
+    'traced_bytes': "tracemalloc 内存（字节）",
+    'python_objects': "Python对象数",
+    'tk_widgets': "Tk控件数",
+    'tk_commands': "Tk命令数",
+    'tk_fonts': "Tk字体数",
+    'tk_images': "Tk图片数",
+    'tk_variables': "Tcl全局变量数",
+    'pending_afters': "挂起的after任务数",
+}
+
+
+def _count_widgets(tk_app, path="."):
+    """Tcl层递归统计控件（包括Python未持有引用的控件，如菜单克隆）"""
+    children = tk_app.splitlist(tk_app.call('winfo', 'children', path))
+    return len(children) + sum(_count_widgets(tk_app, child) for child in children)
+
+
+def sample(root):
+    """采样一次（先做完整垃圾回收，避免把待回收的对象算作泄漏）"""
+    gc.collect()
+    tk_app = root.tk
+
+    def count(*command):
+        return len(tk_app.splitlist(tk_app.call(*command)))
+
+    return {
+        'traced_bytes': tracemalloc.get_traced_memory()[0],
+        'python_objects': len(gc.get_objects()),
+        'tk_widgets': _count_widgets(tk_app),
+        'tk_commands': count('info', 'commands'),
+        'tk_fonts': count('font', 'names'),
+        'tk_images': count('image', 'names'),
+        'tk_variables': count('info', 'globals'),
+        'pending_afters': count('after', 'info'),
+    }
+
+
+def _slope(values):
+    """最小二乘斜率（每循环的平均增长）"""
+    count = len(values)
+    if count < 2:
+        return 0.0
+    mean_x = (count - 1) / 2
+    mean_y = sum(values) / count
+    numerator = sum((index - mean_x) * (value - mean_y) for index, value in enumerate(values))
+    denominator = sum((index - mean_x) ** 2 for index in range(count))
+    return numerator / denominator
+
+
+def growth_report(samples, warmup=WARMUP_CYCLES):
+    """
+    热身之后各采样项的增长：起止值、每循环斜率与是否判定为泄漏
+    Tk资源与after任务净增长即判定为泄漏，内存与Python对象按斜率阈值判定
+    """
+    steady = samples[warmup:] if len(samples) > warmup + 1 else samples
+    report = {}
+    for name in METRICS:
+        values = [entry[name] for entry in steady]
+        slope = _slope(values)
+        if name == 'traced_bytes':
+            leaking = slope > MEMORY_SLOPE
+        elif name == 'python_objects':
+            leaking = slope > OBJECT_SLOPE
+        else:
+            leaking = values[-1] > values[0] and slope * len(values) >= 1
+        report[name] = {'start': values[0], 'end': values[-1], 'per_cycle': round(slope, 3), 'leaking': leaking}
+    return report
+
+
+class _Event:
+    """模拟的鼠标事件（右键菜单弹出位置）"""
+    __slots__ = ('x_root', 'y_root', 'widget')
+
+    def __init__(self, x_root, y_root, widget=None):
+        self.x_root = x_root
+        self.y_root = y_root
+        self.widget = widget
+
+
+class SoakRunner:
+    """
+    驱动一个真实的倒计时窗口：核心使用虚拟时钟，每一步推进虚拟时间后直接执行一次唤醒，
+    Tk事件循环只处理挂起的重绘与空闲任务
+    """
+    def __init__(self, minutes=1, glyph=False, animate_fps=None, font_fit=False):
+        import tkinter as tk
+        import countDowner
+        import profile_store
+        from countdown_core import VirtualClock
+        self.root = tk.Tk()
+        self.root.withdraw()
+        self.clock = VirtualClock(1000.0)
+        settings = profile_store.with_duration(profile_store.DEFAULT_SETTINGS, minutes)
+        settings['font_fit'] = 'fit' if font_fit else 'fixed'
+        self.window = tk.Toplevel(self.root)
+        self.app = countDowner.PPTCountdown(self.window, "", settings=settings, clock=self.clock,
+                                            glyph=glyph, animate_fps=animate_fps)
+        self.ticks = 0
+        self.cycles = 0
+
+    def tick(self, seconds=1.0):
+        """推进虚拟时间并执行一次唤醒（取消真实时间调度的下一次唤醒）"""
+        app = self.app
+        self.clock.advance(seconds)
+        if app.core.is_running:
+            app._cancel_wakeup()
+            app.update_timer()
+        self.ticks += 1
+        if self.ticks % 10 == 0:
+            self.root.update()
+
+    def run(self, seconds):
+        for _ in range(int(seconds)):
+            self.tick()
+
+    def _settings_round(self, confirm):
+        """打开设置窗口，稍后确认或关闭（设置窗口为模态，由after回调结束等待）"""
+        root = self.root
+        parent = str(self.app.root)  # 设置窗口是倒计时窗口的子窗口
+        known = set(root.tk.splitlist(root.tk.call('winfo', 'children', parent)))
+
+        def finish():
+            for path in root.tk.splitlist(root.tk.call('winfo', 'children', parent)):
+                if path not in known and root.tk.call('winfo', 'class', path) == 'Toplevel':
+                    if confirm:
+                        root.tk.call('destroy', path)  # 等同点击确认
+                    else:
+                        root.tk.call(root.tk.call('wm', 'protocol', path, 'WM_DELETE_WINDOW'))
+                    return
+            root.after(20, finish)
+
+        root.after(50, finish)
+        self.app.open_settings()
+
+    def cycle(self):
+        """一个完整的使用循环（相当于一场汇报）"""
+        app = self.app
+        app.reset_timer()
+        self.run(30)
+        app.pause_timer()
+        self.run(5)
+        app.pause_timer()
+        app.adjust_time(60)
+        app.adjust_time(-60)
+        self.run(app.core.clock.remaining() + 5)  # 跑到超时之后
+        app.stop_timer()
+        if sys.platform == "win32":
+            # Windows 上弹出菜单（tk_popup/post）进入系统模态循环，直到菜单被点击或关闭才返回，会卡住循环：只创建不弹出
+            if not app.right_menu:
+                app._create_right_menu()
+        else:
+            app.show_right_menu(_Event(100, 100))
+            self.root.update()
+            app.right_menu.unpost()
+        self._settings_round(confirm=self.cycles % 2 == 0)
+        self.root.update()
+        self.cycles += 1
+
+    def close(self):
+        self.app.close_window()
+        self.root.destroy()
+
+
+def _start_xvfb():
+    """无显示器时启动 Xvfb 并设置 DISPLAY，返回进程（无法启动时返回None）"""
+    if os.environ.get('DISPLAY') or not shutil.which('Xvfb'):
+        return None
+    for display in range(99, 120):
+        process = subprocess.Popen(['Xvfb', f":{display}", '-screen', '0', '1280x1024x24', '-nolisten', 'tcp'],
+                                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        time.sleep(0.5)
+        if process.poll() is None:
+            os.environ['DISPLAY'] = f":{display}"
+            return process
+    return None
+
+
+def soak(cycles=200, minutes=1, warmup=WARMUP_CYCLES, glyph=False, animate_fps=None, font_fit=False,
+         progress=True):
+    """运行浸泡测试，返回 (每循环采样列表, 增长报告, 汇总)"""
+    tracemalloc.start(10)
+    begin = time.perf_counter()
+    runner = SoakRunner(minutes, glyph, animate_fps, font_fit)
+    samples = []
+    baseline = None
+    try:
+        for index in range(cycles):
+            runner.cycle()
+            samples.append(sample(runner.root))
+            if index + 1 == warmup:
+                baseline = tracemalloc.take_snapshot()
+            if progress and (index + 1) % 10 == 0:
+                print(f"循环 {index + 1}/{cycles}：{samples[-1]}")
+        top = []
+        if baseline is not None:
+            # 热身之后增长最多的分配位置
+            for stat in tracemalloc.take_snapshot().compare_to(baseline, 'lineno')[:10]:
+                if stat.size_diff > 0:
+                    top.append(f"{stat.traceback[0].filename}:{stat.traceback[0].lineno} "
+                               f"+{stat.size_diff}字节 +{stat.count_diff}块")
+        summary = {
+            'cycles': cycles,
+            'ticks': runner.ticks,
+            'simulated_hours': round(runner.clock.now - 1000.0) / 3600,
+            'wall_seconds': round(time.perf_counter() - begin, 1),
+            'top_growth': top,
+        }
+    finally:
+        runner.close()
+        tracemalloc.stop()
+    return samples, growth_report(samples, warmup), summary
+
+
+def print_report(report, summary):
+    print(f"浸泡测试：{summary['cycles']}个循环，{summary['ticks']}次唤醒，"
+          f"模拟{summary['simulated_hours']:.1f}小时，耗时{summary['wall_seconds']}秒")
+    for name, result in report.items():
+        flag = "⚠ 增长" if result['leaking'] else "稳定"
+        print(f"  {METRICS[name]}：{result['start']} -> {result['end']}，每循环 {result['per_cycle']:+}  {flag}")
+    if summary['top_growth']:
+        print("热身后增长最多的分配位置：")
+        for line in summary['top_growth']:
+            print(f"  {line}")
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="countDowner 浸泡与泄漏测试")
+    parser.add_argument('--cycles', type=int, default=200)
+    parser.add_argument('--minutes', type=int, default=1, help="每个循环的倒计时分钟数（虚拟时间）")
+    parser.add_argument('--warmup', type=int, default=WARMUP_CYCLES)
+    parser.add_argument('--glyph', action='store_true', help="使用字形合成渲染")
+    parser.add_argument('--animate', type=int, metavar='FPS', help="启用动画模式")
+    parser.add_argument('--fit', action='store_true', help="启用字号自适应")
+    parser.add_argument('--xvfb', action='store_true', help="无显示器时自动启动 Xvfb")
+    parser.add_argument('--json', metavar='PATH', help="把采样与报告写入JSON文件")
+    args = parser.parse_args()
+    xvfb = _start_xvfb() if args.xvfb else None
+    if not os.environ.get('DISPLAY') and sys.platform not in ("win32", "darwin"):
+        print("没有可用的显示器：请安装 Xvfb 后使用 --xvfb，或用 xvfb-run 运行")
+        sys.exit(2)
+    # 设置窗口确认时会保存档案，使用临时配置目录，不影响真实配置
+    os.environ['COUNTDOWNER_CONFIG_DIR'] = tempfile.mkdtemp(prefix="countdowner-soak-")
+    try:
+        samples, report, summary = soak(args.cycles, args.minutes, args.warmup, args.glyph, args.animate, args.fit)
+    finally:
+        if xvfb:
+            xvfb.terminate()
+        shutil.rmtree(os.environ['COUNTDOWNER_CONFIG_DIR'], ignore_errors=True)
+    print_report(report, summary)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({'summary': summary, 'report': report, 'samples': samples}, f, ensure_ascii=False, indent=1)
+    sys.exit(1 if any(result['leaking'] for result in report.values()) else 0)
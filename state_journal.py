@@ -0,0 +1,361 @@
+"""
+countDowner 状态日志：倒计时状态写入内存映射的小状态文件（两个槽位交替写入，带校验），
+同时追加到只追加的事件日志（开始/暂停/继续/重置/加减时/停止），进程崩溃或电脑休眠后重启可按截止时刻还原剩余时间
+Tk线程只做一次打包和内存拷贝，日志追加、落盘与压缩都在后台线程；每条记录都是完整状态，
+恢复时只需取最后一条有效记录，日志超过一定条数即压缩为最后一条
+状态日志只属于一个倒计时窗口：打开时取得锁文件的独占锁，其它窗口（另一进程）打开失败即不记录，
+也不会恢复正在运行的窗口的状态
+    python state_journal.py          # 打印可恢复的状态
+    python state_journal.py --bench  # 每个事件的写入开销与恢复耗时
+"""
+import json
+import mmap
+import os
+import queue
+import struct
+import sys
+import threading
+import time
+import zlib
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+import profile_store
+
+STATE_FILE = "state.bin"  # 内存映射的状态文件
+JOURNAL_FILE = "state.journal"  # 只追加的事件日志
+SETTINGS_FILE = "state.json"  # 当前倒计时的设置（开始或修改设置时写入）
+LOCK_FILE = "state.lock"  # 正在记录的窗口持有的锁文件
+COMPACT_RECORDS = 1024  # 日志超过该记录数时压缩
+EPOCH_TOLERANCE = 2.0  # 单调时钟起点偏差小于该秒数视为同一次开机且未休眠，按单调截止时刻恢复
+EVENT_KINDS = ('start', 'pause', 'resume', 'reset', 'adjust', 'stop', 'checkpoint', 'close')
+
+# 记录：序号, 事件, 暂停, 停止, 总秒数, 冻结时的剩余秒数, 墙钟截止时刻, 单调截止时刻, 单调时钟起点(墙钟-单调), 记录时刻(墙钟)
+RECORD = struct.Struct('<QBBBxiddddd')
+FRAME_SIZE = RECORD.size + 4  # 记录 + CRC32
+
+
+def _encode(seq, kind, paused, stopped, total, remaining, wall, mono):
+    body = RECORD.pack(seq, EVENT_KINDS.index(kind), paused, stopped, total, remaining,
+                       wall + remaining, mono + remaining, wall - mono, wall)
+    return body + struct.pack('<I', zlib.crc32(body))
+
+
+def _decode(frame):
+    """解码一条记录，长度不足或校验失败（未写完、全零）时返回None"""
+    if len(frame) != FRAME_SIZE or struct.unpack('<I', frame[-4:])[0] != zlib.crc32(frame[:-4]):
+        return None
+    seq, kind, paused, stopped, total, remaining, wall_deadline, mono_deadline, epoch, wall = RECORD.unpack(frame[:-4])
+    if kind >= len(EVENT_KINDS):
+        return None
+    return {'seq': seq, 'kind': EVENT_KINDS[kind], 'paused': bool(paused), 'stopped': bool(stopped),
+            'total': total, 'frozen_remaining': remaining, 'wall_deadline': wall_deadline,
+            'mono_deadline': mono_deadline, 'epoch': epoch, 'recorded_at': wall}
+
+
+def remaining_seconds(record, wall=None, mono=None):
+    """
+    由记录还原当前的剩余秒数：冻结（暂停/停止）时为记录的剩余时间；
+    单调时钟起点未变（同一次开机且未休眠）时按单调截止时刻，否则按墙钟截止时刻
+    """
+    if record['paused'] or record['stopped']:
+        return record['frozen_remaining']
+    wall = time.time() if wall is None else wall
+    mono = time.monotonic() if mono is None else mono
+    if abs((wall - mono) - record['epoch']) < EPOCH_TOLERANCE:
+        return record['mono_deadline'] - mono
+    return record['wall_deadline'] - wall
+
+
+def _paths(directory):
+    directory = directory or profile_store.get_config_dir()
+    return (os.path.join(directory, STATE_FILE), os.path.join(directory, JOURNAL_FILE),
+            os.path.join(directory, SETTINGS_FILE))
+
+
+def _lock(directory):
+    """取得状态日志的独占锁（不等待），返回锁文件描述符；已被其它窗口持有时抛出OSError"""
+    fd = os.open(os.path.join(directory or profile_store.get_config_dir(), LOCK_FILE), os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        if fcntl is not None:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        else:
+            msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+    except OSError:
+        os.close(fd)
+        raise OSError("另一个倒计时窗口正在使用状态日志") from None
+    return fd
+
+
+def _unlock(fd):
+    """释放锁（关闭描述符即释放）"""
+    if fcntl is None:
+        os.lseek(fd, 0, os.SEEK_SET)
+        msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+    os.close(fd)
+
+
+def _read_snapshot(path):
+    """状态文件中序号最大的有效槽位"""
+    try:
+        with open(path, "rb") as f:
+            data = f.read(2 * FRAME_SIZE)
+    except OSError:
+        return None
+    slots = [_decode(data[offset:offset + FRAME_SIZE]) for offset in (0, FRAME_SIZE)]
+    slots = [slot for slot in slots if slot]
+    return max(slots, key=lambda slot: slot['seq']) if slots else None
+
+
+def _read_journal_tail(path):
+    """日志中最后一条有效记录（从末尾向前找，跳过崩溃时写了一半的记录）"""
+    try:
+        with open(path, "rb") as f:
+            size = f.seek(0, os.SEEK_END)
+            offset = size - size % FRAME_SIZE
+            while offset >= FRAME_SIZE:
+                offset -= FRAME_SIZE
+                f.seek(offset)
+                record = _decode(f.read(FRAME_SIZE))
+                if record:
+                    return record
+    except OSError:
+        pass
+    return None
+
+
+def recover(directory=None):
+    """
+    读取可恢复的状态：状态文件与日志中序号较大的一条
+    :return: (记录, 设置) ；没有记录、最后一条为关闭、设置缺失或另一个窗口正在记录时返回None
+    """
+    try:
+        _unlock(_lock(directory))
+    except OSError:
+        return None  # 状态属于正在运行的窗口
+    state_path, journal_path, settings_path = _paths(directory)
+    candidates = [record for record in (_read_snapshot(state_path), _read_journal_tail(journal_path)) if record]
+    if not candidates:
+        return None
+    record = max(candidates, key=lambda candidate: candidate['seq'])
+    if record['kind'] == 'close':
+        return None
+    try:
+        with open(settings_path, encoding="utf-8") as f:
+            settings = profile_store.complete_settings(json.load(f))
+    except (OSError, ValueError):
+        return None
+    if settings is None:
+        return None
+    return record, settings
+
+
+class StateJournal:
+    """
+    状态日志写入端：record() 在调用线程打包并写入内存映射的状态文件，
+    日志追加、fsync 与压缩交给后台线程，不阻塞Tk事件循环
+    """
+    def __init__(self, directory=None, compact_records=COMPACT_RECORDS):
+        self.directory = directory
+        self.state_path, self.journal_path, self.settings_path = _paths(directory)
+        self.compact_records = compact_records
+        self.snapshot = None  # 状态文件的内存映射
+        self.journal_fd = None
+        self.lock_fd = None  # 持有期间其它窗口无法打开状态日志
+        self.seq = 0
+        self.journal_records = 0  # 当前日志文件中的记录数
+        self.events = 0  # 本次记录的事件数
+        self.record_seconds = 0.0  # 调用线程的累计写入耗时
+        self.compactions = 0
+        self.queue = queue.SimpleQueue()  # 待追加的记录（None表示结束）
+        self.thread = None
+        self._settings = None  # 最近一次写入的设置对象（按对象判断是否变化）
+        self._paused = False  # 最近一次记录的暂停状态（推断事件类型）
+
+    def open(self):
+        """打开（必要时创建）状态文件与日志，序号接着上次继续；失败或另一个窗口正在记录时抛出OSError"""
+        os.makedirs(os.path.dirname(self.state_path), exist_ok=True)
+        self.lock_fd = _lock(self.directory)
+        try:
+            self._open_files()
+        except OSError:
+            _unlock(self.lock_fd)
+            self.lock_fd = None
+            raise
+        self.thread = threading.Thread(target=self._writer, name="countDowner-journal", daemon=True)
+        self.thread.start()
+        return self
+
+    def _open_files(self):
+        last = [record for record in (_read_snapshot(self.state_path), _read_journal_tail(self.journal_path))
+                if record]
+        self.seq = max(record['seq'] for record in last) if last else 0
+        fd = os.open(self.state_path, os.O_RDWR | os.O_CREAT | getattr(os, 'O_BINARY', 0), 0o644)
+        try:
+            if os.fstat(fd).st_size < 2 * FRAME_SIZE:
+                os.ftruncate(fd, 2 * FRAME_SIZE)
+            self.snapshot = mmap.mmap(fd, 2 * FRAME_SIZE)
+        finally:
+            os.close(fd)  # 映射建立后不再需要文件描述符
+        self._open_journal()
+
+    def _open_journal(self):
+        self.journal_fd = os.open(self.journal_path,
+                                  os.O_WRONLY | os.O_APPEND | os.O_CREAT | getattr(os, 'O_BINARY', 0), 0o644)
+        self.journal_records = os.fstat(self.journal_fd).st_size // FRAME_SIZE
+
+    def record(self, kind, core):
+        """记录一个事件及倒计时核心的当前状态"""
+        begin = time.perf_counter()
+        self.seq += 1
+        frame = _encode(self.seq, kind, core.is_paused, core.is_stopped, int(core.original_total_seconds),
+                        core.clock.remaining(), time.time(), time.monotonic())
+        slot = (self.seq % 2) * FRAME_SIZE
+        self.snapshot[slot:slot + FRAME_SIZE] = frame
+        self.queue.put(frame)
+        self.events += 1
+        self.record_seconds += time.perf_counter() - begin
+
+    def save_settings(self, settings):
+        """写入当前倒计时的设置（后台线程原子替换）"""
+        self.queue.put(dict(settings))
+
+    def observe(self, app):
+        """状态监听函数：由状态变化推断事件类型后记录（设置变化即为新的开始）"""
+        core = app.core
+        if app.settings is not self._settings:
+            self._settings = app.settings
+            self.save_settings(app.settings)
+            kind = 'start'
+        elif core.is_stopped:
+            kind = 'stop'
+        elif core.is_paused != self._paused:
+            kind = 'pause' if core.is_paused else 'resume'
+        elif abs(core.clock.remaining() - core.original_total_seconds) < 0.5:
+            kind = 'reset'
+        else:
+            kind = 'adjust'
+        self._paused = core.is_paused
+        self.record(kind, core)
+
+    def _writer(self):
+        """后台线程：追加日志，队列暂时为空时落盘，超过条数时压缩"""
+        while True:
+            item = self.queue.get()
+            if item is None:
+                break
+            try:
+                if isinstance(item, dict):
+                    self._write_settings(item)
+                    continue
+                os.write(self.journal_fd, item)
+                self.journal_records += 1
+                if self.queue.empty():
+                    os.fsync(self.journal_fd)
+                    self.snapshot.flush()
+                if self.journal_records >= self.compact_records:
+                    self._compact(item)
+            except (OSError, ValueError) as e:
+                print(f"状态日志写入失败：{str(e)}")
+
+    def _write_settings(self, settings):
+        tmp_path = self.settings_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(settings, f, ensure_ascii=False)
+        os.replace(tmp_path, self.settings_path)
+
+    def _compact(self, last):
+        """压缩：日志改写为只含最后一条记录（写临时文件后原子替换）"""
+        tmp_path = self.journal_path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(last)
+            f.flush()
+            os.fsync(f.fileno())
+        os.close(self.journal_fd)
+        os.replace(tmp_path, self.journal_path)
+        self._open_journal()
+        self.compactions += 1
+
+    def close(self, core=None):
+        """结束：传入core时先记录关闭事件（之后不再恢复），等待后台线程写完"""
+        if core is not None:
+            self.record('close', core)
+        if self.thread:
+            self.queue.put(None)
+            self.thread.join()
+            self.thread = None
+        if self.journal_fd is not None:
+            os.fsync(self.journal_fd)
+            os.close(self.journal_fd)
+            self.journal_fd = None
+        if self.snapshot is not None:
+            self.snapshot.flush()
+            self.snapshot.close()
+            self.snapshot = None
+        if self.lock_fd is not None:
+            _unlock(self.lock_fd)
+            self.lock_fd = None
+
+    def stats(self):
+        """统计信息：事件数、调用线程平均写入耗时、日志记录数与压缩次数"""
+        return {
+            'events': self.events,
+            'record_us': self.record_seconds / self.events * 1e6 if self.events else 0.0,
+            'journal_records': self.journal_records,
+            'compactions': self.compactions,
+        }
+
+
+def benchmark(events=20000):
+    """在临时目录中记录大量事件（含多次压缩），测量每个事件的写入开销、全部落盘耗时与恢复耗时"""
+    import tempfile
+    from countdown_core import CountdownCore
+    with tempfile.TemporaryDirectory() as directory:
+        core = CountdownCore(profile_store.DEFAULT_SETTINGS)
+        journal = StateJournal(directory).open()
+        journal.save_settings(profile_store.DEFAULT_SETTINGS)
+        begin = time.perf_counter()
+        for index in range(events):
+            core.pause()
+            journal.record('pause' if core.is_paused else 'resume', core)
+        submitted = time.perf_counter() - begin
+        stats = journal.stats()
+        journal.close()
+        durable = time.perf_counter() - begin
+        begin = time.perf_counter()
+        record, _ = recover(directory)
+        recovered = time.perf_counter() - begin
+        # 状态文件损坏时从日志末尾恢复
+        with open(os.path.join(directory, STATE_FILE), "r+b") as f:
+            f.write(b"\0" * 2 * FRAME_SIZE)
+        begin = time.perf_counter()
+        fallback, _ = recover(directory)
+        journal_only = time.perf_counter() - begin
+        return {
+            'events': events,
+            'record_us': stats['record_us'],
+            'submit_us': submitted / events * 1e6,
+            'durable_ms': durable * 1000,  # 全部事件写入日志并落盘的总耗时
+            'compactions': stats['compactions'],
+            'journal_bytes': os.path.getsize(os.path.join(directory, JOURNAL_FILE)),
+            'recover_ms': recovered * 1000,
+            'recover_journal_only_ms': journal_only * 1000,
+            'recovered_seq_ok': record['seq'] == events and fallback['seq'] == events,
+        }
+
+
+if __name__ == "__main__":
+    if "--bench" in sys.argv[1:]:
+        print(f"状态日志：{benchmark()}")
+    else:
+        result = recover()
+        if result is None:
+            print("没有可恢复的倒计时")
+        else:
+            record, settings = result
+            print(f"可恢复：{record['kind']}（序号{record['seq']}），总时长 {record['total']}秒，"
+                  f"剩余 {remaining_seconds(record):.1f}秒，暂停={record['paused']}，停止={record['stopped']}")
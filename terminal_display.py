@@ -0,0 +1,341 @@
+"""
+countDowner 终端显示：无图形界面的Linux机器（SSH、tmux）上用ANSI转义序列显示倒计时
+与Tk窗口共用同一倒计时核心（format_time、三个阶段、负计时/自定义超时文字），
+用方块字绘制大号数字，每秒只输出内容变化的字符格子，不重绘整个屏幕
+    python terminal_display.py --quick
+    python terminal_display.py --minutes 5 --colors 256
+    python terminal_display.py --bench
+按键：空格 暂停/继续，r 重置，s 停止，+/- 加减一分钟，q 退出
+"""
+import io
+import os
+import shutil
+import sys
+import time
+import unicodedata
+
+from countdown_core import CountdownCore
+import profile_store
+
+# 3x5 点阵，每个点横向画两个方块字符，近似正方形
+BLOCK_FONT = {
+    '0': ("###", "# #", "# #", "# #", "###"),
+    '1': (" # ", "## ", " # ", " # ", "###"),
+    '2': ("###", "  #", "###", "#  ", "###"),
+    '3': ("###", "  #", "###", "  #", "###"),
+    '4': ("# #", "# #", "###", "  #", "  #"),
+    '5': ("###", "#  ", "###", "  #", "###"),
+    '6': ("###", "#  ", "###", "# #", "###"),
+    '7': ("###", "  #", "  #", "  #", "  #"),
+    '8': ("###", "# #", "###", "# #", "###"),
+    '9': ("###", "# #", "###", "  #", "###"),
+    ':': (" ", "#", " ", "#", " "),
+    '-': ("   ", "   ", "###", "   ", "   "),
+}
+GLYPH_ROWS = 5
+PADDING_X, PADDING_Y = 4, 1  # 背景面板留白（列/行）
+BLOCK = "█"
+DEFAULT_STYLE = (None, None)  # 面板外的格子：终端默认颜色
+
+ESC = "\x1b["
+ENTER_SCREEN = "\x1b[?1049h\x1b[?25l\x1b[2J"  # 备用屏幕、隐藏光标、清屏
+LEAVE_SCREEN = "\x1b[0m\x1b[?25h\x1b[?1049l"
+
+
+def _hex_to_rgb(color):
+    color = color.lstrip('#')
+    return tuple(int(color[i:i + 2], 16) for i in (0, 2, 4))
+
+
+def _rgb_to_256(r, g, b):
+    """24位颜色 -> xterm 256色的 6x6x6 色块编号"""
+    def level(value):
+        return 0 if value < 48 else 1 if value < 115 else (value - 35) // 40
+    return 16 + 36 * level(r) + 6 * level(g) + level(b)
+
+
+def char_width(char):
+    """字符在终端中占用的列数（中日韩全角字符为2）"""
+    return 2 if unicodedata.east_asian_width(char) in ('W', 'F') else 1
+
+
+class TerminalFrame:
+    """
+    把倒计时文字排版为字符格子：每个格子为 (字符, (文字色, 背景色))，
+    全角字符占两格，第二格字符为None（输出时跳过）
+    """
+    def __init__(self, columns, rows):
+        self.columns = columns
+        self.rows = rows
+
+    def blank(self):
+        return [[(" ", DEFAULT_STYLE)] * self.columns for _ in range(self.rows)]
+
+    def compose(self, text, fg, bg):
+        """数字、冒号、负号用方块大字，其它文字（自定义超时文字）按原样居中一行"""
+        grid = self.blank()
+        if all(char in BLOCK_FONT for char in text):
+            lines = self._block_lines(text)
+        else:
+            lines = [[(char, char_width(char)) for char in text]]
+        width = max(sum(w for _, w in line) for line in lines)
+        height = len(lines)
+        panel_w = min(self.columns, width + PADDING_X * 2)
+        panel_h = min(self.rows, height + PADDING_Y * 2)
+        left = max(0, (self.columns - panel_w) // 2)
+        top = max(0, (self.rows - panel_h) // 2)
+        panel_style = (bg, bg)
+        for y in range(top, top + panel_h):
+            grid[y][left:left + panel_w] = [(" ", panel_style)] * panel_w
+        text_style = (fg, bg)
+        y = top + (panel_h - height) // 2
+        for line in lines:
+            x = left + max(0, (panel_w - sum(w for _, w in line)) // 2)
+            if y >= self.rows:
+                break
+            row = grid[y]
+            for char, w in line:
+                if x + w > left + panel_w:
+                    break
+                if char != " ":
+                    row[x] = (char, text_style)
+                    if w == 2:
+                        row[x + 1] = (None, text_style)
+                x += w
+            y += 1
+        return grid
+
+    @staticmethod
+    def _block_lines(text):
+        lines = []
+        for row in range(GLYPH_ROWS):
+            line = []
+            for index, char in enumerate(text):
+                if index:
+                    line.append((" ", 1))
+                    line.append((" ", 1))
+                for dot in BLOCK_FONT[char][row]:
+                    line.extend([(BLOCK if dot == "#" else " ", 1)] * 2)
+            lines.append(line)
+        return lines
+
+
+class AnsiRenderer:
+    """
+    差量输出：与上一帧逐格比较，只为变化的连续格子输出一次光标定位，
+    颜色与上一个输出的格子相同时不重复输出颜色序列
+    """
+    def __init__(self, stream, colors='24bit'):
+        self.stream = stream
+        self.colors = colors  # 24bit / 256
+        self.previous = None  # 上一帧
+        self._sgr_cache = {}  # 样式 -> 颜色转义序列
+        self.ticks = 0
+        self.bytes_written = 0
+        self.max_bytes = 0
+        self.last_bytes = 0
+        self.render_seconds = 0.0
+        self.max_render_seconds = 0.0
+
+    def _sgr(self, style):
+        sgr = self._sgr_cache.get(style)
+        if sgr is None:
+            fg, bg = style
+            parts = ["0"]
+            for color, base in ((fg, 38), (bg, 48)):
+                if color is None:
+                    continue
+                r, g, b = _hex_to_rgb(color)
+                parts.append(f"{base};2;{r};{g};{b}" if self.colors == '24bit' else f"{base};5;{_rgb_to_256(r, g, b)}")
+            sgr = self._sgr_cache[style] = f"{ESC}{';'.join(parts)}m"
+        return sgr
+
+    def invalidate(self):
+        """下一帧整屏输出（终端尺寸变化、首次显示）"""
+        self.previous = None
+
+    def diff(self, grid):
+        """生成从上一帧到本帧的转义序列"""
+        previous = self.previous
+        out = []
+        if previous is None or len(previous) != len(grid) or len(previous[0]) != len(grid[0]):
+            # 整屏输出：清屏后按空白屏幕比较，面板外的空白格子不再输出
+            out.append(f"{ESC}0m{ESC}2J")
+            previous = [[(" ", DEFAULT_STYLE)] * len(grid[0])] * len(grid)
+        current_style = None
+        for y, row in enumerate(grid):
+            old = previous[y]
+            if old == row:
+                continue
+            x = 0
+            columns = len(row)
+            while x < columns:
+                if old[x] == row[x]:
+                    x += 1
+                    continue
+                # 变化的是全角字符的第二格时，从第一格开始重绘
+                start = x - 1 if row[x][0] is None and x > 0 else x
+                out.append(f"{ESC}{y + 1};{start + 1}H")
+                x = start
+                while x < columns and (old[x] != row[x] or row[x][0] is None):
+                    char, style = row[x]
+                    if char is not None:
+                        if style != current_style:
+                            out.append(self._sgr(style))
+                            current_style = style
+                        out.append(char)
+                    x += 1
+        self.previous = grid
+        return "".join(out)
+
+    def render(self, grid):
+        """输出一帧，返回写入的字节数"""
+        begin = time.perf_counter()
+        data = self.diff(grid).encode("utf-8")
+        if data:
+            self.stream.write(data)
+            self.stream.flush()
+        elapsed = time.perf_counter() - begin
+        self.ticks += 1
+        self.last_bytes = len(data)
+        self.bytes_written += len(data)
+        self.max_bytes = max(self.max_bytes, len(data))
+        self.render_seconds += elapsed
+        self.max_render_seconds = max(self.max_render_seconds, elapsed)
+        return len(data)
+
+    def stats(self):
+        return {
+            'ticks': self.ticks,
+            'bytes_per_tick': self.bytes_written / self.ticks if self.ticks else 0.0,
+            'max_bytes': self.max_bytes,
+            'render_avg_ms': self.render_seconds / self.ticks * 1000 if self.ticks else 0.0,
+            'render_max_ms': self.max_render_seconds * 1000,
+        }
+
+
+class TerminalCountdown:
+    """终端倒计时：按截止时刻在整秒边界唤醒，阶段颜色查表，差量输出到终端"""
+    def __init__(self, settings, stream=None, colors='24bit', clock=time.monotonic):
+        self.core = CountdownCore(settings, clock=clock)
+        self.stream = stream or sys.stdout.buffer
+        self.renderer = AnsiRenderer(self.stream, colors)
+        fg_timeout = settings['warning_fg'] if settings['timeout_mode'] == 'negative' else settings['timeout_text_color']
+        # 阶段样式：(文字色, 背景色)；终端没有透明度，忽略透明度设置
+        self.stage_styles = {
+            'normal': (settings['normal_fg'], settings['normal_bg']),
+            'remind': (settings['remind_fg'], settings['remind_bg']),
+            'warning': (settings['warning_fg'], settings['warning_bg']),
+            'timeout': (fg_timeout, settings['warning_bg']),
+        }
+        self.size = None
+        self.frame = None
+
+    def draw(self):
+        """重新排版并差量输出当前状态"""
+        size = shutil.get_terminal_size()
+        if size != self.size:
+            self.size = size
+            self.frame = TerminalFrame(size.columns, size.lines)
+            self.renderer.invalidate()
+        fg, bg = self.stage_styles[self.core.stage]
+        return self.renderer.render(self.frame.compose(self.core.display_text(), fg, bg))
+
+    def handle_key(self, key):
+        """处理按键，返回False表示退出"""
+        core = self.core
+        if key == 'q':
+            return False
+        if key == ' ':
+            core.pause()
+        elif key == 'r':
+            core.reset()
+        elif key == 's':
+            core.stop()
+        elif key in '+=':
+            core.adjust(60)
+        elif key in '-_':
+            core.adjust(-60)
+        return True
+
+    def run(self):
+        """主循环：终端为交互终端时读取按键，否则只显示"""
+        import select
+        keys = sys.stdin if sys.stdin.isatty() else None
+        saved = None
+        if keys is not None:
+            import termios
+            import tty
+            saved = termios.tcgetattr(keys)
+            tty.setcbreak(keys)
+        self.stream.write(ENTER_SCREEN.encode())
+        try:
+            while True:
+                if self.core.is_running:
+                    self.core.tick()
+                self.draw()
+                timeout = self.core.next_wakeup_ms() / 1000 if self.core.is_running else None
+                if keys is None:
+                    time.sleep(timeout if timeout is not None else 1)
+                    continue
+                ready, _, _ = select.select([keys], [], [], timeout)
+                if ready and not self.handle_key(os.read(keys.fileno(), 1).decode(errors='ignore')):
+                    break
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.stream.write(LEAVE_SCREEN.encode())
+            self.stream.flush()
+            if saved is not None:
+                termios.tcsetattr(keys, termios.TCSADRAIN, saved)
+        return self.renderer.stats()
+
+
+def benchmark(minutes=3, columns=80, rows=24, colors='24bit'):
+    """无终端基准测试：逐秒渲染整段倒计时（含负计时），比较差量输出与整屏重绘的字节数"""
+    from countdown_core import VirtualClock
+    settings = dict(profile_store.DEFAULT_SETTINGS, total=minutes, remind=1, warning=30)
+    clock = VirtualClock()
+    app = TerminalCountdown(settings, stream=io.BytesIO(), colors=colors, clock=clock)
+    frame = TerminalFrame(columns, rows)
+    full = AnsiRenderer(io.BytesIO(), colors)
+    app.size, app.frame = os.terminal_size((columns, rows)), frame
+    for _ in range(minutes * 60 + 60):
+        app.core.tick()
+        fg, bg = app.stage_styles[app.core.stage]
+        grid = frame.compose(app.core.display_text(), fg, bg)
+        app.renderer.render(grid)
+        full.invalidate()
+        full.render(grid)
+        clock.advance(1)
+    result = app.renderer.stats()
+    result['full_repaint_bytes_per_tick'] = full.stats()['bytes_per_tick']
+    return result
+
+
+def main(argv=None):
+    import argparse
+    parser = argparse.ArgumentParser(description="countDowner 终端显示")
+    parser.add_argument('--quick', action='store_true', help="使用上次的设置")
+    parser.add_argument('--profile', metavar='NAME', help="使用指定名称的配置档案")
+    parser.add_argument('--minutes', type=int, metavar='N', help="本次倒计时分钟数")
+    parser.add_argument('--colors', choices=('24bit', '256'), default='24bit',
+                        help="颜色模式：24bit真彩色，或终端/tmux不支持真彩色时用256色")
+    parser.add_argument('--bench', action='store_true', help="无终端测量每秒输出字节数与渲染耗时")
+    args = parser.parse_args(argv)
+    if args.bench:
+        print(f"终端显示：{benchmark(colors=args.colors)}")
+        return 0
+    settings = None
+    if args.quick or args.profile:
+        settings = profile_store.load_profile(args.profile)
+    settings = settings or dict(profile_store.DEFAULT_SETTINGS)
+    if args.minutes:
+        settings = profile_store.with_duration(settings, args.minutes)
+    stats = TerminalCountdown(settings, colors=args.colors).run()
+    print(f"终端显示统计：{stats}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,151 @@
+"""
+countDowner 计时记录：定长环形缓冲区记录每次唤醒的 计划时刻/实际时刻/样式刷新耗时/Tk调用数/阶段，
+用于事后判断倒计时何时迟到、迟到多少（事件循环阻塞、颜色对话框、窗口透明度设置等）
+缓冲区预先分配，每次记录只写几个数组元素，现场使用时可一直开启
+    python tick_trace.py trace.json   # 打印导出文件的汇总
+"""
+import array
+import bisect
+import json
+import math
+import sys
+import time
+
+STAGE_CODES = ('normal', 'remind', 'warning', 'timeout')  # 阶段 -> 数组中保存的编号
+LATENESS_EDGES_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)  # 迟到直方图桶上界（毫秒）
+DEFAULT_CAPACITY = 4096  # 默认记录条数（每秒一次约一小时以上）
+
+
+def _percentile(sorted_values, p):
+    if not sorted_values:
+        return None
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * p))]
+
+
+def _histogram(values_ms, edges):
+    counts = [0] * (len(edges) + 1)
+    for value in values_ms:
+        counts[bisect.bisect_left(edges, value)] += 1
+    labels = [f"<={edge}ms" for edge in edges] + [f">{edges[-1]}ms"]
+    return dict(zip(labels, counts))
+
+
+class TickTrace:
+    """
+    环形缓冲区：各字段分别存放在预分配的定长数组中，写满后覆盖最旧的记录
+    计划时刻为NaN表示非定时唤醒（首次显示、重置、加减时后的立即刷新），不计入迟到统计
+    """
+    def __init__(self, capacity=DEFAULT_CAPACITY, clock=time.perf_counter):
+        self.capacity = capacity
+        self.clock = clock  # 记录用时钟（与after调度的墙钟一致，不受多机同步偏移影响）
+        self.scheduled = array.array('d', [math.nan]) * capacity  # 计划唤醒时刻
+        self.actual = array.array('d', [0.0]) * capacity  # 实际唤醒时刻
+        self.style_seconds = array.array('d', [0.0]) * capacity  # 样式刷新（含标签更新）耗时
+        self.tk_calls = array.array('B', [0]) * capacity  # 本次刷新的Tk调用次数
+        self.stages = array.array('B', [0]) * capacity  # 阶段编号
+        self.count = 0  # 累计记录数（含已被覆盖的）
+        self.origin = clock()  # 时间起点，导出时换算为相对秒数
+
+    def record(self, scheduled, actual, style_seconds, tk_calls, stage):
+        """写入一条记录"""
+        index = self.count % self.capacity
+        self.scheduled[index] = math.nan if scheduled is None else scheduled
+        self.actual[index] = actual
+        self.style_seconds[index] = style_seconds
+        self.tk_calls[index] = min(tk_calls, 255)
+        self.stages[index] = STAGE_CODES.index(stage)
+        self.count += 1
+
+    def _indices(self):
+        """按时间顺序排列的有效记录下标"""
+        if self.count <= self.capacity:
+            return range(self.count)
+        start = self.count % self.capacity
+        return [(start + offset) % self.capacity for offset in range(self.capacity)]
+
+    def records(self):
+        """按时间顺序返回记录字典列表（时刻为相对起点的秒数）"""
+        origin = self.origin
+        result = []
+        for index in self._indices():
+            scheduled = self.scheduled[index]
+            result.append({
+                'scheduled': None if math.isnan(scheduled) else round(scheduled - origin, 6),
+                'actual': round(self.actual[index] - origin, 6),
+                'late_ms': None if math.isnan(scheduled) else round((self.actual[index] - scheduled) * 1000, 3),
+                'style_ms': round(self.style_seconds[index] * 1000, 3),
+                'tk_calls': self.tk_calls[index],
+                'stage': STAGE_CODES[self.stages[index]],
+            })
+        return result
+
+    def summary(self):
+        """汇总：迟到与样式刷新耗时的分位数/直方图，最严重的一次迟到及各阶段记录数"""
+        lateness = []
+        worst = None
+        style = []
+        stages = dict.fromkeys(STAGE_CODES, 0)
+        for index in self._indices():
+            scheduled = self.scheduled[index]
+            style.append(self.style_seconds[index] * 1000)
+            stages[STAGE_CODES[self.stages[index]]] += 1
+            if math.isnan(scheduled):
+                continue
+            late = (self.actual[index] - scheduled) * 1000
+            lateness.append(late)
+            if worst is None or late > worst[0]:
+                worst = (late, self.actual[index] - self.origin)
+        lateness_sorted = sorted(lateness)
+        style_sorted = sorted(style)
+        mean = sum(lateness) / len(lateness) if lateness else None
+        return {
+            'recorded': self.count,
+            'kept': len(style),
+            'late_p50_ms': _percentile(lateness_sorted, 0.5),
+            'late_p90_ms': _percentile(lateness_sorted, 0.9),
+            'late_p99_ms': _percentile(lateness_sorted, 0.99),
+            'late_max_ms': worst[0] if worst else None,
+            'late_max_at': worst[1] if worst else None,  # 最严重迟到发生的时刻（相对起点秒数）
+            # 抖动：迟到的标准差
+            'jitter_ms': math.sqrt(sum((x - mean) ** 2 for x in lateness) / len(lateness)) if lateness else None,
+            'late_histogram': _histogram(lateness, LATENESS_EDGES_MS),
+            'style_p50_ms': _percentile(style_sorted, 0.5),
+            'style_p99_ms': _percentile(style_sorted, 0.99),
+            'style_max_ms': style_sorted[-1] if style_sorted else None,
+            'stages': stages,
+        }
+
+    def export(self, path, extra=None):
+        """导出为JSON文件（汇总 + 按时间顺序的全部记录）"""
+        data = {'summary': self.summary(), 'records': self.records()}
+        if extra:
+            data.update(extra)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=1)
+        return path
+
+
+def benchmark(samples=1000000):
+    """记录开销：每次 record() 的平均耗时（微秒）"""
+    trace = TickTrace()
+    clock = trace.clock
+    begin = time.perf_counter()
+    for _ in range(samples):
+        now = clock()
+        trace.record(now, now, 0.0001, 2, 'remind')
+    elapsed = time.perf_counter() - begin
+    return {'record_us': elapsed / samples * 1e6, 'summary_ms': _timed(trace.summary) * 1000}
+
+
+def _timed(fn):
+    begin = time.perf_counter()
+    fn()
+    return time.perf_counter() - begin
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] != "--bench":
+        with open(sys.argv[1], encoding="utf-8") as f:
+            print(json.dumps(json.load(f)['summary'], ensure_ascii=False, indent=1))
+    else:
+        print(f"计时记录开销：{benchmark()}")
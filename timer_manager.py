@@ -0,0 +1,249 @@
+"""
+countDowner 多计时器管理：一个进程内承载数百个独立倒计时（如多会场各一个）
+所有计时器共用一个最小堆调度器，每次唤醒只占用一个Tk after回调，
+落在同一时间槽内的到期计时器合并为一次唤醒处理
+    python timer_manager.py --timers 500 --minutes 30
+"""
+import argparse
+import heapq
+import itertools
+import math
+import sys
+import time
+import tracemalloc
+
+from countdown_core import CountdownCore, VirtualClock
+
+
+class TimerRecord:
+    """单个计时器的紧凑记录（__slots__，不带实例字典）"""
+    __slots__ = ('timer_id', 'core', 'on_update', 'slot')
+
+    def __init__(self, timer_id, core, on_update):
+        self.timer_id = timer_id  # 计时器ID
+        self.core = core  # 无界面倒计时核心
+        self.on_update = on_update  # 显示变化回调：on_update(timer_id, core)
+        self.slot = None  # 下一次到期的时间槽，None表示未调度（暂停/停止）
+
+
+class TimerManager:
+    """
+    多计时器共享调度器：堆中按时间槽排序，过期条目惰性丢弃
+    传入Tk根窗口时自动用 root.after 驱动；不传时由调用方循环调用 run_due()
+    """
+    def __init__(self, root=None, clock=time.monotonic, resolution=0.01):
+        self.root = root  # Tk根窗口，可为None（无界面运行）
+        self.clock = clock  # 所有计时器共用的时钟
+        self.resolution = resolution  # 时间槽长度（秒），同一槽内到期的计时器合并唤醒
+        self.timers = {}  # 计时器ID -> TimerRecord
+        self._heap = []  # (时间槽, 序号, 记录)
+        self._seq = itertools.count()  # 堆内同槽条目的稳定排序
+        self._ids = itertools.count(1)  # 自动分配计时器ID
+        self.after_id = None  # 当前挂起的after任务ID
+        self._armed_slot = None  # 当前after任务对应的时间槽
+        self.wakeups = 0  # 唤醒次数
+        self.ticks = 0  # 计时器tick总数
+
+    def add(self, settings, on_update=None, timer_id=None):
+        """添加并启动一个计时器（settings 同 _get_settings_result 的返回值），返回计时器ID"""
+        if timer_id is None:
+            timer_id = next(self._ids)
+        if timer_id in self.timers:
+            raise ValueError(f"计时器ID已存在：{timer_id}")
+        record = TimerRecord(timer_id, CountdownCore(settings, clock=self.clock), on_update)
+        self.timers[timer_id] = record
+        self._notify(record)
+        self._schedule(record)
+        self._arm()
+        return timer_id
+
+    def remove(self, timer_id):
+        """移除计时器，堆中残留条目在出堆时丢弃"""
+        record = self.timers.pop(timer_id)
+        record.slot = None
+        self._arm()
+
+    def get(self, timer_id):
+        """返回计时器的倒计时核心"""
+        return self.timers[timer_id].core
+
+    def reset(self, timer_id):
+        """重置计时器"""
+        record = self.timers[timer_id]
+        record.core.reset()
+        self._notify(record)
+        self._schedule(record)
+        self._arm()
+
+    def pause(self, timer_id, paused=None):
+        """暂停/继续计时器（paused为None时切换），暂停期间不占用调度"""
+        record = self.timers[timer_id]
+        if paused is not None and paused == record.core.is_paused:
+            return
+        record.core.pause()
+        self._schedule(record)
+        self._arm()
+
+    def stop(self, timer_id):
+        """停止计时器"""
+        record = self.timers[timer_id]
+        record.core.stop()
+        record.slot = None
+        self._arm()
+
+    def adjust(self, timer_id, seconds):
+        """加时/减时，按新的剩余时间重新调度"""
+        record = self.timers[timer_id]
+        record.core.adjust(seconds)
+        self._notify(record)
+        self._schedule(record)
+        self._arm()
+
+    def set_thresholds(self, timer_id, remind_seconds=None, warning_seconds=None):
+        """修改提醒/警告阈值（秒）"""
+        record = self.timers[timer_id]
+        record.core.set_thresholds(remind_seconds, warning_seconds)
+        self._notify(record)
+
+    def status(self, timer_id):
+        """计时器状态快照"""
+        return self.timers[timer_id].core.snapshot()
+
+    def timer_ids(self):
+        """全部计时器ID"""
+        return list(self.timers)
+
+    def _notify(self, record):
+        if record.on_update:
+            record.on_update(record.timer_id, record.core)
+
+    def _schedule(self, record):
+        """按核心给出的下一次显示变化时刻入堆（向上取整到时间槽）"""
+        if not record.core.is_running:
+            record.slot = None
+            return
+        due = self.clock() + record.core.next_wakeup_ms() / 1000
+        slot = math.ceil(due / self.resolution)
+        if slot == record.slot:
+            return  # 堆中已有同一时间槽的有效条目
+        record.slot = slot
+        heapq.heappush(self._heap, (slot, next(self._seq), record))
+
+    def _next_slot(self):
+        """丢弃失效的堆顶条目，返回最早的有效时间槽"""
+        heap = self._heap
+        while heap:
+            slot, _, record = heap[0]
+            if record.slot == slot and self.timers.get(record.timer_id) is record:
+                return slot
+            heapq.heappop(heap)
+        return None
+
+    def next_delay_ms(self):
+        """距下一次唤醒的毫秒数，没有待运行的计时器时返回None"""
+        slot = self._next_slot()
+        if slot is None:
+            return None
+        return max(0, math.ceil((slot * self.resolution - self.clock()) * 1000))
+
+    def run_due(self):
+        """处理所有已到期的时间槽（一次唤醒批量tick），返回本次tick的计时器数"""
+        self.wakeups += 1
+        current = math.floor(self.clock() / self.resolution + 1e-9)
+        heap = self._heap
+        due = []
+        while True:
+            slot = self._next_slot()
+            if slot is None or slot > current:
+                break
+            record = heapq.heappop(heap)[2]
+            record.slot = None  # 已出堆，之后重新入堆
+            due.append(record)
+        for record in due:
+            record.core.tick()
+            self._notify(record)
+            self._schedule(record)
+        self.ticks += len(due)
+        return len(due)
+
+    def _arm(self):
+        """Tk驱动：保证只挂起一个after回调，并指向最早的时间槽"""
+        if self.root is None:
+            return
+        slot = self._next_slot()
+        if slot == self._armed_slot and self.after_id:
+            return
+        if self.after_id:
+            self.root.after_cancel(self.after_id)
+            self.after_id = None
+        self._armed_slot = slot
+        if slot is not None:
+            self.after_id = self.root.after(self.next_delay_ms(), self._on_wakeup)
+
+    def _on_wakeup(self):
+        self.after_id = None
+        self._armed_slot = None
+        self.run_due()
+        self._arm()
+
+    def close(self):
+        """取消挂起的唤醒"""
+        if self.root is not None and self.after_id:
+            self.root.after_cancel(self.after_id)
+        self.after_id = None
+
+    def stats(self):
+        """统计信息：计时器数、唤醒次数、tick总数、平均每次唤醒处理的计时器数"""
+        return {
+            'timers': len(self.timers),
+            'wakeups': self.wakeups,
+            'ticks': self.ticks,
+            'ticks_per_wakeup': self.ticks / self.wakeups if self.wakeups else 0.0,
+        }
+
+
+def benchmark(timers=500, minutes=30, resolution=0.01):
+    """用虚拟时钟模拟多会场计时器，统计每100个计时器的CPU开销与单个计时器内存"""
+    settings = {'total': 60, 'remind': 5, 'warning': 30, 'timeout_mode': 'negative', 'timeout_text': "时间到！"}
+    clock = VirtualClock()
+    manager = TimerManager(clock=clock, resolution=resolution)
+
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    for index in range(timers):
+        # 各会场开始时刻错开，部分计时器整秒对齐以体现合并唤醒
+        clock.now = (index % 7) * 0.137
+        manager.add(settings)
+    bytes_per_timer = (tracemalloc.get_traced_memory()[0] - before) / timers
+    tracemalloc.stop()
+
+    clock.now = 1.0
+    end = clock.now + minutes * 60
+    begin = time.process_time()
+    while clock.now < end:
+        clock.advance(manager.next_delay_ms() / 1000)
+        manager.run_due()
+    cpu = time.process_time() - begin
+    result = manager.stats()
+    result.update({
+        'simulated_minutes': minutes,
+        'bytes_per_timer': bytes_per_timer,
+        'cpu_ms': cpu * 1000,
+        # 每100个计时器每分钟（模拟时间）消耗的CPU毫秒数
+        'cpu_ms_per_100_timers_per_minute': cpu * 1000 / minutes / (timers / 100),
+    })
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="countDowner 多计时器调度基准测试")
+    parser.add_argument('--timers', type=int, default=500, help="同时运行的计时器数")
+    parser.add_argument('--minutes', type=float, default=30, help="模拟运行的分钟数")
+    parser.add_argument('--resolution', type=float, default=0.01, help="合并唤醒的时间槽长度（秒）")
+    args = parser.parse_args(argv)
+    print(f"多计时器调度：{benchmark(args.timers, args.minutes, args.resolution)}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
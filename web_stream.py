@@ -0,0 +1,384 @@
+"""
+countDowner 网页显示：本机轻量HTTP服务，提供一个小页面并通过 Server-Sent Events 推送倒计时状态，
+可用于OBS浏览器源和观众手机，无需安装任何软件
+    GET /         显示页面（?transparent=1 背景透明，便于OBS叠加）
+    GET /events   SSE状态流
+    GET /state    当前状态（JSON）
+每次tick只编码一次，再原样写给所有订阅者；写缓冲积压的慢客户端跳过本次（下一次状态为完整状态），
+连续积压则断开
+    python web_stream.py --bench --clients 2000 --seconds 10
+"""
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+
+WEB_HOST = "0.0.0.0"
+WEB_PORT = 47294  # 默认HTTP端口
+COALESCE_BYTES = 4096  # 写缓冲超过该值时跳过本次推送
+DROP_SKIPS = 30  # 连续跳过该次数（每秒一次推送时约30秒）后断开客户端
+SEND_BUFFER_BYTES = 16384  # 订阅连接的内核发送缓冲，限制每个连接的内存并让积压尽早可见
+KEEPALIVE_SECONDS = 15  # 无状态更新时的心跳间隔（暂停/停止期间）
+CLIENTS_PER_PROCESS = 500  # 压测时每个客户端子进程的连接数
+
+PAGE = """<!DOCTYPE html>
+<html lang="zh"><head><meta charset="utf-8">
+<meta name="viewport" content="width=device-width,initial-scale=1">
+<title>countDowner</title>
+<style>
+html,body{margin:0;height:100%;font-family:SimHei,"Microsoft YaHei",sans-serif}
+body{display:flex;align-items:center;justify-content:center;transition:background .3s}
+#t{font-size:22vw;font-weight:bold;font-variant-numeric:tabular-nums}
+#s{position:fixed;bottom:1em;width:100%;text-align:center;font-size:4vw;opacity:.6}
+</style></head>
+<body><div id="t">--:--</div><div id="s"></div>
+<script>
+const transparent = new URLSearchParams(location.search).has('transparent');
+const t = document.getElementById('t'), s = document.getElementById('s');
+const es = new EventSource('/events');
+es.onmessage = e => {
+  const state = JSON.parse(e.data);
+  t.textContent = state.text;
+  t.style.color = state.fg;
+  t.style.opacity = state.fg_alpha;
+  document.body.style.background = transparent ? 'transparent' : state.bg;
+  s.textContent = state.stopped ? '已停止' : state.paused ? '已暂停' : '';
+};
+es.onerror = () => { s.textContent = '连接中断，正在重连…'; };
+</script></body></html>
+""".encode("utf-8")
+
+
+def _response(status, content_type, body, extra=""):
+    return (f"HTTP/1.1 {status}\r\nContent-Type: {content_type}\r\nContent-Length: {len(body)}\r\n"
+            f"Cache-Control: no-cache\r\nConnection: close\r\n{extra}\r\n").encode() + body
+
+
+class _ClientProtocol(asyncio.Protocol):
+    """单个连接：解析请求行后返回页面/状态，或登记为SSE订阅者（不为每个连接创建协程）"""
+    __slots__ = ('server', 'transport', 'buffer')
+
+    def __init__(self, server):
+        self.server = server
+        self.transport = None
+        self.buffer = b""
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def data_received(self, data):
+        if self.buffer is None:
+            return  # 已登记为订阅者，忽略后续数据
+        self.buffer += data
+        if b"\r\n\r\n" not in self.buffer:
+            if len(self.buffer) > 8192:
+                self.transport.close()
+            return
+        request_line = self.buffer.split(b"\r\n", 1)[0].decode("latin-1")
+        self.buffer = None
+        parts = request_line.split()
+        path = parts[1].split("?", 1)[0] if len(parts) > 1 else "/"
+        self.server._handle_request(self.transport, path)
+
+    def connection_lost(self, exc):
+        self.server.clients.pop(self.transport, None)
+
+
+class StreamServer:
+    """
+    SSE推送服务：后台线程运行asyncio事件循环
+    publish(state) 可在任意线程调用：状态只编码一次，由事件循环线程写给全部订阅者
+    """
+    def __init__(self, host=WEB_HOST, port=WEB_PORT, coalesce_bytes=COALESCE_BYTES, drop_skips=DROP_SKIPS):
+        self.host = host
+        self.port = port
+        self.coalesce_bytes = coalesce_bytes
+        self.drop_skips = drop_skips
+        self.clients = {}  # 订阅者的transport -> 连续跳过次数
+        self.loop = None
+        self._server = None
+        self.last_state = None  # 最新状态（JSON字节）
+        self.last_event = b""  # 最新状态的SSE消息，新订阅者连接时立即收到
+        self.sequence = 0
+        self.published = 0  # 发布的状态数
+        self.deliveries = 0  # 成功写出的消息数
+        self.skipped = 0  # 因客户端积压跳过的消息数
+        self.dropped = 0  # 因积压过多断开的客户端数
+        self.fanout_seconds = 0.0  # 累计分发耗时
+        self.max_fanout_seconds = 0.0
+        self._ready = threading.Event()
+        self.error = None
+        self.thread = None
+
+    def start(self):
+        """启动后台线程并等待监听就绪，失败时抛出启动异常"""
+        self.thread = threading.Thread(target=self._run, name="countDowner-web", daemon=True)
+        self.thread.start()
+        self._ready.wait()
+        if self.error:
+            raise self.error
+        return self
+
+    def _run(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        try:
+            self._server = self.loop.run_until_complete(
+                self.loop.create_server(lambda: _ClientProtocol(self), self.host, self.port, backlog=4096))
+            self.port = self._server.sockets[0].getsockname()[1]
+        except OSError as e:
+            self.error = e
+            self._ready.set()
+            return
+        self._ready.set()
+        self.loop.call_later(KEEPALIVE_SECONDS, self._keepalive)
+        try:
+            self.loop.run_forever()
+        finally:
+            self._server.close()
+            for transport in list(self.clients):
+                transport.abort()
+            self.loop.close()
+
+    def _handle_request(self, transport, path):
+        if path == "/events":
+            sock = transport.get_extra_info('socket')
+            if sock is not None:
+                sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, SEND_BUFFER_BYTES)
+            transport.write(b"HTTP/1.1 200 OK\r\nContent-Type: text/event-stream\r\nCache-Control: no-cache\r\n"
+                            b"Connection: keep-alive\r\nAccess-Control-Allow-Origin: *\r\n\r\nretry: 1000\n\n"
+                            + self.last_event)
+            self.clients[transport] = 0
+        elif path == "/state":
+            transport.write(_response("200 OK", "application/json", self.last_state or b"null",
+                                      "Access-Control-Allow-Origin: *\r\n"))
+            transport.close()
+        elif path in ("/", "/index.html"):
+            transport.write(_response("200 OK", "text/html; charset=utf-8", PAGE))
+            transport.close()
+        else:
+            transport.write(_response("404 Not Found", "text/plain", b"not found"))
+            transport.close()
+
+    def publish(self, state):
+        """发布新状态：编码一次，转交事件循环分发"""
+        self.sequence += 1
+        state = dict(state, seq=self.sequence, sent_at=time.time())
+        body = json.dumps(state, ensure_ascii=False, separators=(',', ':')).encode("utf-8")
+        event = b"id: %d\ndata: %s\n\n" % (self.sequence, body)
+        self.published += 1
+        try:
+            self.loop.call_soon_threadsafe(self._fanout, body, event)
+        except RuntimeError:
+            pass  # 事件循环已关闭
+
+    def _fanout(self, body, event):
+        """事件循环线程：同一份字节写给全部订阅者，积压的跳过，连续积压的断开"""
+        begin = time.perf_counter()
+        self.last_state = body
+        self.last_event = event
+        clients, coalesce = self.clients, self.coalesce_bytes
+        delivered = 0
+        for transport, skips in list(clients.items()):
+            if transport.get_write_buffer_size() <= coalesce:
+                transport.write(event)
+                if skips:
+                    clients[transport] = 0
+                delivered += 1
+            elif skips + 1 >= self.drop_skips:
+                del clients[transport]
+                transport.abort()
+                self.dropped += 1
+            else:
+                clients[transport] = skips + 1
+                self.skipped += 1
+        self.deliveries += delivered
+        elapsed = time.perf_counter() - begin
+        self.fanout_seconds += elapsed
+        self.max_fanout_seconds = max(self.max_fanout_seconds, elapsed)
+
+    def _keepalive(self):
+        for transport in list(self.clients):
+            if transport.get_write_buffer_size() <= self.coalesce_bytes:
+                transport.write(b": ping\n\n")
+        self.loop.call_later(KEEPALIVE_SECONDS, self._keepalive)
+
+    def stats(self):
+        return {
+            'clients': len(self.clients),
+            'published': self.published,
+            'deliveries': self.deliveries,
+            'skipped': self.skipped,
+            'dropped': self.dropped,
+            'fanout_avg_ms': self.fanout_seconds / self.published * 1000 if self.published else 0.0,
+            'fanout_max_ms': self.max_fanout_seconds * 1000,
+        }
+
+    def close(self):
+        if self.loop and self.loop.is_running():
+            self.loop.call_soon_threadsafe(self.loop.stop)
+        if self.thread:
+            self.thread.join(2)
+
+
+def display_state(core, style):
+    """把倒计时核心的快照与当前阶段样式 (文字色, 背景色, 背景透明度, 文字透明度) 合成为推送状态"""
+    state = core.snapshot()
+    fg, bg, bg_alpha, fg_alpha = style
+    state.update({'timeout': core.stage == 'timeout', 'fg': fg, 'bg': bg, 'fg_alpha': fg_alpha})
+    return state
+
+
+def stage_colors(settings):
+    """设置 -> 阶段 -> (文字色, 背景色, 背景透明度, 文字透明度)"""
+    styles = {stage: (settings[f"{stage}_fg"], settings[f"{stage}_bg"], settings[f"{stage}_bg_alpha"],
+                      settings[f"{stage}_fg_alpha"]) for stage in ('normal', 'remind', 'warning')}
+    timeout_fg = settings['warning_fg'] if settings['timeout_mode'] == 'negative' else settings['timeout_text_color']
+    styles['timeout'] = (timeout_fg,) + styles['warning'][1:]
+    return styles
+
+
+def _percentile(sorted_values, p):
+    if not sorted_values:
+        return None
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * p))]
+
+
+def _raise_fd_limit():
+    """压测需要大量连接：把打开文件数软限制提高到硬限制"""
+    try:
+        import resource
+        soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+        resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+    except (ImportError, ValueError, OSError):
+        pass
+
+
+def _rss_bytes():
+    """当前进程常驻内存（仅Linux，其它平台返回None）"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        return None
+
+
+class _LoadClient(asyncio.Protocol):
+    """压测客户端连接：订阅 /events，记录每条消息从发布到收到的延迟（毫秒）"""
+    def __init__(self, latencies, slow):
+        self.latencies = latencies
+        self.slow = slow
+        self.pending = b""
+
+    def connection_made(self, transport):
+        if self.slow:
+            # 慢客户端：接收缓冲极小且从不读取，服务端应跳过并最终断开
+            transport.get_extra_info('socket').setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4096)
+            transport.pause_reading()
+        transport.write(b"GET /events HTTP/1.1\r\nHost: localhost\r\n\r\n")
+
+    def data_received(self, data):
+        now = time.time()
+        lines = (self.pending + data).split(b"\n")
+        self.pending = lines.pop()
+        for line in lines:
+            if line.startswith(b"data: "):
+                self.latencies.append(round((now - json.loads(line[6:])['sent_at']) * 1000, 3))
+
+
+async def _load_clients(host, port, clients, seconds, slow):
+    """压测客户端进程：建立 clients 个连接（前 slow 个为慢客户端），持续 seconds 秒后汇总"""
+    loop = asyncio.get_running_loop()
+    latencies = []
+    transports = []
+    for index in range(clients):
+        try:
+            transport, _ = await loop.create_connection(lambda: _LoadClient(latencies, index < slow), host, port)
+        except OSError:
+            continue
+        transports.append(transport)
+    await asyncio.sleep(seconds + 2)
+    for transport in transports:
+        transport.abort()
+    return {'connected': len(transports), 'latencies': latencies}
+
+
+def benchmark(clients=2000, seconds=10.0, rate=1.0, slow=0):
+    """
+    本机压测：本进程运行推送服务与模拟倒计时（每秒 rate 次推送），
+    子进程建立 clients 个订阅连接并统计延迟；服务端统计每个连接的内存
+    """
+    import tracemalloc
+    from countdown_core import CountdownCore
+    import profile_store
+
+    _raise_fd_limit()
+    settings = profile_store.DEFAULT_SETTINGS
+    core = CountdownCore(settings)
+    styles = stage_colors(settings)
+    tracemalloc.start()
+    server = StreamServer("127.0.0.1", 0).start()
+    rss_before = _rss_bytes()
+    traced_before = tracemalloc.get_traced_memory()[0]
+    # 客户端分散到多个子进程，避免压测客户端自身成为延迟瓶颈
+    processes = []
+    for start in range(0, clients, CLIENTS_PER_PROCESS):
+        count = min(CLIENTS_PER_PROCESS, clients - start)
+        processes.append(subprocess.Popen(
+            [sys.executable, __file__, '--clients-only', str(server.port), '--clients', str(count),
+             '--seconds', str(seconds), '--slow', str(max(0, min(count, slow - start)))],
+            stdout=subprocess.PIPE, text=True))
+    # 等待连接建立完成后再计算每连接内存
+    deadline = time.monotonic() + 30
+    while len(server.clients) < clients and time.monotonic() < deadline:
+        time.sleep(0.1)
+    per_connection = {
+        'subscribers': len(server.clients),
+        'traced_bytes_per_connection': (tracemalloc.get_traced_memory()[0] - traced_before) / max(1, len(server.clients)),
+    }
+    rss_after = _rss_bytes()
+    if rss_before is not None:
+        per_connection['rss_bytes_per_connection'] = (rss_after - rss_before) / max(1, len(server.clients))
+    tracemalloc.stop()
+    end = time.monotonic() + seconds
+    while time.monotonic() < end:
+        core.tick()
+        server.publish(display_state(core, styles[core.stage]))
+        time.sleep(1 / rate)
+    client_results = [json.loads(process.communicate()[0]) for process in processes]
+    server.close()
+    result = server.stats()
+    result.update(per_connection)
+    latencies = sorted(latency for client in client_results for latency in client.pop('latencies'))
+    result.update({
+        'connected': sum(client['connected'] for client in client_results),
+        'received': len(latencies),
+        'latency_p50_ms': _percentile(latencies, 0.5),
+        'latency_p99_ms': _percentile(latencies, 0.99),
+        'latency_max_ms': latencies[-1] if latencies else None,
+    })
+    return result
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="countDowner 网页推送压测")
+    parser.add_argument('--bench', action='store_true', help="本机压测")
+    parser.add_argument('--clients', type=int, default=2000, help="订阅连接数")
+    parser.add_argument('--seconds', type=float, default=10.0)
+    parser.add_argument('--rate', type=float, default=1.0, help="每秒推送次数")
+    parser.add_argument('--slow', type=int, default=0, help="其中从不读取的慢客户端数")
+    parser.add_argument('--clients-only', type=int, metavar='PORT', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.clients_only:
+        _raise_fd_limit()
+        print(json.dumps(asyncio.run(_load_clients("127.0.0.1", args.clients_only, args.clients,
+                                                   args.seconds, args.slow))))
+    elif args.bench:
+        print(f"网页推送压测：{json.dumps(benchmark(args.clients, args.seconds, args.rate, args.slow), ensure_ascii=False)}")
+    else:
+        parser.print_help()
@@ -0,0 +1,237 @@
+"""
+countDowner 窗口拖拽合并：本地记录窗口位置，不在每个移动事件中查询窗口坐标，
+同一帧内的多个移动事件合并为一次 geometry 调用；松开时吸附屏幕边缘/角落，
+并按显示器布局记住窗口位置
+    python window_drag.py --bench --rate 1000 --seconds 2
+"""
+import sys
+
+DRAG_FRAME_MS = 16  # 拖拽期间两次 geometry 调用的最小间隔（约一帧）
+SNAP_DISTANCE = 16  # 距屏幕边缘小于该像素数时吸附
+
+
+def _win32_monitors():
+    """Windows：各显示器的工作区矩形 [(左, 上, 右, 下)]（不含任务栏）"""
+    import ctypes
+    from ctypes import wintypes
+
+    class MONITORINFO(ctypes.Structure):
+        _fields_ = [('cbSize', wintypes.DWORD), ('rcMonitor', wintypes.RECT),
+                    ('rcWork', wintypes.RECT), ('dwFlags', wintypes.DWORD)]
+
+    user32 = ctypes.windll.user32
+    monitors = []
+    callback_type = ctypes.WINFUNCTYPE(ctypes.c_int, wintypes.HMONITOR, wintypes.HDC,
+                                       ctypes.POINTER(wintypes.RECT), wintypes.LPARAM)
+
+    def callback(monitor, dc, rect, data):
+        info = MONITORINFO()
+        info.cbSize = ctypes.sizeof(MONITORINFO)
+        if user32.GetMonitorInfoW(monitor, ctypes.byref(info)):
+            work = info.rcWork
+            monitors.append((work.left, work.top, work.right, work.bottom))
+        return 1
+
+    user32.EnumDisplayMonitors(None, None, callback_type(callback), 0)
+    return monitors
+
+
+def screen_rects(root):
+    """
+    可吸附的屏幕矩形列表：Windows下逐个显示器查询工作区，
+    其它平台Tk只提供整个屏幕的尺寸，视为一块屏幕
+    """
+    if sys.platform == "win32":
+        try:
+            monitors = _win32_monitors()
+        except (AttributeError, OSError):
+            monitors = []
+        if monitors:
+            return sorted(monitors)
+    return [(0, 0, root.winfo_screenwidth(), root.winfo_screenheight())]
+
+
+def layout_key(rects):
+    """显示器布局标识，如 "1920x1040+0+0;1280x984+1920+0"，用于按布局记住窗口位置"""
+    return ";".join(f"{right - left}x{bottom - top}+{left}+{top}" for left, top, right, bottom in rects)
+
+
+def snap_position(x, y, width, height, rects, distance=SNAP_DISTANCE):
+    """把窗口位置吸附到最近屏幕的边缘（同时吸附两条边即为角落）"""
+    center_x, center_y = x + width / 2, y + height / 2
+
+    def gap(rect):
+        left, top, right, bottom = rect
+        return max(left - center_x, 0, center_x - right) + max(top - center_y, 0, center_y - bottom)
+
+    left, top, right, bottom = min(rects, key=gap)  # 窗口中心所在（或最近）的屏幕
+    if abs(x - left) <= distance:
+        x = left
+    elif abs(x + width - right) <= distance:
+        x = right - width
+    if abs(y - top) <= distance:
+        y = top
+    elif abs(y + height - bottom) <= distance:
+        y = bottom - height
+    return x, y
+
+
+class DragCoalescer:
+    """
+    拖拽合并层：按下时查询一次窗口位置与尺寸，之后只用事件的屏幕坐标推算位置；
+    移动事件只更新目标位置，最多每 frame_ms 毫秒调用一次 geometry
+    :param on_release: 拖拽结束回调 on_release(x, y, layout)，用于保存位置
+    """
+    def __init__(self, root, frame_ms=DRAG_FRAME_MS, snap=SNAP_DISTANCE, on_release=None):
+        self.root = root
+        self.frame_ms = frame_ms
+        self.snap = snap  # 吸附距离（像素），0表示不吸附
+        self.on_release = on_release
+        self.x = None  # 本地记录的窗口位置
+        self.y = None
+        self.size = (0, 0)  # 拖拽开始时的窗口尺寸
+        self.rects = None  # 拖拽开始时的屏幕矩形
+        self.grab = None  # 鼠标相对窗口左上角的偏移，None表示未在拖拽
+        self.pending = None  # 尚未应用的目标位置
+        self.after_id = None  # 挂起的合并刷新任务
+        self.applied = None  # 最近一次应用的位置
+        self.origin = None  # 拖拽开始时的窗口位置
+        self.moved = False  # 本次按下后是否收到过移动事件
+        self.events = 0  # 收到的移动事件数
+        self.geometry_calls = 0  # 实际发出的 geometry 调用数
+        self.queries = 0  # 窗口/屏幕查询次数
+
+    def start(self, event):
+        """按下：查询一次窗口位置、尺寸与屏幕布局"""
+        root = self.root
+        self.x, self.y = root.winfo_x(), root.winfo_y()
+        self.size = (root.winfo_width(), root.winfo_height())
+        self.rects = screen_rects(root)
+        self.queries += 1
+        self.applied = self.origin = (self.x, self.y)
+        self.moved = False
+        self.grab = (event.x_root - self.x, event.y_root - self.y)
+
+    def motion(self, event):
+        """移动：只记录目标位置，本帧尚未安排刷新时安排一次"""
+        if self.grab is None:
+            return
+        self.events += 1
+        self.moved = True
+        self.pending = (event.x_root - self.grab[0], event.y_root - self.grab[1])
+        if self.after_id is None:
+            self.after_id = self.root.after(self.frame_ms, self.flush)
+
+    def flush(self):
+        """应用最新的目标位置（同一帧内的多个事件只产生一次调用）"""
+        self.after_id = None
+        if self.pending is None:
+            return
+        self.x, self.y = self.pending
+        self.pending = None
+        self._apply(self.x, self.y)
+
+    def _apply(self, x, y):
+        if (x, y) == self.applied:
+            return
+        self.root.geometry(f"+{x}+{y}")
+        self.applied = (x, y)
+        self.geometry_calls += 1
+
+    def end(self, event):
+        """松开：立即应用挂起的位置并吸附屏幕边缘，位置有变化时回调保存（单击不吸附也不保存）"""
+        if self.grab is None:
+            return
+        self.grab = None
+        if not self.moved:
+            return
+        if self.after_id is not None:
+            self.root.after_cancel(self.after_id)
+        self.flush()
+        if self.snap:
+            self.x, self.y = snap_position(self.x, self.y, self.size[0], self.size[1], self.rects, self.snap)
+            self._apply(self.x, self.y)
+        if (self.x, self.y) != self.origin and self.on_release:
+            self.on_release(self.x, self.y, layout_key(self.rects))
+
+    def stats(self):
+        """统计信息：移动事件数、geometry 调用数及合并比例"""
+        return {
+            'events': self.events,
+            'geometry_calls': self.geometry_calls,
+            'events_per_call': self.events / self.geometry_calls if self.geometry_calls else 0.0,
+            'queries': self.queries,
+        }
+
+
+class _Event:
+    __slots__ = ('x_root', 'y_root')
+
+    def __init__(self, x_root, y_root):
+        self.x_root = x_root
+        self.y_root = y_root
+
+
+class _FakeWindow:
+    """基准测试用的窗口：after 由事件循环提供，geometry 只计数"""
+    def __init__(self, loop):
+        self.loop = loop
+        self.after = loop.after
+        self.after_cancel = loop.after_cancel
+
+    def winfo_x(self):
+        return 100
+
+    winfo_y = winfo_x
+
+    def winfo_width(self):
+        return 300
+
+    def winfo_height(self):
+        return 100
+
+    def winfo_screenwidth(self):
+        return 1920
+
+    def winfo_screenheight(self):
+        return 1080
+
+    def geometry(self, spec):
+        pass
+
+
+def benchmark(rate=1000, seconds=2.0):
+    """模拟高回报率鼠标：按 rate 每秒产生移动事件，统计事件数与 geometry 调用数"""
+    from animation import SleepLoop
+    loop = SleepLoop()
+    window = _FakeWindow(loop)
+    drag = DragCoalescer(window)
+    drag.start(_Event(150, 150))
+    total = int(rate * seconds)
+    state = {'sent': 0}
+
+    def send():
+        sent = state['sent']
+        drag.motion(_Event(150 + sent % 800, 150 + sent % 400))
+        state['sent'] = sent + 1
+        if state['sent'] < total:
+            loop.after(1000 / rate, send)
+        else:
+            drag.end(_Event(150 + sent % 800, 150 + sent % 400))
+
+    send()
+    loop.run(seconds + 1)
+    return drag.stats()
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="countDowner 拖拽合并基准测试")
+    parser.add_argument('--bench', action='store_true')
+    parser.add_argument('--rate', type=int, default=1000, help="模拟鼠标回报率（每秒事件数）")
+    parser.add_argument('--seconds', type=float, default=2.0)
+    args = parser.parse_args()
+    if args.bench:
+        print(f"拖拽合并：{benchmark(args.rate, args.seconds)}")
+    else:
+        parser.print_help()